@@ -0,0 +1,199 @@
+/**
+ * Service worker for offline play
+ *
+ * - App shell and same-origin files (bird data, built assets) are served
+ *   stale-while-revalidate, so the app opens without signal once it has been
+ *   visited.
+ * - Every question shard and the daily challenge file listed in
+ *   /questions/index.json are precached at install, and again whenever a
+ *   newer index is fetched, so an offline game never waits on the network
+ *   for its questions. Shards are hash-named, so they are served cache-first.
+ * - Media for a difficulty tier is precached on request from the page using
+ *   precache-manifest.json (data-search/build_precache_manifest.py) and
+ *   served cache-first. The manifest's "for" URLs map the full-size photo
+ *   the app asks for to the smaller cached thumbnail.
+ */
+
+const SHELL_CACHE = 'bird-shell-v1';
+const MEDIA_CACHE = 'bird-media-v1';
+const QUESTION_CACHE = 'bird-questions-v1';
+const MANIFEST_URL = '/precache-manifest.json';
+const QUESTION_INDEX_URL = '/questions/index.json';
+const SHELL_URLS = ['/', '/act_birds.json', QUESTION_INDEX_URL, MANIFEST_URL];
+const CACHES = [SHELL_CACHE, MEDIA_CACHE, QUESTION_CACHE];
+
+// Requested URL -> cached URL, rebuilt from the manifest after a restart
+let aliases = null;
+
+self.addEventListener('install', event => {
+  event.waitUntil(
+    caches.open(SHELL_CACHE)
+      .then(cache => cache.addAll(SHELL_URLS).then(() => cache.match(QUESTION_INDEX_URL)))
+      .then(response => response.json())
+      .then(precacheQuestionBank)
+      .then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener('activate', event => {
+  event.waitUntil(
+    caches.keys()
+      .then(keys => Promise.all(
+        keys.filter(key => !CACHES.includes(key)).map(key => caches.delete(key))
+      ))
+      .then(() => self.clients.claim())
+  );
+});
+
+/**
+ * Cache the shards and daily file of a question bank index, dropping those of older banks
+ */
+async function precacheQuestionBank(index) {
+  const urls = new Set(Object.values(index.banks || {}).flat());
+  if (index.daily) urls.add(index.daily);
+
+  const cache = await caches.open(QUESTION_CACHE);
+  const cached = new Set();
+  for (const request of await cache.keys()) {
+    const path = new URL(request.url).pathname;
+    if (urls.has(path)) cached.add(path);
+    else await cache.delete(request);
+  }
+  await cache.addAll([...urls].filter(url => !cached.has(url)));
+}
+
+async function loadManifest() {
+  const cached = await caches.match(MANIFEST_URL);
+  const response = cached || await fetch(MANIFEST_URL);
+  return response.json();
+}
+
+async function getAliases() {
+  if (aliases) return aliases;
+  aliases = new Map();
+  try {
+    const manifest = await loadManifest();
+    for (const file of Object.values(manifest.files)) {
+      aliases.set(file.url, file.url);
+      if (file.for) aliases.set(file.for, file.url);
+    }
+  } catch (error) {
+    // No manifest yet: nothing is precached
+  }
+  return aliases;
+}
+
+/**
+ * Fetch a cross-origin media file, with CORS when the host allows it
+ */
+async function fetchMedia(url) {
+  try {
+    const response = await fetch(url, { mode: 'cors' });
+    if (response.ok) return response;
+  } catch (error) {
+    // Fall through to an opaque request
+  }
+  return fetch(url, { mode: 'no-cors' });
+}
+
+/**
+ * Cache every file of a tier, reporting progress through a MessagePort
+ */
+async function precacheTier(tier, port) {
+  const manifest = await loadManifest();
+  const ids = (manifest.tiers[tier] || {}).files || [];
+  const cache = await caches.open(MEDIA_CACHE);
+  const revisions = await readRevisions(cache);
+
+  let done = 0;
+  let failed = 0;
+  const queue = [...ids];
+
+  // A few downloads at a time keeps weak connections usable
+  async function worker() {
+    while (queue.length > 0) {
+      const file = manifest.files[queue.shift()];
+      if (revisions[file.url] !== file.revision || !(await cache.match(file.url))) {
+        try {
+          await cache.put(file.url, await fetchMedia(file.url));
+          revisions[file.url] = file.revision;
+        } catch (error) {
+          failed++;
+        }
+      }
+      done++;
+      port.postMessage({ tier, done, total: ids.length });
+    }
+  }
+
+  await Promise.all(Array.from({ length: 4 }, worker));
+  await cache.put('/__revisions', new Response(JSON.stringify(revisions)));
+  aliases = null;
+  port.postMessage({ tier, done, total: ids.length, failed, complete: true });
+}
+
+async function readRevisions(cache) {
+  const response = await cache.match('/__revisions');
+  return response ? response.json() : {};
+}
+
+self.addEventListener('message', event => {
+  if (event.data && event.data.type === 'precache' && event.ports[0]) {
+    event.waitUntil(precacheTier(event.data.tier, event.ports[0]));
+  }
+});
+
+async function staleWhileRevalidate(event) {
+  const { request } = event;
+  const cache = await caches.open(SHELL_CACHE);
+  const cached = await cache.match(request);
+  const network = fetch(request)
+    .then(response => {
+      if (response.ok) {
+        const copy = response.clone();
+        let update = cache.put(request, copy.clone());
+        // A new question bank: cache its shards before the old ones are needed
+        if (new URL(request.url).pathname === QUESTION_INDEX_URL) {
+          update = update.then(() => copy.json()).then(precacheQuestionBank);
+        }
+        event.waitUntil(update.catch(() => {}));
+      }
+      return response;
+    })
+    .catch(() => cached);
+  return cached || network;
+}
+
+async function questionFile(event) {
+  const cached = await caches.match(event.request, { cacheName: QUESTION_CACHE });
+  return cached || staleWhileRevalidate(event);
+}
+
+async function cachedMedia(request) {
+  const cachedUrl = (await getAliases()).get(request.url);
+  if (cachedUrl) {
+    const cached = await caches.match(cachedUrl, { cacheName: MEDIA_CACHE });
+    if (cached) return cached;
+  }
+  return fetch(request);
+}
+
+self.addEventListener('fetch', event => {
+  const { request } = event;
+  if (request.method !== 'GET') return;
+
+  const url = new URL(request.url);
+  if (url.origin === self.location.origin) {
+    // Navigations fall back to the cached app shell (single-page app)
+    if (request.mode === 'navigate') {
+      event.respondWith(fetch(request).catch(() => caches.match('/')));
+    } else if (url.pathname.startsWith('/artefacts/')) {
+      event.respondWith(questionFile(event));
+    } else {
+      event.respondWith(staleWhileRevalidate(event));
+    }
+    return;
+  }
+
+  event.respondWith(cachedMedia(request));
+});
@@ -1,5 +1,7 @@
 import { createApp } from 'vue'
 import './style.css'
 import App from './App.vue'
+import { registerServiceWorker } from './utils/offline.js'
 
 createApp(App).mount('#app')
+registerServiceWorker()
@@ -119,6 +119,18 @@ export function getRandomBird(birds) {
   return birds[index];
 }
 
+/**
+ * Uniformly shuffled copy of an array (Fisher-Yates)
+ */
+export function shuffle(items) {
+  const shuffled = [...items];
+  for (let i = shuffled.length - 1; i > 0; i--) {
+    const j = Math.floor(Math.random() * (i + 1));
+    [shuffled[i], shuffled[j]] = [shuffled[j], shuffled[i]];
+  }
+  return shuffled;
+}
+
 /**
  * Get N random wrong options that are different from the correct answer
  */
@@ -128,7 +140,7 @@ export function getWrongOptions(allBirds, correctBird, count) {
   );
 
   // Shuffle and take the first N
-  const shuffled = [...availableBirds].sort(() => Math.random() - 0.5);
+  const shuffled = shuffle(availableBirds);
   return shuffled.slice(0, count);
 }
 
@@ -142,7 +154,7 @@ export function getTaxonomicWrongOptions(allBirds, correctBird, count, difficult
 
   if (difficulty === 'beginner') {
     // Beginner: completely random selection
-    const shuffled = [...availableBirds].sort(() => Math.random() - 0.5);
+    const shuffled = shuffle(availableBirds);
     return shuffled.slice(0, count);
   }
 
@@ -154,7 +166,7 @@ export function getTaxonomicWrongOptions(allBirds, correctBird, count, difficult
     // First try same genus
     const sameGenus = availableBirds.filter(bird => bird.genus === correctBird.genus);
     if (sameGenus.length >= count) {
-      const shuffled = [...sameGenus].sort(() => Math.random() - 0.5);
+      const shuffled = shuffle(sameGenus);
       return shuffled.slice(0, count);
     }
     candidates = [...sameGenus];
@@ -171,12 +183,12 @@ export function getTaxonomicWrongOptions(allBirds, correctBird, count, difficult
   }
 
   // Shuffle candidates
-  const shuffledCandidates = [...candidates].sort(() => Math.random() - 0.5);
+  const shuffledCandidates = shuffle(candidates);
 
   // If not enough candidates, fill with random birds
   if (shuffledCandidates.length < count) {
     const remaining = availableBirds.filter(bird => !shuffledCandidates.includes(bird));
-    const shuffledRemaining = [...remaining].sort(() => Math.random() - 0.5);
+    const shuffledRemaining = shuffle(remaining);
     return [...shuffledCandidates, ...shuffledRemaining].slice(0, count);
   }
 
@@ -196,7 +208,7 @@ export function createMultipleChoiceOptions(allBirds, correctBird, totalOptions,
 
   // Combine and shuffle
   const allOptions = [correctBird, ...wrongOptions];
-  return allOptions.sort(() => Math.random() - 0.5);
+  return shuffle(allOptions);
 }
 
 /**
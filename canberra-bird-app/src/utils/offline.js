@@ -0,0 +1,117 @@
+/**
+ * Offline play: service worker registration, tier downloads and the
+ * precached media for each species (see public/sw.js)
+ */
+
+const MANIFEST_URL = '/precache-manifest.json';
+
+// How long to wait for a service worker that is still installing
+const WORKER_READY_TIMEOUT_MS = 10000;
+
+let manifest = null;
+
+/**
+ * Register the service worker (production builds only)
+ */
+export function registerServiceWorker() {
+  if ('serviceWorker' in navigator && import.meta.env.PROD) {
+    navigator.serviceWorker.register('/sw.js').catch(error => {
+      console.warn('Service worker registration failed:', error);
+    });
+  }
+}
+
+/**
+ * True when the browser reports no network connection
+ */
+export function isOffline() {
+  return typeof navigator !== 'undefined' && navigator.onLine === false;
+}
+
+/**
+ * Load the precache manifest (null if unavailable)
+ */
+export async function loadPrecacheManifest() {
+  if (manifest) return manifest;
+  try {
+    const response = await fetch(MANIFEST_URL);
+    manifest = response.ok ? await response.json() : null;
+  } catch (error) {
+    manifest = null;
+  }
+  return manifest;
+}
+
+/**
+ * Download size of a tier's offline media
+ * @returns {Promise<Object|null>} {bytes, estimated}; estimated when the
+ *   manifest was built without downloading the files
+ */
+export async function getTierSize(tier) {
+  const data = await loadPrecacheManifest();
+  const info = data && data.tiers[tier];
+  if (!info) return null;
+  return info.bytes !== undefined
+    ? { bytes: info.bytes, estimated: false }
+    : { bytes: info.estimatedBytes, estimated: true };
+}
+
+/**
+ * The service worker registration once it has an active worker
+ * @returns {Promise<ServiceWorkerRegistration|null>} null when no worker is
+ *   registered (development builds, unsupported browsers) or it did not
+ *   activate in time (failed install)
+ */
+async function getActiveRegistration() {
+  if (typeof navigator === 'undefined' || !('serviceWorker' in navigator)) return null;
+  const registration = await navigator.serviceWorker.getRegistration();
+  if (!registration) return null;
+  if (registration.active) return registration;
+  // navigator.serviceWorker.ready never resolves if the install fails
+  const timeout = new Promise(resolve => setTimeout(() => resolve(null), WORKER_READY_TIMEOUT_MS));
+  return Promise.race([navigator.serviceWorker.ready, timeout]);
+}
+
+/**
+ * True when a service worker is registered to download tiers
+ */
+export async function isOfflineAvailable() {
+  return (await getActiveRegistration()) !== null;
+}
+
+/**
+ * Ask the service worker to cache a tier's media
+ * @param {string} tier - Difficulty level
+ * @param {Function} onProgress - Called with {done, total}
+ * @returns {Promise<Object>} Resolves with {done, total, failed} when complete
+ */
+export async function precacheTier(tier, onProgress = () => {}) {
+  const registration = await getActiveRegistration();
+  if (!registration) {
+    throw new Error('Offline play is not available (no active service worker)');
+  }
+
+  return new Promise(resolve => {
+    const channel = new MessageChannel();
+    channel.port1.onmessage = event => {
+      onProgress(event.data);
+      if (event.data.complete) resolve(event.data);
+    };
+    registration.active.postMessage({ type: 'precache', tier }, [channel.port2]);
+  });
+}
+
+/**
+ * The precached photo or recording for a bird, if any tier includes one
+ * @param {Object} bird - Bird object
+ * @param {string} kind - 'photo' or 'audio'
+ */
+export function getPrecachedMedia(bird, kind) {
+  if (!manifest) return null;
+  const entries = bird[kind === 'audio' ? 'audio' : 'photos'] || [];
+  for (const tier of Object.values(manifest.tiers)) {
+    const id = (tier.media[bird.scientificName] || {})[kind];
+    if (id) return entries.find(entry => entry.id === id) || null;
+  }
+  return null;
+}
@@ -0,0 +1,140 @@
+/**
+ * Pregenerated question bank (data-search/build_question_bank.py)
+ *
+ * Questions are streamed from the shards listed in /questions/index.json
+ * (hash-named files under /artefacts/), so a round needs no filtering or
+ * shuffling. Every function returns null when the bank is
+ * missing or was built from a different bird list, and callers fall back to
+ * the live functions in birdData.js.
+ */
+
+import { getAllBirds } from './birdData.js';
+import { getPrecachedMedia, isOffline, loadPrecacheManifest } from './offline.js';
+
+const INDEX_URL = '/questions/index.json';
+
+let bankIndex = undefined;
+let speciesBirds = null;
+
+/**
+ * Load the bank index and check it matches the loaded bird data
+ */
+async function loadIndex() {
+  if (bankIndex !== undefined) return bankIndex;
+
+  try {
+    const response = await fetch(INDEX_URL);
+    bankIndex = response.ok ? await response.json() : null;
+  } catch (error) {
+    bankIndex = null;
+  }
+
+  if (bankIndex) {
+    const birds = getAllBirds();
+    const byName = new Map(birds.map(bird => [bird.scientificName, bird]));
+    speciesBirds = bankIndex.species.map(name => byName.get(name));
+    if (speciesBirds.some(bird => !bird)) {
+      console.warn('Question bank does not match bird data - using live questions');
+      bankIndex = null;
+    }
+  }
+  return bankIndex;
+}
+
+async function fetchJson(url) {
+  const response = await fetch(url);
+  if (!response.ok) throw new Error(`Failed to load ${url}`);
+  return response.json();
+}
+
+/**
+ * Turn a packed [answer, mediaId, options] question into game objects
+ */
+function unpackQuestion([answer, mediaId, options], media) {
+  const bird = speciesBirds[answer];
+  const entries = bird[media] || [];
+  // Without a connection, use the media saved for offline play
+  const offline = isOffline() && getPrecachedMedia(bird, media === 'audio' ? 'audio' : 'photo');
+  return {
+    bird,
+    media: offline || entries.find(entry => entry.id === mediaId) || entries[0] || null,
+    options: options.map(index => speciesBirds[index])
+  };
+}
+
+/**
+ * Create a stream of questions for a difficulty level and mode
+ * @param {string} difficulty - 'beginner', 'intermediate' or 'advanced'
+ * @param {string} mode - 'photo' or 'audio'
+ * @returns {Object|null} Stream with async next() returning {bird, media, options}
+ */
+export async function createQuestionStream(difficulty, mode = 'photo') {
+  const index = await loadIndex();
+  const shards = index && index.banks[`${difficulty}-${mode}`];
+  if (!shards || shards.length === 0) return null;
+
+  const media = mode === 'audio' ? 'audio' : 'photos';
+  await loadPrecacheManifest();
+
+  // Start at a random shard and position so players don't all share one sequence
+  let shardNumber = Math.floor(Math.random() * shards.length);
+  let questions = null;
+  let position = -1;
+  let nextShard = null;
+
+  function prefetch() {
+    nextShard = fetchJson(shards[(shardNumber + 1) % shards.length]);
+    nextShard.catch(() => {});
+  }
+
+  async function take() {
+    if (!questions) {
+      questions = (await fetchJson(shards[shardNumber])).questions;
+      position = Math.floor(Math.random() * questions.length);
+      prefetch();
+    } else if (position >= questions.length) {
+      shardNumber = (shardNumber + 1) % shards.length;
+      questions = (await nextShard).questions;
+      position = 0;
+      prefetch();
+    }
+    return questions[position++];
+  }
+
+  // Offline, skip species whose media was not saved (bounded in case none was)
+  async function takeAvailable() {
+    let question = await take();
+    for (let tries = 0; isOffline() && tries < questions.length; tries++) {
+      if (getPrecachedMedia(speciesBirds[question[0]], mode)) break;
+      question = await take();
+    }
+    return unpackQuestion(question, media);
+  }
+
+  // Calls are queued so a preload and a question load never race over a shard switch
+  let pending = Promise.resolve();
+
+  return {
+    next() {
+      pending = pending.then(takeAvailable, takeAvailable);
+      return pending;
+    }
+  };
+}
+
+/**
+ * Get the pregenerated daily challenge question for a date
+ * @param {string} dateString - Date in YYYY-MM-DD format
+ * @returns {Object|null} {bird, media, options}, or null if the bank has no entry
+ */
+export async function getDailyQuestion(dateString) {
+  const index = await loadIndex();
+  if (!index || !index.daily) return null;
+
+  try {
+    const daily = await fetchJson(index.daily);
+    return daily[dateString] ? unpackQuestion(daily[dateString], 'photos') : null;
+  } catch (error) {
+    return null;
+  }
+}
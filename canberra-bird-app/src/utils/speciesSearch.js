@@ -0,0 +1,149 @@
+/**
+ * Species search over the prebuilt index (data-search/build_search_index.py)
+ *
+ * Same query as search() in build_search_index.py: every query word must
+ * start a word of a name, and a word that starts none matches similar words
+ * by trigram similarity, so typos like "kookabura" still find the species.
+ */
+
+const INDEX_URL = '/search-index.json';
+
+const KIND_PRIORITY = { c: 0, s: 1, a: 2, g: 3 };
+const FUZZY_THRESHOLD = 0.45;
+const MIN_FUZZY_LENGTH = 3;
+const DEFAULT_LIMIT = 8;
+
+let searchIndex = undefined;
+
+/**
+ * Load the search index once; resolves to null if it is missing
+ */
+export async function loadSearchIndex() {
+  if (searchIndex !== undefined) return searchIndex;
+
+  try {
+    const response = await fetch(INDEX_URL);
+    searchIndex = response.ok ? prepareIndex(await response.json()) : null;
+  } catch (error) {
+    searchIndex = null;
+  }
+  return searchIndex;
+}
+
+/**
+ * Lower-case ASCII words: accents and apostrophes dropped, other punctuation as spaces
+ */
+export function normalise(text) {
+  return (text || '')
+    .normalize('NFKD')
+    .replace(/[\u0300-\u036f]/g, '')
+    .toLowerCase()
+    .replace(/['’]/g, '')
+    .replace(/[^a-z0-9]+/g, ' ')
+    .trim();
+}
+
+function trigrams(text) {
+  const padded = ` ${text} `;
+  const grams = new Set();
+  for (let i = 0; i < padded.length - 2; i++) grams.add(padded.slice(i, i + 3));
+  return grams;
+}
+
+/**
+ * Precompute trigram counts per token and a tie-break rank per term
+ */
+function prepareIndex(index) {
+  const { terms, termKinds, termSpecies } = index;
+  const order = terms.map((_, t) => t).sort((a, b) =>
+    KIND_PRIORITY[termKinds[a]] - KIND_PRIORITY[termKinds[b]] ||
+    terms[a].length - terms[b].length ||
+    termSpecies[a] - termSpecies[b]);
+  index.termRanks = new Array(terms.length);
+  order.forEach((t, rank) => { index.termRanks[t] = rank; });
+  index.tokenGrams = index.tokens.map(token => trigrams(token).size);
+  return index;
+}
+
+function lowerBound(sorted, value, lo = 0) {
+  let hi = sorted.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >> 1;
+    if (sorted[mid] < value) lo = mid + 1;
+    else hi = mid;
+  }
+  return lo;
+}
+
+function prefixMatches(index, word) {
+  const lo = lowerBound(index.tokens, word);
+  const hi = lowerBound(index.tokens, word + '\x7f', lo);
+  const matched = new Set();
+  for (let i = lo; i < hi; i++) {
+    for (const t of index.tokenTerms[i]) matched.add(t);
+  }
+  return matched;
+}
+
+function similarWords(index, word) {
+  const grams = trigrams(word);
+  const shared = new Map();
+  for (const gram of grams) {
+    for (const i of index.trigrams[gram] || []) shared.set(i, (shared.get(i) || 0) + 1);
+  }
+
+  const matched = new Map();
+  for (const [i, count] of shared) {
+    const dice = 2 * count / (grams.size + index.tokenGrams[i]);
+    if (dice < FUZZY_THRESHOLD) continue;
+    for (const t of index.tokenTerms[i]) matched.set(t, Math.max(matched.get(t) || 0, dice));
+  }
+  return matched;
+}
+
+/**
+ * Find species matching a query
+ *
+ * @param {string} query - What the player typed
+ * @param {number} limit - Maximum number of species
+ * @returns {Array} [{ scientificName, commonName, term, score }], best first, one per species;
+ *   empty until loadSearchIndex() has resolved
+ */
+export function searchSpecies(query, limit = DEFAULT_LIMIT) {
+  const index = searchIndex;
+  const q = normalise(query);
+  if (!index || !q) return [];
+  const { terms, termSpecies, termRanks } = index;
+
+  // Terms every word starts a word of; similarity of the worst misspelt word for typo matches
+  let matched = null;
+  const similarity = new Map();
+  for (const word of q.split(' ')) {
+    let found = prefixMatches(index, word);
+    if (!found.size && word.length >= MIN_FUZZY_LENGTH) {
+      const similar = similarWords(index, word);
+      found = new Set(similar.keys());
+      for (const [t, dice] of similar) similarity.set(t, Math.min(similarity.get(t) ?? 1, dice));
+    }
+    matched = matched ? new Set([...matched].filter(t => found.has(t))) : found;
+    if (!matched.size) return [];
+  }
+
+  const best = new Map();
+  for (const t of matched) {
+    const score = similarity.get(t) || (terms[t] === q ? 3 : terms[t].startsWith(q) ? 2 : 1);
+    const s = termSpecies[t];
+    const current = best.get(s);
+    if (!current || score > current.score || (score === current.score && termRanks[t] < termRanks[current.t])) {
+      best.set(s, { score, t });
+    }
+  }
+
+  return [...best.values()]
+    .sort((a, b) => b.score - a.score || termRanks[a.t] - termRanks[b.t])
+    .slice(0, limit)
+    .map(({ score, t }) => {
+      const [scientificName, commonName] = index.species[termSpecies[t]];
+      return { scientificName, commonName, term: terms[t], score: Math.round(score * 1000) / 1000 };
+    });
+}
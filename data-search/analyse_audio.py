@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Audio Loudness and Silence Analysis
+Decodes every recording once (ffmpeg) and measures integrated loudness and
+leading/trailing silence with NumPy, so the app can skip silence and play
+clips at a consistent level
+
+Adds to each audio entry:
+    startOffsetSec   where audible sound starts (less a short pre-roll)
+    endOffsetSec     where it ends, when the clip has trailing silence
+    gainDb           gain to reach TARGET_LUFS, limited by the clip's peak
+
+Loudness follows ITU-R BS.1770 (K-weighting, 400 ms blocks, absolute and
+relative gates). The K-weighting biquads are designed for the decode rate from
+the filters' analogue parameters (at 48 kHz this gives the standard's published
+coefficients) and their magnitude response is applied in the frequency domain;
+a full-scale 997 Hz sine measures -3.01 LUFS at 48 kHz and -2.98 at 22.05 kHz.
+
+With --bake, trimmed and gain-adjusted MP3 derivatives are written to the
+artefact store (artefacts.py) and recorded as normalisedUrl, which the app
+plays in place of url.
+
+Recordings are read from the media mirror (media_mirror.py) when present,
+otherwise streamed from their URL.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from artefacts import ArtefactStore
+from media_ids import media_id
+from media_mirror import MediaStore
+
+SAMPLE_RATE = 22050
+
+# Level the app's clips are normalised to; gains are kept within these bounds
+TARGET_LUFS = -18.0
+MAX_GAIN_DB = 18.0
+MIN_GAIN_DB = -12.0
+PEAK_CEILING_DBFS = -1.0
+
+# Silence detection: 50 ms frames; a frame is silent when it is more than
+# SILENCE_BELOW_PEAK_DB under the loudest frame. When the noise floor (plus
+# NOISE_MARGIN_DB) reaches that level there is no silence to trim
+FRAME_SEC = 0.05
+SILENCE_BELOW_PEAK_DB = 30.0
+NOISE_MARGIN_DB = 6.0
+NOISE_FLOOR_PERCENTILE = 10
+
+# Keep a little lead-in before the first sound; ignore trims shorter than MIN_TRIM_SEC
+PRE_ROLL_SEC = 0.15
+MIN_TRIM_SEC = 0.5
+
+# BS.1770 gating blocks
+BLOCK_SEC = 0.4
+BLOCK_STEP_SEC = 0.1
+ABSOLUTE_GATE_LUFS = -70.0
+RELATIVE_GATE_LU = -10.0
+
+DEFAULT_WORKERS = 4
+
+BAKED_KIND = 'normalised-audio'
+
+# Bumped when the analysis changes, so cached results from older versions are redone
+ANALYSIS_VERSION = 3
+
+ANALYSIS_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'audio_analysis.json')
+
+HEADERS = 'User-Agent: Canberra Bird Game Audio Analysis/1.0 (educational project)\r\n'
+
+
+def decode(source, sample_rate=SAMPLE_RATE):
+    """Decode a file or URL to mono float32 samples with ffmpeg"""
+    command = ['ffmpeg', '-nostdin', '-v', 'error']
+    if source.startswith('http'):
+        command += ['-headers', HEADERS]
+    command += ['-i', source, '-ac', '1', '-ar', str(sample_rate), '-f', 'f32le', '-']
+    result = subprocess.run(command, capture_output=True, timeout=300)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode('utf-8', 'replace').strip() or 'ffmpeg failed')
+    return np.frombuffer(result.stdout, dtype='<f4')
+
+
+def _biquad_magnitude(b, a, freqs, sample_rate):
+    z = np.exp(-2j * np.pi * freqs / sample_rate)
+    return np.abs((b[0] + b[1] * z + b[2] * z * z) / (a[0] + a[1] * z + a[2] * z * z))
+
+
+def k_weighting(freqs, sample_rate):
+    """
+    Magnitude response of the BS.1770 K-weighting filter (high shelf then
+    high-pass), designed for the given sample rate
+    """
+    # High shelf: +4 dB above ~1.7 kHz (head effects)
+    gain_db, q, fc = 3.999843853973347, 0.7071752369554196, 1681.974450955533
+    k = np.tan(np.pi * fc / sample_rate)
+    vh = 10 ** (gain_db / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf_b = ((vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0)
+    shelf_a = (1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0)
+
+    # RLB high-pass at ~38 Hz
+    q, fc = 0.5003270373238773, 38.13547087602444
+    k = np.tan(np.pi * fc / sample_rate)
+    a0 = 1 + k / q + k * k
+    high_b = (1.0, -2.0, 1.0)
+    high_a = (1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0)
+
+    return (_biquad_magnitude(shelf_b, shelf_a, freqs, sample_rate)
+            * _biquad_magnitude(high_b, high_a, freqs, sample_rate))
+
+
+def apply_k_weighting(samples, sample_rate=SAMPLE_RATE):
+    spectrum = np.fft.rfft(samples)
+    freqs = np.fft.rfftfreq(len(samples), 1 / sample_rate)
+    return np.fft.irfft(spectrum * k_weighting(freqs, sample_rate), len(samples))
+
+
+def integrated_loudness(weighted, sample_rate=SAMPLE_RATE):
+    """
+    Gated integrated loudness (LUFS) of a K-weighted signal, or None if it is silent
+
+    Block mean squares come from one cumulative sum, so every overlapping
+    400 ms block is measured without a Python loop.
+    """
+    block = int(BLOCK_SEC * sample_rate)
+    step = int(BLOCK_STEP_SEC * sample_rate)
+    if len(weighted) < block:
+        block = step = len(weighted)
+    if block == 0:
+        return None
+
+    energy = np.concatenate([[0.0], np.cumsum(weighted.astype(np.float64) ** 2)])
+    starts = np.arange(0, len(weighted) - block + 1, step)
+    power = (energy[starts + block] - energy[starts]) / block
+    with np.errstate(divide='ignore'):
+        loudness = -0.691 + 10 * np.log10(power)
+
+    gated = power[loudness > ABSOLUTE_GATE_LUFS]
+    if len(gated) == 0:
+        return None
+    relative_gate = -0.691 + 10 * np.log10(gated.mean()) + RELATIVE_GATE_LU
+    gated = power[loudness > max(ABSOLUTE_GATE_LUFS, relative_gate)]
+    return float(-0.691 + 10 * np.log10(gated.mean()))
+
+
+def frame_levels(samples, sample_rate=SAMPLE_RATE):
+    """RMS level in dBFS of each FRAME_SEC frame"""
+    frame = int(FRAME_SEC * sample_rate)
+    count = len(samples) // frame
+    frames = samples[:count * frame].reshape(count, frame).astype(np.float64)
+    rms = np.sqrt((frames ** 2).mean(axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def audible_span(levels):
+    """
+    First and last audible frame, or None if there are no frames
+
+    A continuous recording (a steady tone, a chorus over a noise bed) has no
+    clear gap between its noise floor and its peak, so every frame is audible.
+
+    Returns:
+        (first, last) frame indices
+    """
+    if len(levels) == 0:
+        return None
+    peak = levels.max()
+    floor = np.percentile(levels, NOISE_FLOOR_PERCENTILE)
+    threshold = peak - SILENCE_BELOW_PEAK_DB
+    if floor + NOISE_MARGIN_DB >= threshold:
+        return 0, len(levels) - 1
+    audible = np.flatnonzero(levels >= threshold)
+    return int(audible[0]), int(audible[-1])
+
+
+def analyse_samples(samples, sample_rate=SAMPLE_RATE):
+    """
+    Loudness, peak, silence trim and gain for decoded samples
+
+    Returns:
+        Dict with durationSec, loudnessLufs, peakDbfs, startOffsetSec,
+        endOffsetSec (None without trailing silence) and gainDb
+    """
+    duration = len(samples) / sample_rate
+    weighted = apply_k_weighting(samples, sample_rate)
+    loudness = integrated_loudness(weighted, sample_rate)
+    peak = float(np.abs(samples).max()) if len(samples) else 0.0
+    peak_db = 20 * np.log10(peak) if peak > 0 else None
+
+    start = 0.0
+    end = None
+    span = audible_span(frame_levels(weighted, sample_rate))
+    if span:
+        first = max(0.0, span[0] * FRAME_SEC - PRE_ROLL_SEC)
+        last = min(duration, (span[1] + 1) * FRAME_SEC + PRE_ROLL_SEC)
+        if first >= MIN_TRIM_SEC:
+            start = first
+        if duration - last >= MIN_TRIM_SEC:
+            end = last
+
+    gain = 0.0
+    if loudness is not None:
+        gain = min(max(TARGET_LUFS - loudness, MIN_GAIN_DB), MAX_GAIN_DB)
+        if peak_db is not None:
+            gain = min(gain, PEAK_CEILING_DBFS - peak_db)
+
+    return {
+        'durationSec': round(duration, 2),
+        'loudnessLufs': None if loudness is None else round(loudness, 1),
+        'peakDbfs': None if peak_db is None else round(float(peak_db), 1),
+        'startOffsetSec': round(start, 2),
+        'endOffsetSec': None if end is None else round(end, 2),
+        'gainDb': round(float(gain), 1),
+    }
+
+
+def source_for(entry, store):
+    """Mirrored file for an entry if there is one, otherwise its URL"""
+    stored = store.index.get(entry['url'])
+    if stored and store.has(stored['sha256']):
+        return store.path(stored['sha256'])
+    return entry['url']
+
+
+def analyse_recording(entry, store):
+    try:
+        return analyse_samples(decode(source_for(entry, store)))
+    except Exception as e:
+        print(f"Error analysing {entry['url']}: {e}")
+        return None
+
+
+def bake(entry, analysis, store, artefacts):
+    """Store a trimmed, gain-adjusted MP3 derivative; returns its URL"""
+    fd, output_path = tempfile.mkstemp(suffix='.mp3')
+    os.close(fd)
+    command = ['ffmpeg', '-nostdin', '-v', 'error', '-y']
+    if analysis['startOffsetSec']:
+        command += ['-ss', str(analysis['startOffsetSec'])]
+    if analysis['endOffsetSec']:
+        command += ['-to', str(analysis['endOffsetSec'])]
+    command += ['-i', source_for(entry, store), '-af', f"volume={analysis['gainDb']}dB",
+                '-ac', '1', '-c:a', 'libmp3lame', '-q:a', '5', output_path]
+    try:
+        subprocess.run(command, check=True, capture_output=True, timeout=300)
+    except Exception:
+        os.remove(output_path)
+        raise
+    return artefacts.put_file(entry.get('id') or media_id(entry), BAKED_KIND, output_path, 'mp3')
+
+
+def load_analysis_cache(path=ANALYSIS_CACHE_FILE):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_analysis_cache(cache, path=ANALYSIS_CACHE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+
+
+def apply_analysis(entry, analysis):
+    entry['startOffsetSec'] = analysis['startOffsetSec']
+    entry['gainDb'] = analysis['gainDb']
+    if analysis['endOffsetSec'] is not None:
+        entry['endOffsetSec'] = analysis['endOffsetSec']
+    else:
+        entry.pop('endOffsetSec', None)
+
+
+def analyse_dataset(data, store, workers=DEFAULT_WORKERS, refresh=False):
+    """
+    Analyse every recording in place, reusing cached results while the URL
+    and ANALYSIS_VERSION are unchanged
+
+    Returns:
+        List of (entry, analysis) for every recording analysed or reused
+    """
+    cache = {} if refresh else load_analysis_cache()
+    recordings = [a for bird in data['birds'] for a in bird.get('audio', [])]
+
+    def cached(entry):
+        hit = cache.get(entry.get('id') or media_id(entry))
+        if hit and hit.get('url') == entry['url'] and hit.get('version') == ANALYSIS_VERSION:
+            return hit['analysis']
+        return None
+
+    results = [(entry, cached(entry)) for entry in recordings]
+    missing = [entry for entry, analysis in results if analysis is None]
+    print(f"Reused {len(recordings) - len(missing)} cached analyses; "
+          f"analysing {len(missing)} recordings with {workers} workers...")
+
+    # ffmpeg runs in subprocesses, so threads keep every core busy
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for i, (entry, analysis) in enumerate(
+                zip(missing, executor.map(lambda e: analyse_recording(e, store), missing)), 1):
+            if analysis:
+                cache[entry.get('id') or media_id(entry)] = {
+                    'url': entry['url'], 'version': ANALYSIS_VERSION, 'analysis': analysis}
+            if i % 50 == 0:
+                save_analysis_cache(cache)
+                print(f"  {i}/{len(missing)}")
+    save_analysis_cache(cache)
+
+    analysed = []
+    for entry in recordings:
+        analysis = cached(entry)
+        if analysis:
+            apply_analysis(entry, analysis)
+            analysed.append((entry, analysis))
+    return analysed
+
+
+def print_report(analysed):
+    if not analysed:
+        print("No recordings analysed")
+        return
+    starts = np.array([a['startOffsetSec'] for _, a in analysed])
+    gains = np.array([a['gainDb'] for _, a in analysed])
+    trimmed = starts[starts > 0]
+    print(f"\nRecordings analysed: {len(analysed)}")
+    print(f"Leading silence skipped: {len(trimmed)} recordings, "
+          f"median {np.median(trimmed) if len(trimmed) else 0:.1f} s, max {starts.max():.1f} s, "
+          f"{starts.sum() / 60:.1f} min in total")
+    print(f"Gain: median {np.median(gains):+.1f} dB, "
+          f"{(gains >= 6).sum()} recordings boosted by 6 dB or more, {(gains < 0).sum()} attenuated")
+    silent = sum(1 for _, a in analysed if a['loudnessLufs'] is None)
+    if silent:
+        print(f"Below the loudness gate (check these): {silent}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure loudness and silence of every recording')
+    parser.add_argument('bird_data', nargs='?', default='../data/act_birds.json',
+                        help='Bird data JSON file to update in place')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Concurrent decodes')
+    parser.add_argument('--refresh', action='store_true', help='Re-analyse recordings with cached results')
+    parser.add_argument('--bake', action='store_true',
+                        help='Store trimmed, normalised MP3 derivatives and record them as normalisedUrl')
+    args = parser.parse_args()
+
+    if not shutil.which('ffmpeg'):
+        print("ffmpeg is required to decode recordings (https://ffmpeg.org/download.html)")
+        return
+
+    print(f"Loading bird data from {args.bird_data}...")
+    with open(args.bird_data, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    store = MediaStore()
+    analysed = analyse_dataset(data, store, args.workers, args.refresh)
+    print_report(analysed)
+
+    if args.bake:
+        artefacts = ArtefactStore()
+        # Derivatives already in the store are kept; --refresh re-bakes after re-analysis
+        pending = [(entry, analysis) for entry, analysis in analysed
+                   if args.refresh or not entry.get('normalisedUrl')
+                   or entry['normalisedUrl'] != artefacts.get(entry.get('id') or media_id(entry), BAKED_KIND)]
+        print(f"\nBaking {len(pending)} derivatives ({len(analysed) - len(pending)} up to date)...")
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            urls = list(executor.map(lambda item: bake(item[0], item[1], store, artefacts), pending))
+        for (entry, _), url in zip(pending, urls):
+            entry['normalisedUrl'] = url
+        artefacts.save()
+        print(f"Stored {artefacts.written} new files")
+
+    print(f"Writing updated data to {args.bird_data}...")
+    with open(args.bird_data, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+    print("Done!")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Artefact Store
+Every generated file the app serves (spectrograms, normalised audio, question
+bank shards) is written here under the hash of its contents, so
+regenerating unchanged output writes nothing new. Deploys then upload only new
+hashes, and files can be cached forever (public/_headers).
+
+    canberra-bird-app/public/artefacts/<sha256[:20]>.<ext>   the files
+    data/artefacts.json                                      owner -> kind -> file
+
+Owners are media IDs for per-recording artefacts, or a stage name (e.g.
+"questions") for shared ones. The manifest lets stages find what they
+generated before and the report break sizes down by kind.
+
+gc deletes every file not referenced from a regional dataset, the shared
+species media store (regions.py) or the app's other entry points (question
+bank index, precache manifest) and drops manifest entries for deleted files.
+
+Usage:
+    python artefacts.py              size report
+    python artefacts.py --gc         delete unreferenced files
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+from collections import defaultdict
+
+from regions import REGIONS, STORE_FILE, get_region
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_ARTEFACT_DIR = os.path.join(HERE, '..', 'canberra-bird-app', 'public', 'artefacts')
+DEFAULT_MANIFEST = os.path.join(HERE, '..', 'data', 'artefacts.json')
+DEFAULT_URL_PREFIX = '/artefacts'
+
+# Files that reference artefacts: every region's dataset, the media store they
+# are projected from, and the app files served at fixed URLs
+DEFAULT_ROOTS = [get_region(key)['datasetPath'] for key in REGIONS] + [
+    STORE_FILE,
+    os.path.join(HERE, '..', 'canberra-bird-app', 'public', 'questions', 'index.json'),
+    os.path.join(HERE, '..', 'canberra-bird-app', 'public', 'precache-manifest.json'),
+]
+
+HASH_LENGTH = 20
+ARTEFACT_NAME = re.compile(rf'\b([0-9a-f]{{{HASH_LENGTH}}}\.[a-z0-9]+)\b')
+
+
+class ArtefactStore:
+    """Hash-named files plus a manifest of which owner generated which file"""
+
+    def __init__(self, root=DEFAULT_ARTEFACT_DIR, manifest=DEFAULT_MANIFEST, url_prefix=DEFAULT_URL_PREFIX):
+        self.root = root
+        self.manifest_file = manifest
+        self.url_prefix = url_prefix.rstrip('/')
+        try:
+            with open(manifest, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.manifest = {}
+        self.written = 0
+
+    def url(self, name):
+        return f"{self.url_prefix}/{name}"
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    def _record(self, owner, kind, name):
+        self.manifest.setdefault(owner, {})[kind] = name
+        return self.url(name)
+
+    def put(self, owner, kind, content, ext):
+        """
+        Store bytes and record them as owner's artefact of this kind
+
+        Returns:
+            URL of the stored file
+        """
+        name = f"{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}.{ext}"
+        path = self.path(name)
+        if not os.path.exists(path):
+            os.makedirs(self.root, exist_ok=True)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+            self.written += 1
+        return self._record(owner, kind, name)
+
+    def put_file(self, owner, kind, source, ext):
+        """Move a generated file into the store; returns its URL"""
+        digest = hashlib.sha256()
+        with open(source, 'rb') as f:
+            while chunk := f.read(1024 * 1024):
+                digest.update(chunk)
+        name = f"{digest.hexdigest()[:HASH_LENGTH]}.{ext}"
+        if os.path.exists(self.path(name)):
+            os.remove(source)
+        else:
+            os.makedirs(self.root, exist_ok=True)
+            shutil.move(source, self.path(name))
+            self.written += 1
+        return self._record(owner, kind, name)
+
+    def get(self, owner, kind):
+        """URL of owner's current artefact of this kind, if it still exists"""
+        name = self.manifest.get(owner, {}).get(kind)
+        return self.url(name) if name and os.path.exists(self.path(name)) else None
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.manifest_file), exist_ok=True)
+        tmp_path = self.manifest_file + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=1, sort_keys=True)
+            f.write('\n')
+        os.replace(tmp_path, self.manifest_file)
+
+    def files(self):
+        """Stored file names and sizes"""
+        if not os.path.isdir(self.root):
+            return {}
+        return {name: os.path.getsize(self.path(name)) for name in os.listdir(self.root)
+                if ARTEFACT_NAME.fullmatch(name)}
+
+    def referenced(self, roots):
+        """Artefact names mentioned in any of the root files"""
+        names = set()
+        for root in roots:
+            if os.path.exists(root):
+                with open(root, 'r', encoding='utf-8') as f:
+                    names.update(ARTEFACT_NAME.findall(f.read()))
+        return names
+
+    def gc(self, roots, dry_run=False):
+        """
+        Delete unreferenced files and drop manifest entries that point at them
+
+        Returns:
+            (files removed, bytes freed)
+        """
+        keep = self.referenced(roots)
+        garbage = {name: size for name, size in self.files().items() if name not in keep}
+        if not dry_run:
+            for name in garbage:
+                os.remove(self.path(name))
+            for owner in list(self.manifest):
+                kinds = {k: n for k, n in self.manifest[owner].items() if n in keep}
+                if kinds:
+                    self.manifest[owner] = kinds
+                else:
+                    del self.manifest[owner]
+            self.save()
+        return len(garbage), sum(garbage.values())
+
+    def report(self):
+        """
+        Sizes by kind
+
+        Returns:
+            Dict mapping kind to {'files', 'bytes'}, plus 'unrecorded' for
+            stored files no manifest entry points at
+        """
+        sizes = self.files()
+        kinds = defaultdict(lambda: {'files': 0, 'bytes': 0})
+        seen = set()
+        for owner_kinds in self.manifest.values():
+            for kind, name in owner_kinds.items():
+                # Strip per-owner suffixes such as question shard numbers
+                label = re.sub(r'-\d+$', '', kind)
+                if name in sizes and name not in seen:
+                    seen.add(name)
+                    kinds[label]['files'] += 1
+                    kinds[label]['bytes'] += sizes[name]
+        for name in set(sizes) - seen:
+            kinds['unrecorded']['files'] += 1
+            kinds['unrecorded']['bytes'] += sizes[name]
+        return dict(kinds)
+
+
+def print_report(store, roots):
+    kinds = store.report()
+    referenced = store.referenced(roots)
+    sizes = store.files()
+    print(f"Artefacts in {os.path.normpath(store.root)}:\n")
+    print(f"{'Kind':<28}{'Files':>8}{'MB':>10}")
+    for kind, totals in sorted(kinds.items(), key=lambda item: -item[1]['bytes']):
+        print(f"{kind:<28}{totals['files']:>8}{totals['bytes'] / 1e6:>10.2f}")
+    print(f"{'Total':<28}{len(sizes):>8}{sum(sizes.values()) / 1e6:>10.2f}")
+
+    unreferenced = [size for name, size in sizes.items() if name not in referenced]
+    if unreferenced:
+        print(f"\n{len(unreferenced)} files ({sum(unreferenced) / 1e6:.2f} MB) are not referenced; "
+              f"run with --gc to delete them")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report on or garbage-collect the artefact store')
+    parser.add_argument('--gc', action='store_true', help='Delete files not referenced by any root')
+    parser.add_argument('--dry-run', action='store_true', help='With --gc, only report what would be deleted')
+    parser.add_argument('--root', action='append', dest='roots',
+                        help='File that references artefacts (repeatable; default: every regional '
+                             'dataset, the species media store, question bank index and '
+                             'precache manifest)')
+    args = parser.parse_args()
+
+    roots = args.roots or DEFAULT_ROOTS
+    store = ArtefactStore()
+
+    if args.gc:
+        removed, freed = store.gc(roots, args.dry_run)
+        action = 'Would delete' if args.dry_run else 'Deleted'
+        print(f"{action} {removed} unreferenced files ({freed / 1e6:.2f} MB)\n")
+
+    print_report(store, roots)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Offline Precache Manifest Builder
+Selects, per difficulty tier, one small photo and one short recording per
+species within a size budget, and writes a precache manifest for the app's
+service worker (canberra-bird-app/public/sw.js) so a whole session can be
+played from cache
+
+Species are taken most common first, photos before audio, so a tight budget
+still covers every species with a photo. The same media is chosen for a
+species in every tier, so tier caches overlap.
+
+Sizes and SHA-256 revisions come from downloading each selected file with
+--fetch (cached in cache/precache_files.json). Without it, sizes are only
+estimated from harvested metadata or typical sizes, and are written as
+estimatedBytes with no revision, so the service worker caches such a file
+once and keeps it until its URL changes.
+
+The question bank (questions/index.json and its shards) is not listed here:
+the service worker precaches it from the index itself.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from harvest_media_metadata import parse_length
+from media_ids import media_id
+from optimize_wikimedia_urls import convert_to_thumbnail
+from simulate_game import DIFFICULTY_LEVELS
+
+# Default per-tier budgets in MB
+DEFAULT_BUDGETS = {'beginner': 60, 'intermediate': 90, 'advanced': 120}
+
+# Width of the precached Commons thumbnail (a standard Commons thumbnail step)
+PRECACHE_PHOTO_WIDTH = 500
+
+# Size estimates when neither harvested metadata nor a download is available
+ESTIMATED_PHOTO_BYTES = 70_000
+ESTIMATED_AUDIO_BYTES_PER_SEC = 16_000
+ESTIMATED_AUDIO_SECONDS = 30
+
+# Recordings longer than this are only used when a species has nothing shorter
+MAX_CLIP_SECONDS = 30
+
+RARITY_ORDER = ['very_common', 'common', 'uncommon', 'rare', 'vagrant', 'extinct']
+
+FILE_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'precache_files.json')
+DEFAULT_OUTPUT = '../canberra-bird-app/public/precache-manifest.json'
+
+HEADERS = {
+    'User-Agent': 'Canberra Bird Game Precache Builder/1.0 (educational project)',
+}
+
+
+def small_photo_url(url, width=PRECACHE_PHOTO_WIDTH):
+    """Commons thumbnail of the given width; other sources unchanged"""
+    if '/thumb/' in url:
+        return re.sub(r'/\d+px-([^/]+)$', rf'/{width}px-\1', url)
+    return convert_to_thumbnail(url, width)
+
+
+def estimated_photo_bytes(photo, width=PRECACHE_PHOTO_WIDTH):
+    """Scale a harvested byte size by area to the thumbnail width"""
+    if photo.get('bytes') and photo.get('width'):
+        scale = min(1.0, width / photo['width'])
+        return int(photo['bytes'] * scale * scale)
+    return ESTIMATED_PHOTO_BYTES
+
+
+def clip_seconds(audio):
+    return audio.get('durationSec') or parse_length(audio.get('length')) or ESTIMATED_AUDIO_SECONDS
+
+
+def estimated_audio_bytes(audio):
+    return audio.get('bytes') or int(clip_seconds(audio) * ESTIMATED_AUDIO_BYTES_PER_SEC)
+
+
+def choose_media(bird):
+    """
+    The species' precache candidates: its smallest photo and shortest short clip
+
+    Returns:
+        List of file dicts {'url', 'for' (the URL the app requests), 'kind',
+        'id', 'bytes', 'estimated'}
+    """
+    files = []
+    photos = bird.get('photos', [])
+    if photos:
+        photo = min(photos, key=estimated_photo_bytes)
+        files.append({
+            'url': small_photo_url(photo['url']),
+            'for': photo['url'],
+            'kind': 'photo',
+            'id': photo.get('id') or media_id(photo),
+            'bytes': estimated_photo_bytes(photo),
+            'estimated': True,
+        })
+
+    audio = bird.get('audio', [])
+    if audio:
+        short = [a for a in audio if clip_seconds(a) <= MAX_CLIP_SECONDS] or audio
+        clip = min(short, key=estimated_audio_bytes)
+        files.append({
+            'url': clip['url'],
+            'for': clip['url'],
+            'kind': 'audio',
+            'id': clip.get('id') or media_id(clip),
+            'bytes': estimated_audio_bytes(clip),
+            'estimated': True,
+        })
+    return files
+
+
+def load_file_cache():
+    try:
+        with open(FILE_CACHE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_file_cache(cache):
+    os.makedirs(os.path.dirname(FILE_CACHE), exist_ok=True)
+    with open(FILE_CACHE, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+
+
+def fetch_file_info(url):
+    """Download a file and return {'bytes', 'sha256'}, or None on failure"""
+    try:
+        req = urllib.request.Request(url, headers=HEADERS)
+        with urllib.request.urlopen(req, timeout=60) as response:
+            body = response.read()
+    except Exception as e:
+        print(f"Error downloading {url}: {e}")
+        return None
+    return {'bytes': len(body), 'sha256': hashlib.sha256(body).hexdigest()}
+
+
+def measure_files(files, workers, refresh=False):
+    """Replace estimated sizes with downloaded sizes and SHA-256 hashes"""
+    cache = {} if refresh else load_file_cache()
+    missing = sorted({f['url'] for f in files} - set(cache))
+    print(f"Downloading {len(missing)} files ({len(cache)} cached) with {workers} workers...")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for url, info in zip(missing, executor.map(fetch_file_info, missing)):
+            if info:
+                cache[url] = info
+    save_file_cache(cache)
+
+    for f in files:
+        info = cache.get(f['url'])
+        if info:
+            f.update(bytes=info['bytes'], sha256=info['sha256'], estimated=False)
+
+
+def select_tier(birds, level, budget_bytes, candidates):
+    """
+    Fill one tier's budget: a photo for each species (most common first), then a clip for each
+
+    Returns:
+        (files, media): the files to precache, and scientificName -> {'photo', 'audio'} IDs
+    """
+    rarities = DIFFICULTY_LEVELS[level]['rarities']
+    species = sorted((b for b in birds if b.get('rarity') in rarities),
+                     key=lambda b: (RARITY_ORDER.index(b['rarity']), b['scientificName']))
+
+    files = []
+    media = {}
+    used = 0
+    for kind in ('photo', 'audio'):
+        for bird in species:
+            for f in candidates[bird['scientificName']]:
+                if f['kind'] != kind or used + f['bytes'] > budget_bytes:
+                    continue
+                files.append(f)
+                media.setdefault(bird['scientificName'], {})[kind] = f['id']
+                used += f['bytes']
+    return files, media
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the offline precache manifest for the app')
+    parser.add_argument('bird_data', nargs='?', default='../data/act_birds.json',
+                        help='Bird data JSON file')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='Manifest file')
+    for level, megabytes in DEFAULT_BUDGETS.items():
+        parser.add_argument(f'--{level}-mb', type=float, default=megabytes,
+                            help=f'Size budget for the {level} tier in MB')
+    parser.add_argument('--fetch', action='store_true',
+                        help='Download selected files for exact sizes and SHA-256 revisions')
+    parser.add_argument('--refresh', action='store_true', help='With --fetch, ignore cached downloads')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent downloads for --fetch')
+    args = parser.parse_args()
+
+    with open(args.bird_data, 'r', encoding='utf-8') as f:
+        birds = json.load(f)['birds']
+
+    candidates = {bird['scientificName']: choose_media(bird) for bird in birds}
+    if args.fetch:
+        measure_files([f for files in candidates.values() for f in files], args.workers, args.refresh)
+
+    # Files are listed once, keyed by media ID; tiers refer to them by ID
+    manifest = {'generated': datetime.now().isoformat(), 'files': {}, 'tiers': {}}
+    for level in DIFFICULTY_LEVELS:
+        budget = getattr(args, f'{level}_mb') * 1_000_000
+        files, media = select_tier(birds, level, budget, candidates)
+        total = sum(f['bytes'] for f in files)
+        estimated = any(f['estimated'] for f in files)
+        for f in files:
+            if f['estimated']:
+                measured = {'estimatedBytes': f['bytes']}
+            else:
+                measured = {'revision': f['sha256'], 'bytes': f['bytes']}
+            manifest['files'][f['id']] = {
+                'url': f['url'],
+                **measured,
+                **({'for': f['for']} if f['for'] != f['url'] else {}),
+            }
+        manifest['tiers'][level] = {
+            'budgetBytes': int(budget),
+            'estimatedBytes' if estimated else 'bytes': total,
+            'files': [f['id'] for f in files],
+            'media': media,
+        }
+        photos = sum(1 for m in media.values() if 'photo' in m)
+        clips = sum(1 for m in media.values() if 'audio' in m)
+        print(f"{level}: {photos} photos, {clips} clips, {total / 1e6:.1f} / {budget / 1e6:.0f} MB"
+              f"{' (estimated)' if estimated else ''}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, separators=(',', ':'), ensure_ascii=False)
+    print(f"\nManifest written to {args.output} ({os.path.getsize(args.output) / 1024:.0f} KB)")
+
+
+if __name__ == '__main__':
+    main()
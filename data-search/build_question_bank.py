@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Question Bank Builder
+Pregenerates shuffled multiple-choice questions for every difficulty level and
+mode (photo/audio), plus one fixed question per day for the daily challenge,
+so the app streams questions instead of filtering and shuffling the whole bird
+list every round
+
+Distractors follow the app's getTaxonomicWrongOptions tiers (shared with
+simulate_game.py); option order is a uniform shuffle.
+
+Output:
+    public/questions/index.json   species order, shard URLs, daily file URL
+    shards                        {"questions": [[answer, mediaId, [options...]], ...]}
+    daily file                    {"YYYY-MM-DD": [answer, mediaId, [options...]], ...}
+
+Shards and the daily file go to the artefact store (artefacts.py), so a
+rebuild only adds files whose questions changed; index.json stays at a fixed
+URL. answer and options are indices into index.json's species list; mediaId
+is the photo or audio "id" from media_ids.py.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from datetime import date, timedelta
+
+import numpy as np
+
+from artefacts import ArtefactStore
+from media_ids import media_id
+from simulate_game import DIFFICULTY_LEVELS, Pool, simulate_rounds
+
+MODES = {'photo': 'photos', 'audio': 'audio'}
+
+DEFAULT_QUESTIONS = 5000
+QUESTIONS_PER_SHARD = 500
+DAILY_DAYS = 366
+
+# DailyChallenge.vue: four options, beginner (uniform) distractors from every species
+DAILY_OPTION_COUNT = 4
+
+DEFAULT_OUTPUT_DIR = '../canberra-bird-app/public/questions'
+
+ARTEFACT_OWNER = 'questions'
+
+
+def _int32(value):
+    return (value + 2**31) % 2**32 - 2**31
+
+
+def daily_bird_index(total_birds, date_string):
+    """
+    Python port of getDailyBirdIndex() in canberra-bird-app/src/utils/dailySeed.js,
+    so the daily question's answer matches the app's daily bird
+    """
+    # hashString
+    seed = 0
+    for char in f"canberra-birds-{date_string}":
+        seed = _int32((seed << 5) - seed + ord(char))
+    seed = abs(seed)
+
+    # First Mulberry32 draw
+    state = (seed + 0x6D2B79F5) % 2**32
+    t = ((state ^ (state >> 15)) * (1 | state)) % 2**32
+    t = ((t + ((t ^ (t >> 7)) * (61 | t)) % 2**32) % 2**32) ^ t
+    value = (t ^ (t >> 14)) / 2**32
+    return int(value * total_birds)
+
+
+def media_ids(bird, media):
+    return [entry.get('id') or media_id(entry) for entry in bird.get(media, [])]
+
+
+def level_questions(birds, level, mode, count, rng):
+    """
+    Generate count questions for one level and mode
+
+    Returns:
+        List of [answer, mediaId, options] with indices into birds
+    """
+    pool = Pool(birds, level)
+    # Pool keeps the birds' order; map pool positions back to the full list
+    positions = {id(bird): i for i, bird in enumerate(birds)}
+    to_species = np.array([positions[id(bird)] for bird in pool.birds])
+
+    media = MODES[mode]
+    candidates = np.array([i for i, bird in enumerate(pool.birds) if bird.get(media)])
+    if len(candidates) == 0:
+        return []
+
+    questions = []
+    for answers, distractors in simulate_rounds(pool, count, rng, candidates):
+        options = np.concatenate([answers[:, None], distractors], axis=1)
+        order = np.argsort(rng.random(options.shape), axis=1)
+        options = to_species[np.take_along_axis(options, order, axis=1)]
+        for answer, row in zip(to_species[answers], options):
+            ids = media_ids(birds[answer], media)
+            questions.append([int(answer), ids[rng.integers(len(ids))], row.tolist()])
+    return questions
+
+
+def daily_questions(birds, start, days, rng):
+    """
+    One fixed question per date: the app's daily bird, a photo and uniform distractors
+
+    Returns:
+        Dict mapping 'YYYY-MM-DD' to [answer, mediaId, options]
+    """
+    daily = {}
+    for offset in range(days):
+        date_string = (start + timedelta(days=offset)).isoformat()
+        answer = daily_bird_index(len(birds), date_string)
+        others = np.delete(np.arange(len(birds)), answer)
+        options = np.append(rng.choice(others, DAILY_OPTION_COUNT - 1, replace=False), answer)
+        rng.shuffle(options)
+        ids = media_ids(birds[answer], 'photos')
+        daily[date_string] = [answer, ids[rng.integers(len(ids))] if ids else None, options.tolist()]
+    return daily
+
+
+def json_bytes(data):
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pregenerate question bank shards for the app')
+    parser.add_argument('bird_data', nargs='?', default='../data/act_birds.json',
+                        help='Bird data JSON file')
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR, help='Directory for index.json')
+    parser.add_argument('--questions', type=int, default=DEFAULT_QUESTIONS,
+                        help='Questions per level and mode')
+    parser.add_argument('--start-date', default=date.today().isoformat(),
+                        help='First date of the daily challenge questions')
+    parser.add_argument('--days', type=int, default=DAILY_DAYS, help='Daily challenge questions to generate')
+    parser.add_argument('--seed', type=int, help='Random seed (default: random)')
+    args = parser.parse_args()
+
+    with open(args.bird_data, 'r', encoding='utf-8') as f:
+        birds = json.load(f)['birds']
+
+    rng = np.random.default_rng(args.seed)
+    os.makedirs(args.output_dir, exist_ok=True)
+    artefacts = ArtefactStore()
+
+    # Shards from a previous build are garbage-collected by artefacts.py --gc
+    artefacts.manifest.pop(ARTEFACT_OWNER, None)
+
+    species = [bird['scientificName'] for bird in birds]
+    index = {
+        'version': hashlib.sha1(json.dumps(species).encode('utf-8')).hexdigest()[:12],
+        'species': species,
+        'questionsPerShard': QUESTIONS_PER_SHARD,
+        'banks': {},
+    }
+
+    for level in DIFFICULTY_LEVELS:
+        for mode in MODES:
+            questions = level_questions(birds, level, mode, args.questions, rng)
+            shards = []
+            for start in range(0, len(questions), QUESTIONS_PER_SHARD):
+                shards.append(artefacts.put(ARTEFACT_OWNER, f"{level}-{mode}-{len(shards):03d}",
+                                            json_bytes({'questions': questions[start:start + QUESTIONS_PER_SHARD]}),
+                                            'json'))
+            index['banks'][f"{level}-{mode}"] = shards
+            print(f"{level} {mode}: {len(questions)} questions in {len(shards)} shards")
+
+    daily = daily_questions(birds, date.fromisoformat(args.start_date), args.days, rng)
+    index['daily'] = artefacts.put(ARTEFACT_OWNER, 'daily', json_bytes(daily), 'json')
+    print(f"Daily challenge: {len(daily)} days from {args.start_date}")
+
+    index_path = os.path.join(args.output_dir, 'index.json')
+    with open(index_path, 'wb') as f:
+        f.write(json_bytes(index))
+    artefacts.save()
+    print(f"\nQuestion bank index written to {index_path}; {artefacts.written} new files in the artefact store")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Species Search Index
+Builds a compact prefix + trigram index over common names, scientific names,
+genera and known taxonomic aliases, for type-to-answer rounds and species
+search boxes, plus the reference query implementation and a benchmark
+
+Every query word must start a word of the name ("sup fai" finds Superb
+Fairywren); a word that starts none is matched to similar words by trigram
+similarity instead ("fairy ren", "kookabura"). Prefixes are found by binary
+search over the sorted vocabulary and typos through vocabulary trigram
+postings, so lookups touch only matching postings and never scan the
+catalogue.
+canberra-bird-app/src/utils/speciesSearch.js implements the same query.
+
+Index (canberra-bird-app/public/search-index.json):
+    species     [[scientificName, commonName], ...]
+    terms       normalised searchable names
+    termSpecies species index of each term
+    termKinds   one character per term: c(ommon) s(cientific) g(enus) a(lias)
+    tokens      sorted unique words of all terms
+    tokenTerms  term indices containing each token (parallel to tokens)
+    trigrams    trigram -> token indices
+
+Usage:
+    python build_search_index.py
+    python build_search_index.py --query "kookabura"
+    python build_search_index.py --benchmark
+"""
+
+import argparse
+import bisect
+import heapq
+import json
+import random
+import re
+import statistics
+import time
+import unicodedata
+from collections import defaultdict
+
+from taxonomy import TAXONOMY_ALIASES
+
+INDEX_VERSION = 1
+
+DEFAULT_OUTPUT = '../canberra-bird-app/public/search-index.json'
+
+# Kinds in ranking order: a common-name match beats a scientific-name match
+KIND_PRIORITY = {'c': 0, 's': 1, 'a': 2, 'g': 3}
+
+# Minimum Dice similarity of trigram sets for a query word to match a misspelt word
+FUZZY_THRESHOLD = 0.45
+
+# Shorter query words only match as prefixes
+MIN_FUZZY_LENGTH = 3
+
+DEFAULT_LIMIT = 8
+
+
+def normalise(text):
+    """Lower-case ASCII words: accents and apostrophes dropped, other punctuation as spaces"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    text = re.sub(r"['’]", '', text)
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', text).split())
+
+
+def trigrams(text):
+    """Character trigrams of a normalised string, padded with a space at each end"""
+    padded = f' {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def species_terms(bird):
+    """(normalised term, kind) pairs for one species"""
+    terms = [(bird['commonName'], 'c'), (bird['scientificName'], 's')]
+    # Hyphenated common names are also typed as one word ("fairywren")
+    if '-' in bird['commonName']:
+        terms.append((bird['commonName'].replace('-', ''), 'c'))
+    terms += [(alias, 'a') for alias in TAXONOMY_ALIASES.get(bird['scientificName'], [])]
+    genus = bird.get('genus') or bird['scientificName'].split()[0]
+    terms.append((genus, 'g'))
+
+    seen = set()
+    result = []
+    for text, kind in terms:
+        term = normalise(text)
+        if term and term not in seen:
+            seen.add(term)
+            result.append((term, kind))
+    return result
+
+
+def build_index(birds):
+    """Build the search index for a list of birds"""
+    species = []
+    terms = []
+    term_species = []
+    kinds = []
+    for i, bird in enumerate(birds):
+        species.append([bird['scientificName'], bird['commonName']])
+        for term, kind in species_terms(bird):
+            terms.append(term)
+            term_species.append(i)
+            kinds.append(kind)
+
+    token_terms = defaultdict(list)
+    for t, term in enumerate(terms):
+        for token in dict.fromkeys(term.split()):
+            token_terms[token].append(t)
+
+    tokens = sorted(token_terms)
+    trigram_tokens = defaultdict(list)
+    for i, token in enumerate(tokens):
+        for gram in sorted(trigrams(token)):
+            trigram_tokens[gram].append(i)
+    return {
+        'version': INDEX_VERSION,
+        'species': species,
+        'terms': terms,
+        'termSpecies': term_species,
+        'termKinds': ''.join(kinds),
+        'tokens': tokens,
+        'tokenTerms': [token_terms[token] for token in tokens],
+        'trigrams': dict(sorted(trigram_tokens.items())),
+    }
+
+
+def prefix_matches(index, token):
+    """Term indices with a word starting with token (binary search over the sorted tokens)"""
+    tokens = index['tokens']
+    lo = bisect.bisect_left(tokens, token)
+    hi = bisect.bisect_left(tokens, token + '\x7f', lo)
+    matched = set()
+    for postings in index['tokenTerms'][lo:hi]:
+        matched.update(postings)
+    return matched
+
+
+def term_ranks(index):
+    """Tie-break rank of every term (kind, then length, then species order), computed once per loaded index"""
+    if '_termRanks' not in index:
+        terms, kinds, term_species = index['terms'], index['termKinds'], index['termSpecies']
+        order = sorted(range(len(terms)), key=lambda t: (KIND_PRIORITY[kinds[t]], len(terms[t]), term_species[t]))
+        ranks = [0] * len(terms)
+        for rank, t in enumerate(order):
+            ranks[t] = rank
+        index['_termRanks'] = ranks
+    return index['_termRanks']
+
+
+def similar_words(index, word):
+    """
+    Term indices containing a word similar to word, with the best similarity
+
+    Similarity is the Dice coefficient of trigram sets, counted through the
+    vocabulary's trigram postings.
+    """
+    # Trigram counts of every token, computed once per loaded index
+    if '_tokenGrams' not in index:
+        index['_tokenGrams'] = [len(trigrams(token)) for token in index['tokens']]
+
+    grams = trigrams(word)
+    shared = defaultdict(int)
+    for gram in grams:
+        for i in index['trigrams'].get(gram, ()):
+            shared[i] += 1
+
+    matched = {}
+    for i, count in shared.items():
+        dice = 2 * count / (len(grams) + index['_tokenGrams'][i])
+        if dice >= FUZZY_THRESHOLD:
+            for t in index['tokenTerms'][i]:
+                matched[t] = max(matched.get(t, 0), dice)
+    return matched
+
+
+def search(index, query, limit=DEFAULT_LIMIT):
+    """
+    Find species matching a query
+
+    Scores: 3 exact name, 2 name starts with the query, 1 every query word
+    starts a word of the name, below 1 the similarity of the worst misspelt word.
+
+    Returns:
+        Up to limit dicts {'scientificName', 'commonName', 'term', 'score'},
+        best first, one per species
+    """
+    q = normalise(query)
+    if not q:
+        return []
+    terms = index['terms']
+
+    # Terms every word starts a word of, and term index -> similarity of the
+    # worst misspelt word for terms matched only through typos
+    matched = None
+    similarity = {}
+    for word in q.split():
+        found = prefix_matches(index, word)
+        if not found and len(word) >= MIN_FUZZY_LENGTH:
+            similar = similar_words(index, word)
+            found = similar.keys()
+            for t, dice in similar.items():
+                similarity[t] = min(similarity.get(t, 1), dice)
+        matched = found if matched is None else matched & found
+        if not matched:
+            return []
+
+    ranks = term_ranks(index)
+    term_species = index['termSpecies']
+    best = {}
+    for t in matched:
+        score = similarity.get(t) or (3 if terms[t] == q else 2 if terms[t].startswith(q) else 1)
+        key = (-score, ranks[t])
+        s = term_species[t]
+        if s not in best or key < best[s][0]:
+            best[s] = (key, t)
+
+    results = []
+    for key, t in heapq.nsmallest(limit, best.values()):
+        scientific_name, common_name = index['species'][term_species[t]]
+        results.append({'scientificName': scientific_name, 'commonName': common_name,
+                        'term': terms[t], 'score': round(-key[0], 3)})
+    return results
+
+
+def naive_search(birds, query, limit=DEFAULT_LIMIT):
+    """Substring scan over every name, for comparison"""
+    q = normalise(query)
+    return [b for b in birds if q in normalise(b['commonName']) or q in normalise(b['scientificName'])][:limit]
+
+
+def benchmark_queries(birds, rng):
+    """Realistic keystroke queries: name prefixes, whole names and one-letter typos"""
+    queries = []
+    for bird in birds:
+        name = normalise(bird['commonName'])
+        queries += [name[:2], name[:4], name[:8], name, normalise(bird['scientificName'])[:6]]
+        if len(name) > 4:
+            i = rng.randrange(1, len(name) - 1)
+            queries.append(name[:i] + name[i + 1:])
+    return queries
+
+
+def time_queries(fn, queries):
+    """Per-query latencies in microseconds"""
+    latencies = []
+    for q in queries:
+        start = time.perf_counter_ns()
+        fn(q)
+        latencies.append((time.perf_counter_ns() - start) / 1000)
+    latencies.sort()
+    return latencies
+
+
+def scaled_catalogue(birds, copies):
+    """The catalogue repeated with distinct suffixes, to measure scaling"""
+    suffixes = ['', ' Australis', ' Borealis', ' Minor', ' Major', ' Occidentalis', ' Orientalis',
+                ' Insularis', ' Montana', ' Maritima']
+    return [{**bird, 'commonName': bird['commonName'] + suffixes[c].lower(),
+             'scientificName': bird['scientificName'] + suffixes[c].lower()}
+            for c in range(copies) for bird in birds]
+
+
+def run_benchmark(birds, rng):
+    print(f"{'Species':>8} {'Queries':>8} {'Index p50':>11} {'p99':>9} {'Scan p50':>10} {'p99':>9}  (µs)")
+    for copies in (1, 3, 10):
+        catalogue = scaled_catalogue(birds, copies)
+        index = build_index(catalogue)
+        queries = benchmark_queries(birds, rng)
+        indexed = time_queries(lambda q: search(index, q), queries)
+        scanned = time_queries(lambda q: naive_search(catalogue, q), queries)
+        print(f"{len(catalogue):>8} {len(queries):>8} "
+              f"{statistics.median(indexed):>11.0f} {indexed[int(len(indexed) * 0.99)]:>9.0f} "
+              f"{statistics.median(scanned):>10.0f} {scanned[int(len(scanned) * 0.99)]:>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the species search index for the app')
+    parser.add_argument('bird_data', nargs='?', default='../data/act_birds.json',
+                        help='Bird data JSON file')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='Index file')
+    parser.add_argument('--query', action='append', help='Run a query against the built index (repeatable)')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Time queries against the index and a substring scan at 1x, 3x and 10x catalogue size')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for benchmark typos')
+    args = parser.parse_args()
+
+    with open(args.bird_data, 'r', encoding='utf-8') as f:
+        birds = json.load(f)['birds']
+
+    index = build_index(birds)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'))
+    print(f"Index for {len(birds)} species ({len(index['terms'])} terms, {len(index['tokens'])} tokens, "
+          f"{len(index['trigrams'])} trigrams) written to {args.output}")
+
+    for query in args.query or []:
+        print(f"\n{query!r}:")
+        for result in search(index, query):
+            print(f"  {result['score']:>5}  {result['commonName']} ({result['scientificName']})"
+                  f"  [{result['term']}]")
+
+    if args.benchmark:
+        print()
+        run_benchmark(birds, random.Random(args.seed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Coverage Report and Re-harvest Planner
+Measures per-species media coverage (photo and audio counts, licence mix,
+photo source diversity, song/call balance, hosted vs remote media) against
+the game's targets, and writes a minimal re-harvest plan listing exactly which
+provider queries to run for which species
+
+Feed the plan to search_photos.py --plan and search_audio.py --plan so a
+refresh only touches the gaps instead of re-crawling every species.
+"""
+
+import argparse
+import json
+from collections import Counter
+from datetime import datetime
+
+from licences import parse_licence
+
+# Per-species targets
+TARGET_PHOTOS = 5
+TARGET_AUDIO = 5
+
+# Distinct photo sources wanted per species; raise with --min-sources to plan
+# queries that diversify single-source species
+TARGET_PHOTO_SOURCES = 1
+
+# Photo providers in order of preference (matches search_photos.PHOTO_PROVIDERS)
+PHOTO_PROVIDERS = ['wikimedia', 'ala_images', 'inaturalist']
+
+# Photo 'source' field -> provider that produces it
+SOURCE_PROVIDERS = {
+    'Wikimedia Commons': 'wikimedia',
+    'Atlas of Living Australia': 'ala_images',
+    'iNaturalist': 'inaturalist',
+}
+
+
+def sound_types(audio):
+    """Set of 'song'/'call' that a Xeno-canto recording's type field covers"""
+    text = (audio.get('type') or '').lower()
+    types = set()
+    if 'song' in text or 'duet' in text:
+        types.add('song')
+    if 'call' in text:
+        types.add('call')
+    return types
+
+
+def add_within_quota(existing, new, limit, group, replace=0):
+    """
+    Add new media to a species' list without going over its quota
+
+    New entries fill free places first. Up to replace more then take the place
+    of the lowest-ranked entry in the largest group (photo source, sound types),
+    but only where that leaves the groups more even than before.
+
+    Args:
+        existing: Current entries, best first
+        new: Candidate entries, best first
+        limit: Per-species quota
+        group: Function giving an entry's group
+        replace: Most entries to replace once the list is full
+
+    Returns:
+        (entries, added): the new list and the new entries that went into it
+    """
+    entries = list(existing)
+    added = []
+    for entry in new:
+        if len(entries) < limit:
+            entries.append(entry)
+            added.append(entry)
+            continue
+        if replace <= 0:
+            break
+        counts = Counter(group(e) for e in entries)
+        largest, count = counts.most_common(1)[0]
+        if counts[group(entry)] + 1 >= count:
+            continue
+        del entries[max(i for i, e in enumerate(entries) if group(e) == largest)]
+        entries.append(entry)
+        added.append(entry)
+        replace -= 1
+    return entries, added
+
+
+def is_hosted(entry):
+    """True for media served from the app itself (relative URL) rather than a remote site"""
+    return not (entry.get('url') or '').startswith(('http://', 'https://'))
+
+
+def licence_label(entry):
+    """Short licence class for the licence mix: 'cc-by', 'cc-by-nc', 'cc0', 'pd' or 'unknown'"""
+    licence = parse_licence(entry.get('licence') or '')
+    if not licence:
+        return 'unknown'
+    return f"{licence.family}-nc" if licence.nc else licence.family
+
+
+def species_coverage(bird, min_sources=TARGET_PHOTO_SOURCES):
+    """
+    Coverage figures and gaps for one species
+
+    Returns:
+        Dict with counts, licence mix, sources, song/call counts, hosted/remote
+        counts and a list of gap descriptions
+    """
+    photos = bird.get('photos', [])
+    audio = bird.get('audio', [])
+    sources = Counter(p.get('source', 'unknown') for p in photos)
+    types = Counter(t for a in audio for t in sound_types(a))
+    media = photos + audio
+
+    coverage = {
+        'scientificName': bird['scientificName'],
+        'commonName': bird['commonName'],
+        'rarity': bird.get('rarity'),
+        'photos': len(photos),
+        'audio': len(audio),
+        'photoSources': dict(sources),
+        'licences': dict(Counter(licence_label(e) for e in media)),
+        'songs': types['song'],
+        'calls': types['call'],
+        'hosted': sum(1 for e in media if is_hosted(e)),
+        'remote': sum(1 for e in media if not is_hosted(e)),
+    }
+
+    gaps = []
+    if len(photos) < TARGET_PHOTOS:
+        gaps.append(f"photos {len(photos)}/{TARGET_PHOTOS}")
+    if len(sources) < min_sources:
+        gaps.append(f"photo sources {len(sources)}/{min_sources}")
+    if len(audio) < TARGET_AUDIO:
+        gaps.append(f"audio {len(audio)}/{TARGET_AUDIO}")
+    for kind in ('song', 'call'):
+        if audio and not types[kind]:
+            gaps.append(f"no {kind}")
+    coverage['gaps'] = gaps
+    return coverage
+
+
+def plan_queries(bird, coverage, min_sources=TARGET_PHOTO_SOURCES):
+    """
+    Provider queries needed to close one species' gaps
+
+    Photo gaps are filled from providers the species has no photos from yet,
+    in preference order; audio gaps become one Xeno-canto query with the sound
+    types still missing. 'want' counts new entries; for a species whose quota
+    is already full they replace existing ones (add_within_quota), so the
+    quota is never exceeded.
+
+    Returns:
+        List of {'scientificName', 'provider', 'want', 'reason', ...} dicts
+    """
+    name = bird['scientificName']
+    queries = []
+
+    photo_gap = TARGET_PHOTOS - coverage['photos']
+    source_gap = min_sources - len(coverage['photoSources'])
+    if photo_gap > 0 or source_gap > 0:
+        used = {SOURCE_PROVIDERS.get(source) for source in coverage['photoSources']}
+        unused = [p for p in PHOTO_PROVIDERS if p not in used]
+        # Enough providers to add the missing sources, or all unused ones for a count gap
+        chosen = unused if photo_gap > 0 else unused[:source_gap]
+        for provider in chosen:
+            queries.append({
+                'scientificName': name,
+                'provider': provider,
+                'want': max(photo_gap, 1),
+                'reason': ', '.join(g for g in coverage['gaps'] if g.startswith('photo')),
+            })
+
+    audio_gap = TARGET_AUDIO - coverage['audio']
+    missing_types = [kind for kind in ('song', 'call') if coverage['audio'] and not coverage[f"{kind}s"]]
+    if audio_gap > 0 or missing_types:
+        queries.append({
+            'scientificName': name,
+            'provider': 'xeno_canto',
+            'want': max(audio_gap, len(missing_types)),
+            'soundTypes': missing_types,
+            'reason': ', '.join(g for g in coverage['gaps'] if not g.startswith('photo')),
+        })
+
+    return queries
+
+
+def analyse(data, min_sources=TARGET_PHOTO_SOURCES):
+    """
+    Coverage for every species and the combined re-harvest plan
+
+    Returns:
+        (coverage list, query list)
+    """
+    coverage = []
+    queries = []
+    for bird in data.get('birds', []):
+        species = species_coverage(bird, min_sources)
+        coverage.append(species)
+        queries.extend(plan_queries(bird, species, min_sources))
+    return coverage, queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report media coverage and plan a targeted re-harvest')
+    parser.add_argument('bird_data', nargs='?', default='../data/act_birds.json',
+                        help='Bird data JSON file')
+    parser.add_argument('--report', default='coverage_report.json',
+                        help='Per-species coverage output file')
+    parser.add_argument('--plan', default='harvest_plan.json',
+                        help='Re-harvest plan output file')
+    parser.add_argument('--min-sources', type=int, default=TARGET_PHOTO_SOURCES,
+                        help='Distinct photo sources wanted per species')
+    args = parser.parse_args()
+
+    print(f"Loading bird data from {args.bird_data}...")
+    with open(args.bird_data, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    coverage, queries = analyse(data, args.min_sources)
+    generated = datetime.now().isoformat()
+
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump({'generated': generated, 'species': coverage}, f, indent=2, ensure_ascii=False)
+
+    with open(args.plan, 'w', encoding='utf-8') as f:
+        json.dump({
+            'generated': generated,
+            'source': args.bird_data,
+            'targets': {'photos': TARGET_PHOTOS, 'audio': TARGET_AUDIO, 'photoSources': args.min_sources},
+            'queries': queries,
+        }, f, indent=2, ensure_ascii=False)
+
+    gap_counts = Counter(gap if gap.startswith('no ') else gap.rsplit(' ', 1)[0]
+                         for species in coverage for gap in species['gaps'])
+    by_provider = Counter(q['provider'] for q in queries)
+    sources = Counter(len(s['photoSources']) for s in coverage)
+    licences = Counter()
+    for species in coverage:
+        licences.update(species['licences'])
+
+    print(f"\n=== Coverage ===")
+    print(f"Species: {len(coverage)}, complete: {sum(1 for s in coverage if not s['gaps'])}")
+    print(f"Species with gaps, by kind:")
+    for gap, count in gap_counts.most_common():
+        print(f"  {gap}: {count}")
+    print(f"Species by photo source count: {', '.join(f'{k}: {v}' for k, v in sorted(sources.items()))}")
+    print(f"Licence mix: {', '.join(f'{k}: {v}' for k, v in licences.most_common())}")
+    print(f"Hosted media: {sum(s['hosted'] for s in coverage)}, remote: {sum(s['remote'] for s in coverage)}")
+
+    print(f"\n=== Re-harvest plan ===")
+    print(f"{len(queries)} provider queries for {len({q['scientificName'] for q in queries})} species")
+    for provider, count in by_provider.most_common():
+        print(f"  {provider}: {count}")
+    print(f"\nReport saved to {args.report}")
+    print(f"Plan saved to {args.plan} (run search_photos.py --plan / search_audio.py --plan)")
+
+
+if __name__ == '__main__':
+    main()
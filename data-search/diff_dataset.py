@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Dataset Diff
+Semantic diff between two versions of the bird data, keyed by scientific
+name for species and media ID for photos and recordings, so a pipeline run
+can be reviewed as "12 photos added, 3 licences changed" instead of a
+pretty-printed JSON diff
+
+Both versions are streamed (json_stream.py) rather than loaded: a first pass
+keeps only a digest of each old species, the new version is compared against
+the digests, and a second pass over the old version fetches just the species
+that changed, so memory follows the size of the change, not of the dataset.
+
+Either version can be a file or a git revision of data/act_birds.json:
+    python diff_dataset.py                           HEAD vs the working copy
+    python diff_dataset.py HEAD~3 HEAD               two commits
+    python diff_dataset.py old.json new.json --changelog CHANGES.md
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+from collections import Counter
+from contextlib import contextmanager
+
+from json_stream import iter_items
+from media_ids import media_id
+
+MEDIA_LISTS = ('photos', 'audio')
+
+# Path of the dataset inside the repository, for git revisions
+DATASET_PATH = 'data/act_birds.json'
+
+# Values longer than this are shortened in the changelog
+MAX_VALUE_LENGTH = 60
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def open_version(spec, path=DATASET_PATH):
+    """
+    A dataset version as a file, or as a git revision when no such file exists
+
+    Returns:
+        (open_stream, label): open_stream() is a context manager yielding the
+        document as a binary stream, and can be entered more than once
+    """
+    if os.path.exists(spec):
+        return lambda: open(spec, 'rb'), spec
+
+    result = subprocess.run(['git', 'cat-file', '-e', f'{spec}:{path}'], cwd=REPO_DIR, capture_output=True)
+    if result.returncode != 0:
+        raise SystemExit(f"Not a file or git revision: {spec} ({result.stderr.decode().strip()})")
+
+    @contextmanager
+    def open_revision():
+        process = subprocess.Popen(['git', 'show', f'{spec}:{path}'], cwd=REPO_DIR,
+                                   stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        try:
+            yield process.stdout
+        finally:
+            process.stdout.close()
+            process.wait()
+
+    return open_revision, f'{spec}:{path}'
+
+
+def iter_birds(open_stream, header=None):
+    """Stream a version's species; header receives its other top-level fields"""
+    with open_stream() as stream:
+        yield from iter_items(stream, 'birds', header)
+
+
+def species_digest(bird):
+    return hashlib.sha1(json.dumps(bird, sort_keys=True, ensure_ascii=False).encode('utf-8')).digest()
+
+
+def field_changes(old, new, skip=()):
+    """
+    Fields whose values differ between two dicts
+
+    Returns:
+        Dict mapping field to (old value, new value); missing fields are None
+    """
+    changes = {}
+    for field in old.keys() | new.keys():
+        if field not in skip and old.get(field) != new.get(field):
+            changes[field] = (old.get(field), new.get(field))
+    return changes
+
+
+def diff_media(old_entries, new_entries):
+    """
+    Compare one species' photos or recordings by media ID
+
+    Returns:
+        Dict with 'added' and 'removed' (entries), 'modified' (media ID ->
+        field changes) and 'reordered' (True if shared entries changed rank)
+    """
+    old_by_id = {e.get('id') or media_id(e): e for e in old_entries}
+    new_by_id = {e.get('id') or media_id(e): e for e in new_entries}
+    shared = [i for i in new_by_id if i in old_by_id]
+
+    modified = {}
+    for i in shared:
+        changes = field_changes(old_by_id[i], new_by_id[i])
+        if changes:
+            modified[i] = changes
+
+    return {
+        'added': [e for i, e in new_by_id.items() if i not in old_by_id],
+        'removed': [e for i, e in old_by_id.items() if i not in new_by_id],
+        'modified': modified,
+        'reordered': [i for i in old_by_id if i in new_by_id] != shared,
+    }
+
+
+def diff_species(old_bird, new_bird):
+    """Field and media changes of one species, or None if nothing semantic changed"""
+    change = {'fields': field_changes(old_bird, new_bird, skip=MEDIA_LISTS)}
+    for media in MEDIA_LISTS:
+        media_diff = diff_media(old_bird.get(media, []), new_bird.get(media, []))
+        if media_diff['added'] or media_diff['removed'] or media_diff['modified'] or media_diff['reordered']:
+            change[media] = media_diff
+    return change if change['fields'] or len(change) > 1 else None
+
+
+def diff_datasets(open_old, open_new):
+    """
+    Compare two versions of the bird data, streaming both (see open_version)
+
+    Returns:
+        Dict with 'metadata' (top-level field changes), 'added' and 'removed'
+        species, and 'modified': scientificName -> {'fields', 'photos', 'audio'}
+    """
+    old_header = {}
+    old_digests = {b['scientificName']: species_digest(b) for b in iter_birds(open_old, old_header)}
+
+    # Only species that are new or differ from their digest are kept
+    new_header = {}
+    order = {}
+    added = []
+    changed = {}
+    for bird in iter_birds(open_new, new_header):
+        name = bird['scientificName']
+        order[name] = len(order)
+        if name not in old_digests:
+            added.append(bird)
+        elif species_digest(bird) != old_digests[name]:
+            changed[name] = bird
+
+    removed = []
+    modified = {}
+    if changed or len(order) - len(added) < len(old_digests):
+        for old_bird in iter_birds(open_old):
+            name = old_bird['scientificName']
+            if name not in order:
+                removed.append(old_bird)
+            elif name in changed:
+                change = diff_species(old_bird, changed.pop(name))
+                if change:
+                    modified[name] = change
+
+    return {
+        'metadata': field_changes(old_header, new_header, skip=('generatedDate',)),
+        'added': added,
+        'removed': removed,
+        'modified': dict(sorted(modified.items(), key=lambda item: order[item[0]])),
+    }
+
+
+def summarise(diff):
+    """Counts of species and media changes, and how often each media field changed"""
+    counts = Counter(species_added=len(diff['added']), species_removed=len(diff['removed']),
+                     species_modified=len(diff['modified']))
+    field_counts = {media: Counter() for media in MEDIA_LISTS}
+    for bird in diff['added']:
+        for media in MEDIA_LISTS:
+            counts[f'{media}_added'] += len(bird.get(media, []))
+    for bird in diff['removed']:
+        for media in MEDIA_LISTS:
+            counts[f'{media}_removed'] += len(bird.get(media, []))
+    for change in diff['modified'].values():
+        for media in MEDIA_LISTS:
+            if media in change:
+                counts[f'{media}_added'] += len(change[media]['added'])
+                counts[f'{media}_removed'] += len(change[media]['removed'])
+                counts[f'{media}_modified'] += len(change[media]['modified'])
+                for fields in change[media]['modified'].values():
+                    field_counts[media].update(fields.keys())
+    return counts, field_counts
+
+
+def show(value):
+    text = json.dumps(value, ensure_ascii=False) if not isinstance(value, str) else value
+    return text if len(text) <= MAX_VALUE_LENGTH else text[:MAX_VALUE_LENGTH - 3] + '...'
+
+
+def describe_change(field, old, new):
+    if old is None:
+        return f"{field} set to {show(new)}"
+    if new is None:
+        return f"{field} removed (was {show(old)})"
+    return f"{field} {show(old)} → {show(new)}"
+
+
+def changelog(diff, old_label, new_label, verbose=False):
+    """
+    Compact Markdown changelog
+
+    Args:
+        verbose: List every changed media field rather than per-species counts
+    """
+    counts, field_counts = summarise(diff)
+    lines = [f"# Dataset changes: {old_label} → {new_label}", ""]
+    lines.append(f"- Species: +{counts['species_added']} −{counts['species_removed']} "
+                 f"~{counts['species_modified']}")
+    for media in MEDIA_LISTS:
+        fields = ', '.join(f"{field} {n}" for field, n in field_counts[media].most_common())
+        lines.append(f"- {media.capitalize()}: +{counts[f'{media}_added']} −{counts[f'{media}_removed']} "
+                     f"~{counts[f'{media}_modified']}" + (f" ({fields})" if fields else ""))
+    for field, (old, new) in sorted(diff['metadata'].items()):
+        lines.append(f"- {describe_change(field, old, new)}")
+
+    def species_label(bird):
+        return f"{bird.get('commonName')} (*{bird['scientificName']}*)"
+
+    if diff['added']:
+        lines += ["", "## Added species", ""]
+        lines += [f"- {species_label(b)}: {len(b.get('photos', []))} photos, {len(b.get('audio', []))} recordings"
+                  for b in diff['added']]
+    if diff['removed']:
+        lines += ["", "## Removed species", ""]
+        lines += [f"- {species_label(b)}" for b in diff['removed']]
+
+    if diff['modified']:
+        lines += ["", "## Modified species", ""]
+        for name, change in diff['modified'].items():
+            parts = [describe_change(field, old, new) for field, (old, new) in sorted(change['fields'].items())]
+            details = []
+            for media in MEDIA_LISTS:
+                if media not in change:
+                    continue
+                m = change[media]
+                summary = []
+                if m['added']:
+                    summary.append(f"+{len(m['added'])}")
+                if m['removed']:
+                    summary.append(f"−{len(m['removed'])}")
+                if m['modified']:
+                    fields = Counter(f for changes in m['modified'].values() for f in changes)
+                    summary.append(f"~{len(m['modified'])} ({', '.join(sorted(fields))})")
+                if m['reordered']:
+                    summary.append("reordered")
+                parts.append(f"{media} {' '.join(summary)}")
+                if verbose:
+                    for i, changes in m['modified'].items():
+                        details += [f"  - {media} `{i}`: {describe_change(f, o, n)}"
+                                    for f, (o, n) in sorted(changes.items())]
+            lines.append(f"- {name}: {'; '.join(parts)}")
+            lines += details
+    return '\n'.join(lines) + '\n'
+
+
+def to_json(diff):
+    """Diff as JSON-serialisable data, with media referenced by ID"""
+    def media_json(m):
+        return {
+            'added': [e.get('id') or media_id(e) for e in m['added']],
+            'removed': [e.get('id') or media_id(e) for e in m['removed']],
+            'modified': {i: {f: list(v) for f, v in changes.items()} for i, changes in m['modified'].items()},
+            'reordered': m['reordered'],
+        }
+
+    return {
+        'metadata': {f: list(v) for f, v in diff['metadata'].items()},
+        'added': [b['scientificName'] for b in diff['added']],
+        'removed': [b['scientificName'] for b in diff['removed']],
+        'modified': {
+            name: {'fields': {f: list(v) for f, v in change['fields'].items()},
+                   **{media: media_json(change[media]) for media in MEDIA_LISTS if media in change}}
+            for name, change in diff['modified'].items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Semantic diff between two versions of the bird data')
+    parser.add_argument('old', nargs='?', default='HEAD', help='Old version: file or git revision')
+    parser.add_argument('new', nargs='?', default='../data/act_birds.json', help='New version: file or git revision')
+    parser.add_argument('--path', default=DATASET_PATH, help='Dataset path inside the repository for revisions')
+    parser.add_argument('--changelog', metavar='FILE', help='Write the Markdown changelog to FILE')
+    parser.add_argument('--json', metavar='FILE', help='Write the full diff as JSON to FILE')
+    parser.add_argument('--verbose', action='store_true', help='List every changed media field')
+    args = parser.parse_args()
+
+    open_old, old_label = open_version(args.old, args.path)
+    open_new, new_label = open_version(args.new, args.path)
+    diff = diff_datasets(open_old, open_new)
+    text = changelog(diff, old_label, new_label, args.verbose)
+
+    if args.changelog:
+        with open(args.changelog, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"Changelog written to {args.changelog}")
+    else:
+        print(text, end='')
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(to_json(diff), f, indent=2, ensure_ascii=False)
+        print(f"Diff written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Harvest Executor
+Runs one job per species on a pool of workers, for the photo, audio and ALA
+harvest scripts
+
+- Jobs are fed through a bounded queue (queue_size, default twice the
+  worker count), so only a few species are ever waiting for a worker
+- backend 'asyncio' runs coroutine jobs (provider searches) as tasks on one
+  event loop, so every worker shares the providers' rate limits; 'thread'
+  runs blocking jobs on worker threads
+- Results are reported and returned in input order whatever order jobs
+  finish in, so output files and logs are the same for any worker count
+- The first Ctrl-C stops handing out species, lets the jobs in flight finish
+  and returns what completed so the script can save it; a second Ctrl-C aborts
+
+Usage from a script:
+    results, interrupted = run_harvest(birds, find_audio, workers=args.workers,
+                                       backend='asyncio', describe=species_label,
+                                       on_result=report)
+"""
+
+import asyncio
+import queue
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+from pipeline_log import log_event
+
+BACKENDS = ('thread', 'asyncio')
+
+DEFAULT_WORKERS = 1
+
+# Seconds between checks for finished jobs and Ctrl-C on the thread backend
+POLL_INTERVAL = 0.2
+
+_STOP = object()
+
+
+def species_label(bird):
+    """'Common Name (Scientific name)' for progress lines"""
+    return f"{bird['commonName']} ({bird['scientificName']})"
+
+
+def _format_duration(seconds):
+    minutes, seconds = divmod(round(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{seconds:02d}s" if minutes else f"{seconds}s"
+
+
+class _Progress:
+    """Collects finished jobs and reports them in input order"""
+
+    def __init__(self, items, describe, on_result):
+        self.items = items
+        self.describe = describe
+        self.on_result = on_result
+        self.results = [None] * len(items)
+        self.finished = {}
+        self.next_index = 0
+        self.done = 0
+        self.failed = 0
+        self.start = time.monotonic()
+
+    def finish(self, index, result, error):
+        self.done += 1
+        if error is None:
+            self.results[index] = result
+        else:
+            self.failed += 1
+        self.finished[index] = error
+        while self.next_index in self.finished:
+            self.report(self.next_index)
+            self.next_index += 1
+
+    def report(self, index):
+        error = self.finished.pop(index)
+        total = len(self.items)
+        elapsed = time.monotonic() - self.start
+        eta = ''
+        if self.done < total and elapsed > 0:
+            eta = f"  (~{_format_duration((total - self.done) * elapsed / self.done)} left)"
+        print(f"[{index + 1}/{total}] {self.describe(self.items[index])}{eta}")
+        if error is not None:
+            print(f"  Failed: {error}")
+        elif self.on_result:
+            self.on_result(index, self.items[index], self.results[index])
+
+    def flush(self):
+        """Report jobs that finished after an unfinished one (after an interrupt)"""
+        for index in sorted(self.finished):
+            self.report(index)
+
+
+@contextmanager
+def _graceful_interrupt(stop):
+    """First Ctrl-C sets stop, a second raises KeyboardInterrupt (main thread only)"""
+    if threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def handler(signum, frame):
+        if stop.is_set():
+            raise KeyboardInterrupt
+        stop.set()
+        print("\nInterrupted: finishing the species in progress, then saving (Ctrl-C again to abort)")
+
+    previous = signal.signal(signal.SIGINT, handler)
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGINT, previous)
+
+
+def _run_threads(items, job, workers, queue_size, progress, stop):
+    jobs = queue.Queue(maxsize=queue_size)
+    finished = queue.Queue()
+
+    def worker():
+        while True:
+            entry = jobs.get()
+            if entry is _STOP:
+                return
+            index, item = entry
+            if stop.is_set():
+                continue
+            try:
+                finished.put((index, job(item), None))
+            except Exception as e:
+                finished.put((index, None, e))
+
+    def feed():
+        for entry in enumerate(items):
+            while not stop.is_set():
+                try:
+                    jobs.put(entry, timeout=POLL_INTERVAL)
+                    break
+                except queue.Full:
+                    pass
+            if stop.is_set():
+                break
+        for _ in threads:
+            jobs.put(_STOP)
+
+    # Daemon threads, so a second Ctrl-C does not wait for slow requests
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+
+    while True:
+        try:
+            progress.finish(*finished.get(timeout=POLL_INTERVAL))
+        except queue.Empty:
+            if not any(thread.is_alive() for thread in threads) and finished.empty():
+                break
+
+
+async def _run_tasks(items, job, workers, queue_size, progress, stop):
+    jobs = asyncio.Queue(maxsize=queue_size)
+
+    async def worker():
+        while True:
+            entry = await jobs.get()
+            if entry is _STOP:
+                return
+            index, item = entry
+            if stop.is_set():
+                continue
+            try:
+                result = await job(item)
+            except Exception as e:
+                progress.finish(index, None, e)
+            else:
+                progress.finish(index, result, None)
+
+    tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+    try:
+        for entry in enumerate(items):
+            if stop.is_set():
+                break
+            await jobs.put(entry)
+        for _ in tasks:
+            await jobs.put(_STOP)
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _summarise(progress, backend, workers, stop):
+    progress.flush()
+    completed = progress.done - progress.failed
+    log_event('harvest', backend=backend, workers=workers, items=len(progress.items), completed=completed,
+              failed=progress.failed, interrupted=stop.is_set(),
+              durationMs=round((time.monotonic() - progress.start) * 1000, 1))
+    if stop.is_set():
+        print(f"\nStopped early: {completed} of {len(progress.items)} species harvested")
+    return progress.results, stop.is_set()
+
+
+async def harvest_async(items, job, workers=DEFAULT_WORKERS, queue_size=None, describe=str, on_result=None):
+    """
+    run_harvest() with the asyncio backend, for callers already inside an event loop
+    """
+    progress = _Progress(items, describe, on_result)
+    stop = threading.Event()
+    with _graceful_interrupt(stop):
+        await _run_tasks(items, job, max(1, workers), queue_size or 2 * max(1, workers), progress, stop)
+    return _summarise(progress, 'asyncio', workers, stop)
+
+
+def run_harvest(items, job, workers=DEFAULT_WORKERS, backend='thread', queue_size=None, describe=str,
+                on_result=None):
+    """
+    Run job(item) for every item on a pool of workers
+
+    A job that raises is reported as failed and the harvest carries on.
+
+    Args:
+        items: Species (or other work) in output order
+        job: Function of one item; a coroutine function for the asyncio backend
+        workers: Jobs run at once
+        backend: 'thread' or 'asyncio' (see BACKENDS)
+        queue_size: Items waiting for a worker at most (default 2 x workers)
+        describe: Progress label for an item
+        on_result: Optional callback(index, item, result), called in input
+            order as results become available; not called for failed jobs
+
+    Returns:
+        (results, interrupted): results in input order, None for items that
+        failed or were never started; interrupted is True after a Ctrl-C
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}' (expected one of {', '.join(BACKENDS)})")
+    if backend == 'asyncio':
+        return asyncio.run(harvest_async(items, job, workers, queue_size, describe, on_result))
+
+    progress = _Progress(items, describe, on_result)
+    stop = threading.Event()
+    with _graceful_interrupt(stop):
+        _run_threads(items, job, max(1, workers), queue_size or 2 * max(1, workers), progress, stop)
+    return _summarise(progress, 'thread', workers, stop)
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Media Metadata Harvest Script
+Collects width, height, byte size and MIME type for every photo, and byte size
+and duration for every audio recording, so later stages and the app can pick
+the cheapest adequate asset
+"""
+
+import argparse
+import json
+import mimetypes
+import os
+import re
+import struct
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from media_ids import media_id
+from pipeline_log import start_run
+from providers import fetch_json
+
+COMMONS_API_URL = 'https://commons.wikimedia.org/w/api.php'
+
+# Commons accepts up to 50 titles per imageinfo query
+COMMONS_BATCH_SIZE = 50
+
+# Enough of the file to find the dimensions in any JPEG/PNG/GIF/WebP header
+HEADER_BYTES = 65536
+
+DEFAULT_WORKERS = 8
+
+# Harvested metadata keyed by media ID, reused across runs while the URL is unchanged
+METADATA_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'media_metadata.json')
+
+HEADERS = {
+    'User-Agent': 'Canberra Bird Game Metadata Harvest/1.0 (educational project)',
+}
+
+
+def probe_url(url, header_bytes=0, timeout=30):
+    """
+    Ranged GET of the start of a file
+
+    Args:
+        url: Media URL
+        header_bytes: Number of leading bytes to fetch (0 fetches a single byte,
+            which is enough to learn the total size from Content-Range)
+
+    Returns:
+        (total_bytes, mime, head) tuple, or None on failure
+    """
+    last_byte = max(header_bytes, 1) - 1
+    headers = dict(HEADERS, Range=f'bytes=0-{last_byte}')
+    req = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            head = response.read(max(header_bytes, 1))
+            mime = response.headers.get_content_type()
+            content_range = response.headers.get('Content-Range', '')
+            match = re.search(r'/(\d+)$', content_range)
+            if match:
+                total = int(match.group(1))
+            else:
+                # Server ignored the Range header and is sending the whole file
+                length = response.headers.get('Content-Length')
+                total = int(length) if length else None
+            return total, mime, head
+    except Exception as e:
+        print(f"Error probing {url}: {e}")
+        return None
+
+
+def image_dimensions(head):
+    """
+    Read (width, height) from the leading bytes of a JPEG, PNG, GIF or WebP file
+
+    Returns:
+        (width, height) tuple, or None if the header is not recognised
+    """
+    if head.startswith(b'\x89PNG\r\n\x1a\n') and len(head) >= 24:
+        return struct.unpack('>II', head[16:24])
+
+    if head[:6] in (b'GIF87a', b'GIF89a') and len(head) >= 10:
+        return struct.unpack('<HH', head[6:10])
+
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP' and len(head) >= 30:
+        chunk = head[12:16]
+        if chunk == b'VP8 ':
+            width, height = struct.unpack('<HH', head[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+        if chunk == b'VP8L':
+            bits = int.from_bytes(head[21:25], 'little')
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b'VP8X':
+            width = int.from_bytes(head[24:27], 'little') + 1
+            height = int.from_bytes(head[27:30], 'little') + 1
+            return width, height
+
+    if head[:2] == b'\xff\xd8':
+        # Walk the JPEG segments until a start-of-frame marker
+        pos = 2
+        while pos + 9 < len(head):
+            if head[pos] != 0xFF:
+                pos += 1
+                continue
+            marker = head[pos + 1]
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+                pos += 2
+                continue
+            segment_length = struct.unpack('>H', head[pos + 2:pos + 4])[0]
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack('>HH', head[pos + 5:pos + 9])
+                return width, height
+            pos += 2 + segment_length
+
+    return None
+
+
+def parse_length(length):
+    """Convert a Xeno-canto length string ("0:13", "1:02:03") to seconds"""
+    if not length or ':' not in str(length):
+        return None
+    try:
+        seconds = 0
+        for part in str(length).split(':'):
+            seconds = seconds * 60 + int(part)
+        return seconds
+    except ValueError:
+        return None
+
+
+def commons_title(page_url):
+    """Extract the "File:..." title from a Commons description page URL"""
+    if '/wiki/' not in page_url:
+        return None
+    return urllib.parse.unquote(page_url.split('/wiki/', 1)[1]).replace('_', ' ')
+
+
+def thumbnail_width(url):
+    """Return the requested width of a Commons thumbnail URL, or None for originals"""
+    match = re.search(r'/thumb/.*/(\d+)px-[^/]+$', url)
+    return int(match.group(1)) if match else None
+
+
+def fetch_commons_imageinfo(titles):
+    """
+    Look up original width, height, size and MIME type for Commons files
+
+    Args:
+        titles: List of "File:..." titles
+
+    Returns:
+        Dict mapping title to {'width', 'height', 'bytes', 'mime'}
+    """
+    info = {}
+    for start in range(0, len(titles), COMMONS_BATCH_SIZE):
+        batch = titles[start:start + COMMONS_BATCH_SIZE]
+        result = fetch_json(COMMONS_API_URL, {
+            'action': 'query',
+            'titles': '|'.join(batch),
+            'prop': 'imageinfo',
+            'iiprop': 'size|mime',
+            'format': 'json',
+        }, user_agent=HEADERS['User-Agent'])
+        if not result:
+            continue
+
+        query = result.get('query', {})
+        # Commons normalises titles (e.g. underscores); map back to what we asked for
+        aliases = {n['to']: n['from'] for n in query.get('normalized', [])}
+        for page in query.get('pages', {}).values():
+            imageinfo = page.get('imageinfo')
+            if not imageinfo:
+                continue
+            title = aliases.get(page.get('title'), page.get('title'))
+            info[title] = {
+                'width': imageinfo[0].get('width'),
+                'height': imageinfo[0].get('height'),
+                'bytes': imageinfo[0].get('size'),
+                'mime': imageinfo[0].get('mime'),
+            }
+    return info
+
+
+def photo_metadata(photo, commons_info):
+    """
+    Collect metadata for one photo
+
+    Commons imageinfo supplies the original dimensions and MIME type. For
+    thumbnail URLs the dimensions are scaled, and the served byte size and MIME
+    type are taken from a one-byte ranged GET: SVG and TIFF originals are served
+    as PNG or JPEG thumbnails, so the original's type is kept as originalMime.
+    Other sources are probed directly.
+    """
+    url = photo.get('url', '')
+    title = commons_title(photo.get('pageUrl', ''))
+    original = commons_info.get(title) if title else None
+
+    if original and original.get('width'):
+        meta = dict(original)
+        width = thumbnail_width(url)
+        if width:
+            probe = probe_url(url)
+            meta['originalMime'] = original.get('mime')
+            meta['mime'] = probe[1] if probe else mimetypes.guess_type(url)[0]
+            if probe:
+                meta['bytes'] = probe[0]
+            if width < original['width']:
+                meta['width'] = width
+                meta['height'] = round(original['height'] * width / original['width'])
+                if not probe:
+                    meta['bytes'] = None
+        return meta
+
+    probe = probe_url(url, HEADER_BYTES)
+    if not probe:
+        return None
+    total, mime, head = probe
+    dimensions = image_dimensions(head)
+    return {
+        'width': dimensions[0] if dimensions else None,
+        'height': dimensions[1] if dimensions else None,
+        'bytes': total,
+        'mime': mime,
+    }
+
+
+def audio_metadata(audio):
+    """Collect byte size (ranged GET) and duration (reported length) for one recording"""
+    probe = probe_url(audio.get('url', ''))
+    return {
+        'bytes': probe[0] if probe else None,
+        'durationSec': parse_length(audio.get('length')),
+    }
+
+
+def load_metadata_cache(path=METADATA_CACHE_FILE):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_metadata_cache(cache, path=METADATA_CACHE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+
+
+def harvest_metadata(data, workers=DEFAULT_WORKERS, refresh=False):
+    """
+    Add size/dimension metadata to every photo and audio entry in place
+
+    Args:
+        data: Loaded bird data
+        workers: Number of concurrent requests
+        refresh: Re-harvest entries that already have metadata
+
+    Returns:
+        (photos_updated, audio_updated) counts
+    """
+    photos = [p for b in data.get('birds', []) for p in b.get('photos', [])]
+    audio = [a for b in data.get('birds', []) for a in b.get('audio', [])]
+
+    cache = load_metadata_cache()
+
+    def cached(entry):
+        hit = cache.get(entry.get('id') or media_id(entry))
+        if not hit or hit.get('url') != entry.get('url'):
+            return None
+        # Thumbnails harvested before they got their own MIME type carry the original's
+        if thumbnail_width(entry.get('url', '')) and 'mime' in hit['meta'] and 'originalMime' not in hit['meta']:
+            return None
+        return hit['meta']
+
+    cached_updates = 0
+    if not refresh:
+        photos = [p for p in photos if p.get('bytes') is None]
+        audio = [a for a in audio if a.get('bytes') is None]
+
+        # Entries whose media was harvested before (e.g. before a re-rank) need no requests
+        for entry in photos + audio:
+            meta = cached(entry)
+            if meta:
+                entry.update(meta)
+                cached_updates += 1
+        photos = [p for p in photos if p.get('bytes') is None]
+        audio = [a for a in audio if a.get('bytes') is None]
+        print(f"Reused cached metadata for {cached_updates} entries")
+
+    print(f"Harvesting metadata for {len(photos)} photos and {len(audio)} recordings "
+          f"with {workers} workers...")
+
+    titles = sorted({t for t in (commons_title(p.get('pageUrl', '')) for p in photos) if t})
+    print(f"  Querying Commons imageinfo for {len(titles)} files...")
+    commons_info = fetch_commons_imageinfo(titles)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        photo_results = list(executor.map(lambda p: photo_metadata(p, commons_info), photos))
+        audio_results = list(executor.map(audio_metadata, audio))
+
+    photos_updated = audio_updated = 0
+    for entries, results, media in ((photos, photo_results, 'photos'), (audio, audio_results, 'audio')):
+        for entry, meta in zip(entries, results):
+            if not meta:
+                continue
+            meta = {k: v for k, v in meta.items() if v is not None}
+            entry.update(meta)
+            cache[entry.get('id') or media_id(entry)] = {'url': entry.get('url'), 'meta': meta}
+            if media == 'photos':
+                photos_updated += 1
+            else:
+                audio_updated += 1
+
+    save_metadata_cache(cache)
+    return photos_updated, audio_updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Harvest media size and dimension metadata')
+    parser.add_argument('bird_data', nargs='?', default='../data/act_birds.json',
+                        help='Bird data JSON file to update in place')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Number of concurrent requests')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Re-harvest entries that already have metadata')
+    args = parser.parse_args()
+
+    print(f"Event log: {start_run('harvest_media_metadata')} (summarise with pipeline_log.py)")
+
+    print(f"Loading bird data from {args.bird_data}...")
+    with open(args.bird_data, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    photos_updated, audio_updated = harvest_metadata(data, args.workers, args.refresh)
+
+    print(f"Updated {photos_updated} photos and {audio_updated} audio recordings")
+
+    print(f"Writing updated data to {args.bird_data}...")
+    with open(args.bird_data, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+    print("Done!")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Streaming JSON reader
+Yields the elements of one array inside a JSON document (the 'recordings' of
+a Xeno-canto page, the 'results' of an iNaturalist page, the 'occurrences' of
+an ALA search) as they are read, so a dump of any size is parsed in constant
+memory: only the current element and one read buffer are held at a time
+
+Each element is decoded with the standard library decoder; only the objects
+on the way to the array are walked by hand. Other values met on the way
+(numPages, totalRecords...) can be collected into a header dict.
+
+Run as a script to count the elements of a file:
+    python json_stream.py dump.json recordings
+"""
+
+import argparse
+import codecs
+import json
+import re
+import time
+
+# Bytes read from the stream at a time
+CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+
+_WHITESPACE = ' \t\n\r'
+
+# Characters that could still continue a number at the end of the buffer
+_NUMBER_TAIL = re.compile(r'[0-9eE.+-]*')
+
+
+class _Reader:
+    """Read buffer over a binary or text stream, holding at most one value plus one chunk"""
+
+    def __init__(self, stream, chunk_size):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size=0):
+        """Drop the consumed part of the buffer and read at least size more bytes"""
+        chunk = self.stream.read(max(size, self.chunk_size))
+        if isinstance(chunk, bytes):
+            text = self.text_decoder.decode(chunk, final=not chunk)
+        else:
+            text = chunk
+        self.eof = not chunk
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+
+    def peek(self):
+        """Next non-whitespace character without consuming it ('' at the end of the document)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self.fill()
+
+    def expect(self, allowed):
+        """Consume the next character, which must be one of allowed"""
+        char = self.peek()
+        if not char or char not in allowed:
+            found = repr(char) if char else 'end of document'
+            raise json.JSONDecodeError(f"Expected one of {allowed!r}, found {found}", self.buffer, self.pos)
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the complete value starting at the next character"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                # Value continues past the buffer: read as much again, so a
+                # large value is re-decoded a logarithmic number of times
+                self.fill(len(self.buffer) - self.pos)
+                continue
+            # A number at the very end of the buffer ("1", "1e") may continue in the next chunk
+            if not self.eof and _NUMBER_TAIL.fullmatch(self.buffer, end):
+                self.fill(len(self.buffer) - self.pos)
+                continue
+            self.pos = end
+            return value
+
+
+def _walk(reader, keys, prefix, header):
+    if not keys:
+        if reader.peek() != '[':
+            # Not an array (e.g. null when a source has no results)
+            value = reader.value()
+            if header is not None:
+                header[prefix] = value
+            return
+        reader.expect('[')
+        if reader.peek() == ']':
+            reader.pos += 1
+            return
+        while True:
+            yield reader.value()
+            if reader.expect(',]') == ']':
+                return
+
+    if reader.peek() != '{':
+        value = reader.value()
+        if header is not None:
+            header[prefix] = value
+        return
+    reader.expect('{')
+    if reader.peek() == '}':
+        reader.pos += 1
+        return
+    while True:
+        if reader.peek() != '"':
+            reader.expect('"')
+        key = reader.value()
+        reader.expect(':')
+        path = f'{prefix}.{key}' if prefix else key
+        if key == keys[0]:
+            yield from _walk(reader, keys[1:], path, header)
+        else:
+            value = reader.value()
+            if header is not None:
+                header[path] = value
+        if reader.expect(',}') == '}':
+            return
+
+
+def iter_items(stream, path, header=None, chunk_size=CHUNK_SIZE):
+    """
+    Yield the elements of the array at path, one at a time
+
+    Args:
+        stream: File-like object whose read(size) returns bytes (UTF-8) or str,
+            such as an open file or an HTTP response
+        path: Dotted object keys leading to the array ('recordings',
+            'data.results'); '' for a document that is itself an array
+        header: Optional dict that receives every other value met on the way,
+            keyed by dotted path ('numPages'); complete once iteration ends
+        chunk_size: Bytes read at a time
+
+    Raises:
+        json.JSONDecodeError: The document is malformed or truncated
+    """
+    reader = _Reader(stream, chunk_size)
+    yield from _walk(reader, path.split('.') if path else [], '', header)
+    if reader.peek():
+        raise json.JSONDecodeError("Extra data after the document", reader.buffer, reader.pos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Count the elements of an array in a JSON file, streaming')
+    parser.add_argument('file', help='JSON file')
+    parser.add_argument('path', nargs='?', default='', help="Dotted path of the array ('' for a top-level array)")
+    args = parser.parse_args()
+
+    start = time.monotonic()
+    header = {}
+    with open(args.file, 'rb') as f:
+        count = sum(1 for _ in iter_items(f, args.path, header))
+    print(f"{count} elements at '{args.path}' in {time.monotonic() - start:.1f}s")
+    for key, value in header.items():
+        if not isinstance(value, (dict, list)):
+            print(f"  {key}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Licence normalisation engine
+
+Parses every licence spelling our providers return (Commons short names,
+Creative Commons URLs, iNaturalist codes, ALA free text) into one canonical
+Licence tuple, so filtering and display never depend on substring checks.
+
+    >>> parse_licence('//creativecommons.org/licenses/by-nc-sa/3.0/')
+    Licence(family='cc-by', version='3.0', nd=False, nc=True, sa=True, port=None)
+    >>> format_licence(parse_licence('cc-by-nc', default_version='4.0'))
+    'CC BY-NC 4.0'
+"""
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# family is 'cc-by', 'cc0' or 'pd'; port is a jurisdiction code such as 'au'
+Licence = namedtuple('Licence', ['family', 'version', 'nd', 'nc', 'sa', 'port'])
+
+_VERSION = r'(?P<version>\d\.\d)'
+_PORT = r'(?P<port>[a-z]{2})'
+
+# Words that carry no licence information ("CC-BY 4.0 (Int)", "... International")
+_NOISE = re.compile(r'\b(international|int|generic|unported|licen[cs]e)\b|[()]')
+
+# Precompiled (pattern, family) table, tried in order against the cleaned string
+_PATTERNS = [
+    (re.compile(rf'creativecommons\.org/publicdomain/zero/{_VERSION}'), 'cc0'),
+    (re.compile(r'creativecommons\.org/publicdomain/mark'), 'pd'),
+    (re.compile(rf'creativecommons\.org/licenses/(?P<code>by(?:-(?:nc|sa|nd))*)/{_VERSION}(?:/{_PORT})?'), 'cc-by'),
+    (re.compile(rf'^cc[ -]?(?:0|zero)(?: {_VERSION})?$'), 'cc0'),
+    (re.compile(rf'^cc[ -](?P<code>by(?:[ -](?:nc|sa|nd))*)(?: {_VERSION})?(?: {_PORT})?$'), 'cc-by'),
+    (re.compile(rf'^creative commons (?P<code>attribution(?:[ -](?:non-?commercial|share-?alike|no-?derivatives|no derivatives|no derivs))*)(?: {_VERSION})?(?: {_PORT})?$'), 'cc-by'),
+    (re.compile(r'^(?:public domain|pd|no known copyright restrictions)(?: mark)?(?: \d\.\d)?$'), 'pd'),
+]
+
+
+def _clean(text):
+    """Lower-case, drop noise words and collapse whitespace"""
+    text = _NOISE.sub(' ', text.lower().replace('_', ' '))
+    return ' '.join(text.split())
+
+
+@lru_cache(maxsize=1024)
+def parse_licence(text, default_version=None):
+    """
+    Parse a licence string into a canonical Licence tuple
+
+    Args:
+        text: Licence URL, short name, provider code or long name
+        default_version: Version to assume when the string has none (e.g. '4.0'
+            for iNaturalist codes, which always refer to the current licences)
+
+    Returns:
+        Licence tuple, or None if the string is not a recognised licence
+    """
+    if not text:
+        return None
+
+    cleaned = _clean(text)
+    for pattern, family in _PATTERNS:
+        match = pattern.search(cleaned)
+        if not match:
+            continue
+
+        groups = match.groupdict()
+        code = groups.get('code') or ''
+        version = groups.get('version')
+        if not version and default_version:
+            # CC0 only ever had a 1.0
+            version = '1.0' if family == 'cc0' else default_version
+        if family == 'pd':
+            version = None
+        return Licence(
+            family=family,
+            version=version,
+            nd=bool(re.search(r'\bnd\b|no-?\s?deriv', code)),
+            nc=bool(re.search(r'\bnc\b|non-?commercial', code)),
+            sa=bool(re.search(r'\bsa\b|share-?alike', code)),
+            port=groups.get('port'),
+        )
+
+    return None
+
+
+def format_licence(licence):
+    """
+    Render a Licence as the short name used in our data
+
+    ('cc-by', '4.0', nc, sa) -> 'CC BY-NC-SA 4.0'; CC0 -> 'CC0' or 'CC0 1.0';
+    public domain -> 'Public domain'
+    """
+    if licence.family == 'pd':
+        return 'Public domain'
+
+    if licence.family == 'cc0':
+        name = 'CC0'
+    else:
+        name = 'CC BY' + ''.join(f'-{flag}' for flag, on in
+                                 (('NC', licence.nc), ('SA', licence.sa), ('ND', licence.nd)) if on)
+
+    parts = [name]
+    if licence.version:
+        parts.append(licence.version)
+    if licence.port:
+        parts.append(licence.port)
+    return ' '.join(parts)
+
+
+def normalize_licence(text, default_version=None):
+    """Canonical short name for a licence string, or None if unrecognised"""
+    licence = parse_licence(text, default_version)
+    return format_licence(licence) if licence else None
+
+
+def is_acceptable_licence(text):
+    """Check if a licence allows use in the game (recognised, no ND - No Derivatives)"""
+    licence = parse_licence(text)
+    return licence is not None and not licence.nd
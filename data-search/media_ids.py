@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Stable media IDs
+Derives a short, stable ID for every photo and audio entry from its provider
+and the provider's own identifier (Commons file title, ALA image ID or record
+UUID, iNaturalist photo ID, Xeno-canto recording ID), so caches, review
+selections and client-side stats survive URL rewrites and list reordering
+
+Run as a script to add an "id" to every entry in the bird data.
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import urllib.parse
+
+# Hex digits kept from the SHA-1; 12 gives ~1e-7 collision odds at 10k items
+ID_LENGTH = 12
+
+
+def provider_identity(entry):
+    """
+    Work out (provider, provider_id) for a photo or audio entry
+
+    Falls back to ('url', url) for sources we cannot identify.
+    """
+    url = entry.get('url', '') or ''
+    page_url = entry.get('pageUrl', '') or ''
+
+    if entry.get('recordingId') or 'xeno-canto.org' in page_url:
+        recording_id = entry.get('recordingId') or page_url.rstrip('/').rsplit('/', 1)[-1]
+        return 'xeno-canto', str(recording_id)
+
+    if 'commons.wikimedia.org/wiki/' in page_url:
+        title = urllib.parse.unquote(page_url.split('/wiki/', 1)[1]).replace('_', ' ')
+        return 'commons', title
+
+    if 'inaturalist' in url or 'inaturalist' in page_url:
+        match = re.search(r'/photos/(\d+)/', url)
+        if match:
+            return 'inaturalist', match.group(1)
+
+    if 'ala.org.au' in url or 'ala.org.au' in page_url:
+        image_id = (urllib.parse.parse_qs(urllib.parse.urlparse(url).query).get('imageId', [None])[0]
+                    or _path_id(page_url, '/image/'))
+        if image_id:
+            return 'ala', image_id
+        record_id = entry.get('recordId') or _path_id(page_url, '/occurrences/')
+        if record_id:
+            return 'ala', record_id
+
+    return 'url', url
+
+
+def _path_id(url, marker):
+    """Path segment following marker in a URL ('.../image/<id>' -> '<id>')"""
+    if marker not in url:
+        return None
+    return url.split(marker, 1)[1].split('/')[0].split('?')[0] or None
+
+
+def media_id(entry):
+    """Short stable ID for a photo or audio entry"""
+    provider, provider_id = provider_identity(entry)
+    return hashlib.sha1(f"{provider}:{provider_id}".encode('utf-8')).hexdigest()[:ID_LENGTH]
+
+
+def with_id(entry):
+    """Copy of an entry with its "id" as the first field"""
+    return {'id': media_id(entry), **{k: v for k, v in entry.items() if k != 'id'}}
+
+
+def assign_media_ids(data):
+    """
+    Give every photo and audio entry in the bird data an "id"
+
+    Returns:
+        (assigned, duplicates): number of entries updated, and a list of
+        (scientificName, id) pairs seen more than once within a species
+    """
+    assigned = 0
+    duplicates = []
+    for bird in data.get('birds', []):
+        for media in ('photos', 'audio'):
+            entries = [with_id(e) for e in bird.get(media, [])]
+            assigned += sum(1 for old, new in zip(bird.get(media, []), entries) if old.get('id') != new['id'])
+            ids = [e['id'] for e in entries]
+            duplicates.extend((bird['scientificName'], i) for i in sorted(set(ids)) if ids.count(i) > 1)
+            if media in bird:
+                bird[media] = entries
+    return assigned, duplicates
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Add stable IDs to every photo and audio entry')
+    parser.add_argument('bird_data', nargs='?', default='../data/act_birds.json',
+                        help='Bird data JSON file to update in place')
+    args = parser.parse_args()
+
+    print(f"Loading bird data from {args.bird_data}...")
+    with open(args.bird_data, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    assigned, duplicates = assign_media_ids(data)
+    print(f"Assigned IDs to {assigned} entries")
+    for name, duplicate_id in duplicates:
+        print(f"  Warning: {name} has duplicate media {duplicate_id}")
+
+    print(f"Writing updated data to {args.bird_data}...")
+    with open(args.bird_data, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+    print("Done!")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Local Media Mirror
+Downloads every photo and recording in the dataset into a local
+content-addressed store, serves it over HTTP with Range, ETag and injected
+latency, and writes a copy of the dataset pointing at the mirror, so the app
+can be load-tested and profiled without touching Wikimedia or Xeno-canto
+
+Store layout (cache/mirror/):
+    objects/<sha256[:2]>/<sha256>   file contents, written once
+    index.json                      URL -> {sha256, bytes, contentType}
+
+Usage:
+    python media_mirror.py --fetch
+    python media_mirror.py --rewrite ../canberra-bird-app/public/act_birds.mirror.json
+    python media_mirror.py --serve --port 8787 --latency-ms 150 --jitter-ms 50
+"""
+
+import argparse
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import random
+import re
+import tempfile
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+
+MIRROR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'mirror')
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8787
+DEFAULT_WORKERS = 8
+
+# Read and write files in chunks so large recordings are never held in memory
+CHUNK_SIZE = 64 * 1024
+
+MEDIA_PATH = re.compile(r'^/media/([0-9a-f]{64})$')
+RANGE_HEADER = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+HEADERS = {
+    'User-Agent': 'Canberra Bird Game Media Mirror/1.0 (educational project)',
+}
+
+
+class MediaStore:
+    """Content-addressed file store with a URL index"""
+
+    def __init__(self, root=MIRROR_DIR):
+        self.root = root
+        self.index_file = os.path.join(root, 'index.json')
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.index = {}
+
+    def path(self, digest):
+        return os.path.join(self.root, 'objects', digest[:2], digest)
+
+    def has(self, digest):
+        return os.path.exists(self.path(digest))
+
+    def add_stream(self, stream):
+        """
+        Copy a file-like object into the store
+
+        Returns:
+            (sha256, bytes)
+        """
+        os.makedirs(os.path.join(self.root, 'objects'), exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.join(self.root, 'objects'))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while chunk := stream.read(CHUNK_SIZE):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            sha = digest.hexdigest()
+            if self.has(sha):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(self.path(sha)), exist_ok=True)
+                os.replace(tmp_path, self.path(sha))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return sha, size
+
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.index_file + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, indent=1, ensure_ascii=False)
+        os.replace(tmp_path, self.index_file)
+
+
+def dataset_media_urls(birds):
+    """Every photo and recording URL in the dataset, in dataset order without duplicates"""
+    urls = {}
+    for bird in birds:
+        for entry in bird.get('photos', []) + bird.get('audio', []):
+            if entry.get('url'):
+                urls[entry['url']] = True
+    return list(urls)
+
+
+def download(store, url):
+    """Stream one URL into the store; returns its index entry, or None on failure"""
+    try:
+        req = urllib.request.Request(url, headers=HEADERS)
+        with urllib.request.urlopen(req, timeout=120) as response:
+            content_type = response.headers.get_content_type()
+            sha, size = store.add_stream(response)
+    except Exception as e:
+        print(f"Error downloading {url}: {e}")
+        return None
+    return {'sha256': sha, 'bytes': size, 'contentType': content_type}
+
+
+def mirror(store, urls, workers=DEFAULT_WORKERS, refresh=False):
+    """
+    Download URLs that are not yet in the store
+
+    Returns:
+        (downloaded, failed) counts
+    """
+    missing = [url for url in urls
+               if refresh or url not in store.index or not store.has(store.index[url]['sha256'])]
+    print(f"{len(urls) - len(missing)} of {len(urls)} files already mirrored; "
+          f"downloading {len(missing)} with {workers} workers...")
+
+    downloaded = failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for i, (url, entry) in enumerate(zip(missing, executor.map(lambda u: download(store, u), missing)), 1):
+            if entry:
+                store.index[url] = entry
+                downloaded += 1
+            else:
+                failed += 1
+            # Save periodically so an interrupted mirror resumes where it stopped
+            if i % 100 == 0:
+                store.save()
+                print(f"  {i}/{len(missing)}")
+    store.save()
+    return downloaded, failed
+
+
+def rewrite_dataset(data, store, base_url):
+    """
+    Copy of the dataset with mirrored media URLs pointing at the mirror server
+
+    Returns:
+        (data, rewritten) where rewritten counts the URLs replaced
+    """
+    data = copy.deepcopy(data)
+    rewritten = 0
+    for bird in data['birds']:
+        for entry in bird.get('photos', []) + bird.get('audio', []):
+            stored = store.index.get(entry.get('url'))
+            if stored:
+                entry['url'] = f"{base_url.rstrip('/')}/media/{stored['sha256']}"
+                rewritten += 1
+    return data, rewritten
+
+
+def parse_range(header, size):
+    """
+    Resolve a single-range "bytes=" header against a file size
+
+    Returns:
+        (start, end) inclusive, None for a header to ignore, or False if unsatisfiable
+    """
+    match = RANGE_HEADER.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        # Multiple or malformed ranges: serve the whole file
+        return None
+    first, last = match.groups()
+    if first == '':
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+
+class MirrorServer:
+    """
+    Minimal asyncio HTTP/1.1 server for the store
+
+    Every response is delayed by latency_ms plus up to jitter_ms; bandwidth_kbps
+    throttles bodies to simulate a slow connection.
+    """
+
+    def __init__(self, store, latency_ms=0, jitter_ms=0, bandwidth_kbps=0):
+        self.store = store
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.bandwidth_kbps = bandwidth_kbps
+        # Content type per object, from the URL index
+        self.content_types = {e['sha256']: e.get('contentType') for e in store.index.values()}
+
+    async def handle(self, reader, writer):
+        try:
+            while await self.handle_request(reader, writer):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request(self, reader, writer):
+        """Serve one request; returns True to keep the connection open"""
+        request_line = await reader.readline()
+        if not request_line:
+            return False
+        try:
+            method, target, version = request_line.decode('latin-1').split()
+        except ValueError:
+            await self.respond(writer, 400, {}, keep_alive=False)
+            return False
+
+        headers = {}
+        while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+
+        delay = self.latency_ms + random.uniform(0, self.jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+
+        if method == 'OPTIONS':
+            await self.respond(writer, 204, {'Access-Control-Allow-Headers': 'Range, If-None-Match'}, keep_alive)
+            return keep_alive
+        if method not in ('GET', 'HEAD'):
+            await self.respond(writer, 405, {'Allow': 'GET, HEAD, OPTIONS'}, keep_alive)
+            return keep_alive
+
+        match = MEDIA_PATH.match(target.split('?')[0])
+        if not match or not self.store.has(match.group(1)):
+            await self.respond(writer, 404, {}, keep_alive)
+            return keep_alive
+
+        digest = match.group(1)
+        path = self.store.path(digest)
+        size = os.path.getsize(path)
+        # Content addressing makes the hash a strong validator that never changes
+        etag = f'"{digest}"'
+        base = {
+            'ETag': etag,
+            'Accept-Ranges': 'bytes',
+            'Cache-Control': 'public, max-age=31536000, immutable',
+            'Content-Type': self.content_types.get(digest) or 'application/octet-stream',
+        }
+
+        if etag in [tag.strip() for tag in headers.get('if-none-match', '').split(',')]:
+            await self.respond(writer, 304, base, keep_alive)
+            return keep_alive
+
+        byte_range = None
+        if 'range' in headers and headers.get('if-range', etag) == etag:
+            byte_range = parse_range(headers['range'], size)
+        if byte_range is False:
+            await self.respond(writer, 416, {**base, 'Content-Range': f'bytes */{size}'}, keep_alive)
+            return keep_alive
+
+        start, end = byte_range or (0, size - 1)
+        status = 206 if byte_range else 200
+        extra = {'Content-Range': f'bytes {start}-{end}/{size}'} if byte_range else {}
+        await self.respond(writer, status, {**base, **extra}, keep_alive,
+                           length=end - start + 1, body=None if method == 'HEAD' else (path, start))
+        return keep_alive
+
+    async def respond(self, writer, status, headers, keep_alive, length=0, body=None):
+        reasons = {200: 'OK', 204: 'No Content', 206: 'Partial Content', 304: 'Not Modified',
+                   400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                   416: 'Range Not Satisfiable'}
+        lines = [f'HTTP/1.1 {status} {reasons[status]}',
+                 f'Date: {formatdate(usegmt=True)}',
+                 'Access-Control-Allow-Origin: *',
+                 'Access-Control-Expose-Headers: Content-Range, ETag, Accept-Ranges',
+                 f'Connection: {"keep-alive" if keep_alive else "close"}']
+        if status != 304:
+            lines.append(f'Content-Length: {length}')
+        lines += [f'{name}: {value}' for name, value in headers.items()]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+
+        if body:
+            path, offset = body
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                remaining = length
+                while remaining > 0:
+                    chunk = f.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    writer.write(chunk)
+                    remaining -= len(chunk)
+                    await writer.drain()
+                    if self.bandwidth_kbps:
+                        await asyncio.sleep(len(chunk) * 8 / (self.bandwidth_kbps * 1000))
+        await writer.drain()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Serving {len(self.content_types)} files from {self.store.root} on http://{host}:{port}/media/ "
+              f"(latency {self.latency_ms} ms + up to {self.jitter_ms} ms"
+              f"{f', {self.bandwidth_kbps} kbps' if self.bandwidth_kbps else ''})")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mirror dataset media locally and serve it for load testing')
+    parser.add_argument('bird_data', nargs='?', default='../data/act_birds.json',
+                        help='Bird data JSON file')
+    parser.add_argument('--store', default=MIRROR_DIR, help='Mirror directory')
+    parser.add_argument('--fetch', action='store_true', help='Download media that is not yet mirrored')
+    parser.add_argument('--refresh', action='store_true', help='With --fetch, download everything again')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Concurrent downloads')
+    parser.add_argument('--rewrite', metavar='OUTPUT',
+                        help='Write a copy of the dataset with media URLs pointing at the mirror')
+    parser.add_argument('--base-url', help='Mirror URL used by --rewrite (default: http://HOST:PORT)')
+    parser.add_argument('--serve', action='store_true', help='Serve the mirror over HTTP')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='Address to listen on')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port to listen on')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Delay added to every response')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='Random extra delay of up to this much')
+    parser.add_argument('--bandwidth-kbps', type=float, default=0,
+                        help='Throttle response bodies to this rate (0: unlimited)')
+    args = parser.parse_args()
+
+    if not (args.fetch or args.rewrite or args.serve):
+        parser.error('nothing to do: use --fetch, --rewrite and/or --serve')
+
+    store = MediaStore(args.store)
+    with open(args.bird_data, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if args.fetch:
+        urls = dataset_media_urls(data['birds'])
+        downloaded, failed = mirror(store, urls, args.workers, args.refresh)
+        stored = {e['sha256']: e['bytes'] for e in store.index.values()}
+        print(f"\nDownloaded {downloaded}, failed {failed}; store holds {len(stored)} files "
+              f"({sum(stored.values()) / 1e6:.1f} MB)")
+
+    if args.rewrite:
+        base_url = args.base_url or f"http://{args.host}:{args.port}"
+        mirrored, rewritten = rewrite_dataset(data, store, base_url)
+        with open(args.rewrite, 'w', encoding='utf-8') as f:
+            json.dump(mirrored, f, indent=2, ensure_ascii=False)
+        total = sum(len(b.get('photos', [])) + len(b.get('audio', [])) for b in data['birds'])
+        print(f"Rewrote {rewritten} of {total} media URLs to {base_url} in {args.rewrite}")
+
+    if args.serve:
+        server = MirrorServer(store, args.latency_ms, args.jitter_ms, args.bandwidth_kbps)
+        try:
+            asyncio.run(server.serve(args.host, args.port))
+        except KeyboardInterrupt:
+            print("\nStopped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Review Merge Script
+Applies photo-review-tool.html selections and flags, and new ALA photo results
+from search_ala_photos.py, to the bird data in a single pass
+
+- Flagged photos are removed
+- For species with any selected photos, only the selected photos are kept
+- New ALA photos are appended (deduplicated) up to the per-species maximum
+
+The media IDs of removed photos are recorded in data/rejected_media.json, so
+later stages that go back to cached provider results (rank_media.py) and later
+merges never bring a rejected photo back.
+
+Photos are matched by stable media ID (see media_ids.py), which survives
+reordering and URL rewrites; files from older versions of the review tool that
+carry only a pageUrl or a photoIndex are still accepted.
+"""
+
+import argparse
+import json
+import os
+
+from media_ids import media_id, with_id
+
+DEFAULT_MAX_PHOTOS = 5
+
+# scientificName -> media IDs removed by review
+REJECTED_FILE = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'rejected_media.json'))
+
+
+def photo_key(photo):
+    """Stable key for a photo: its media ID"""
+    return photo.get('id') or media_id(photo)
+
+
+def load_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_rejected(path=REJECTED_FILE):
+    """Media IDs removed by earlier reviews, as scientificName -> set of IDs"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return {name: set(ids) for name, ids in json.load(f).items()}
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_rejected(rejected, path=REJECTED_FILE):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({name: sorted(ids) for name, ids in sorted(rejected.items()) if ids}, f, indent=2,
+                  ensure_ascii=False)
+
+
+def build_review_index(selection=None, flagged=None, ala_results=()):
+    """
+    Group every review operation by scientific name
+
+    Returns:
+        Dict mapping scientificName to {'selected': [...], 'flagged': [...],
+        'new': [...]} where selected/flagged hold review-tool entries and new
+        holds photo dicts
+    """
+    index = {}
+
+    def ops(name):
+        return index.setdefault(name, {'selected': [], 'flagged': [], 'new': []})
+
+    for entry in (selection or {}).get('photos', []):
+        ops(entry['birdScientificName'])['selected'].append(entry)
+
+    for entry in (flagged or {}).get('photos', []):
+        ops(entry['birdScientificName'])['flagged'].append(entry)
+
+    for results in ala_results:
+        for species in results.get('species', []):
+            ops(species['scientificName'])['new'].extend(species.get('photos', []))
+
+    return index
+
+
+def resolve_keys(photos, entries, warnings, name):
+    """
+    Turn review-tool entries into photo keys for one species
+
+    Entries with a photoId are used directly and pageUrl-only entries are
+    hashed the same way; legacy index-only entries are accepted only if the
+    photo at that index still has the recorded URL.
+    """
+    keys = set()
+    for entry in entries:
+        if entry.get('photoId'):
+            keys.add(entry['photoId'])
+            continue
+        if entry.get('pageUrl'):
+            keys.add(media_id({'pageUrl': entry['pageUrl'], 'url': entry.get('photoUrl', '')}))
+            continue
+
+        index = entry.get('photoIndex')
+        if index is not None and 0 <= index < len(photos) and photos[index].get('url') == entry.get('photoUrl'):
+            keys.add(photo_key(photos[index]))
+        else:
+            warnings.append(f"{name}: stale photoIndex {index} ({entry.get('photoUrl')}) ignored")
+    return keys
+
+
+def merge_reviews(data, review_index, max_photos=DEFAULT_MAX_PHOTOS, rejected=None):
+    """
+    Apply review operations to the bird data in place
+
+    Args:
+        rejected: Optional scientificName -> set of media IDs removed by earlier
+            reviews; new photos with these IDs are skipped, and the IDs of photos
+            removed now are added to it
+
+    Returns:
+        (deltas, warnings): deltas maps scientificName to {'added', 'removed'}
+        counts for species that changed
+    """
+    if rejected is None:
+        rejected = {}
+    deltas = {}
+    warnings = []
+    seen_species = set()
+
+    for bird in data.get('birds', []):
+        name = bird['scientificName']
+        ops = review_index.get(name)
+        if not ops:
+            continue
+        seen_species.add(name)
+
+        photos = bird.get('photos', [])
+        flagged = resolve_keys(photos, ops['flagged'], warnings, name)
+        selected = resolve_keys(photos, ops['selected'], warnings, name)
+
+        kept = [p for p in photos
+                if photo_key(p) not in flagged and (not selected or photo_key(p) in selected)]
+        removed = len(photos) - len(kept)
+        kept_keys = {photo_key(p) for p in kept}
+        # Photos that survived this review have now been reviewed
+        for photo in kept:
+            photo.pop('needsReview', None)
+        species_rejected = rejected.setdefault(name, set())
+        species_rejected.update(photo_key(p) for p in photos if photo_key(p) not in kept_keys)
+
+        existing_keys = kept_keys | {p.get('url') for p in kept} | species_rejected
+        added = 0
+        for photo in ops['new']:
+            if len(kept) >= max_photos:
+                break
+            if photo_key(photo) in existing_keys or photo.get('url') in existing_keys:
+                continue
+            photo = with_id(photo)
+            kept.append(photo)
+            existing_keys.update({photo_key(photo), photo.get('url')})
+            added += 1
+
+        bird['photos'] = kept
+        if added or removed:
+            deltas[name] = {'commonName': bird['commonName'], 'added': added, 'removed': removed,
+                            'photos': len(kept)}
+
+    for name in sorted(set(review_index) - seen_species):
+        warnings.append(f"{name}: not in bird data, review entries ignored")
+
+    return deltas, warnings
+
+
+def update_photo_statistics(data):
+    """Recompute the photo counts in the statistics block"""
+    birds = data.get('birds', [])
+    total = len(birds)
+    total_photos = sum(len(b.get('photos', [])) for b in birds)
+    birds_with_photos = sum(1 for b in birds if b.get('photos'))
+    data.setdefault('statistics', {}).update({
+        'birdsWithPhotos': birds_with_photos,
+        'birdsWithoutPhotos': total - birds_with_photos,
+        'totalPhotos': total_photos,
+        'averagePhotosPerBird': round(total_photos / total, 2) if total > 0 else 0
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Merge photo review results and ALA photos into the bird data')
+    parser.add_argument('bird_data', nargs='?', default='../data/act_birds.json',
+                        help='Bird data JSON file')
+    parser.add_argument('--selection', help='bird-photo-selection.json from the review tool')
+    parser.add_argument('--flagged', help='bird-photo-flagged.json from the review tool')
+    parser.add_argument('--ala', nargs='*', default=[], help='ala_photos_results_*.json files')
+    parser.add_argument('--max-photos', type=int, default=DEFAULT_MAX_PHOTOS,
+                        help='Maximum photos per species after adding ALA photos')
+    parser.add_argument('--output', help='Output file (default: update bird data in place)')
+    parser.add_argument('--dry-run', action='store_true', help='Report changes without writing')
+    args = parser.parse_args()
+
+    print(f"Loading bird data from {args.bird_data}...")
+    data = load_json(args.bird_data)
+
+    review_index = build_review_index(
+        load_json(args.selection) if args.selection else None,
+        load_json(args.flagged) if args.flagged else None,
+        [load_json(path) for path in args.ala]
+    )
+    print(f"Review operations for {len(review_index)} species")
+
+    rejected = load_rejected()
+    deltas, warnings = merge_reviews(data, review_index, args.max_photos, rejected)
+    update_photo_statistics(data)
+
+    print(f"\n=== Per-species changes ===")
+    for name, delta in sorted(deltas.items(), key=lambda item: item[1]['commonName']):
+        print(f"  {delta['commonName']} ({name}): +{delta['added']} -{delta['removed']} "
+              f"-> {delta['photos']} photos")
+    if not deltas:
+        print("  No changes")
+
+    if warnings:
+        print(f"\n{len(warnings)} warning(s):")
+        for warning in warnings:
+            print(f"  - {warning}")
+
+    print(f"\nTotal: +{sum(d['added'] for d in deltas.values())} "
+          f"-{sum(d['removed'] for d in deltas.values())} photos across {len(deltas)} species")
+
+    if args.dry_run:
+        print("Dry run - nothing written")
+        return
+
+    output_file = args.output or args.bird_data
+    print(f"Writing updated data to {output_file}...")
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    save_rejected(rejected)
+    print(f"Rejected media IDs recorded in {REJECTED_FILE}")
+
+    print("Done!")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Pipeline Event Log
+Structured JSON-lines events for harvest runs: one "request" event per HTTP
+request (latency, bytes, cache hit or miss, status), one "search"
+event per species x provider, "reject" events with reasons for media that was
+dropped, and one "species" event with the records accepted from each provider
+
+Scripts call start_run() once; providers and the scheduler log through
+log_event(), which is a no-op when no run has been started. Events pick up
+the current species and provider from species_context().
+
+Run as a script to summarise a run into per-provider throughput and latency
+tables, compared with the previous run of the same script:
+
+    python pipeline_log.py                        # latest run
+    python pipeline_log.py cache/events/search_photos-20260101-120000.jsonl
+"""
+
+import argparse
+import atexit
+import contextvars
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+EVENT_LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'events')
+
+_context = contextvars.ContextVar('pipeline_log_context', default={})
+_lock = threading.Lock()
+_log_file = None
+_run = None
+
+
+def start_run(name):
+    """
+    Start logging events for a run of the named script
+
+    Returns:
+        Path of the run's JSON-lines file
+    """
+    global _log_file, _run
+    os.makedirs(EVENT_LOG_DIR, exist_ok=True)
+    _run = f"{name}-{time.strftime('%Y%m%d-%H%M%S')}"
+    path = os.path.join(EVENT_LOG_DIR, f"{_run}.jsonl")
+    _log_file = open(path, 'a', encoding='utf-8')
+    log_event('run_start', script=name)
+    atexit.register(_end_run)
+    return path
+
+
+def _end_run():
+    global _log_file
+    if _log_file:
+        log_event('run_end')
+        _log_file.close()
+        _log_file = None
+
+
+def log_event(event, **fields):
+    """Append one event, tagged with the current species and provider"""
+    if _log_file is None:
+        return
+    record = {'ts': round(time.time(), 3), 'run': _run, 'event': event, **_context.get(), **fields}
+    line = json.dumps(record, ensure_ascii=False)
+    with _lock:
+        _log_file.write(line + '\n')
+        _log_file.flush()
+
+
+@contextmanager
+def species_context(species=None, provider=None):
+    """Tag events logged inside the block (including from worker threads) with species/provider"""
+    context = dict(_context.get())
+    if species:
+        context['species'] = species
+    if provider:
+        context['provider'] = provider
+    token = _context.set(context)
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def reject(reason, **fields):
+    """Record a media item dropped by a provider or the scheduler"""
+    log_event('reject', reason=reason, **fields)
+
+
+def load_events(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentile(values, q):
+    """Nearest-rank percentile (q in 0-100) of a list, or None if empty"""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, round(q / 100 * len(values) + 0.5) - 1))]
+
+
+def summarise(events):
+    """
+    Aggregate a run's events per provider
+
+    Returns:
+        Dict mapping provider to {'requests', 'cacheHits', 'errors', 'rateLimited',
+        'bytes', 'p50Ms', 'p95Ms', 'searches', 'searchP95Ms', 'yielded',
+        'accepted', 'rejected': {reason: count}, 'requestsPerSec'}
+    """
+    stats = {}
+    latencies = {}
+    search_durations = {}
+
+    def provider_stats(name):
+        return stats.setdefault(name or 'unknown', {
+            'requests': 0, 'cacheHits': 0, 'errors': 0, 'rateLimited': 0, 'bytes': 0,
+            'searches': 0, 'yielded': 0, 'accepted': 0, 'rejected': {},
+        })
+
+    for e in events:
+        kind = e.get('event')
+        if kind == 'request':
+            # Requests made outside a provider search (bulk crawls) are grouped by host
+            name = e.get('provider') or e.get('host')
+            s = provider_stats(name)
+            s['requests'] += 1
+            if e.get('status') == 429:
+                s['rateLimited'] += 1
+            s['bytes'] += e.get('bytes') or 0
+            if e.get('cache') == 'hit':
+                s['cacheHits'] += 1
+            elif e.get('cache') == 'offline-miss':
+                s['errors'] += 1
+            else:
+                latencies.setdefault(name or 'unknown', []).append(e.get('latencyMs', 0))
+                if not e.get('ok'):
+                    s['errors'] += 1
+        elif kind == 'search':
+            s = provider_stats(e.get('provider'))
+            s['searches'] += 1
+            s['yielded'] += e.get('yielded', 0)
+            search_durations.setdefault(e.get('provider') or 'unknown', []).append(e.get('durationMs', 0))
+        elif kind == 'reject':
+            rejected = provider_stats(e.get('provider'))['rejected']
+            rejected[e.get('reason', 'unknown')] = rejected.get(e.get('reason', 'unknown'), 0) + 1
+        elif kind == 'species':
+            for name, count in e.get('accepted', {}).items():
+                provider_stats(name)['accepted'] += count
+
+    timestamps = [e['ts'] for e in events if 'ts' in e]
+    wall = (max(timestamps) - min(timestamps)) if timestamps else 0
+    for name, s in stats.items():
+        s['p50Ms'] = percentile(latencies.get(name, []), 50)
+        s['p95Ms'] = percentile(latencies.get(name, []), 95)
+        s['searchP95Ms'] = percentile(search_durations.get(name, []), 95)
+        s['requestsPerSec'] = round(s['requests'] / wall, 2) if wall > 0 else None
+    return stats
+
+
+def previous_run(path):
+    """The run of the same script logged just before this one, or None"""
+    script = os.path.basename(path).rsplit('-', 2)[0]
+    runs = sorted(glob.glob(os.path.join(os.path.dirname(path), f"{script}-*.jsonl")))
+    earlier = [r for r in runs if r < path]
+    return earlier[-1] if earlier else None
+
+
+def _ms(value):
+    return '-' if value is None else f"{value:.0f}"
+
+
+def print_summary(stats, previous=None):
+    print(f"{'provider':<18}{'req':>7}{'hit%':>6}{'err':>5}{'429':>6}{'MB':>8}{'req/s':>7}"
+          f"{'p50ms':>8}{'p95ms':>8}{'Δp95':>7}{'search p95':>11}{'yield':>7}{'kept':>6}")
+    for name in sorted(stats):
+        s = stats[name]
+        hit_rate = 100 * s['cacheHits'] / s['requests'] if s['requests'] else 0
+        delta = '-'
+        old = (previous or {}).get(name, {})
+        if s['p95Ms'] is not None and old.get('p95Ms') is not None:
+            delta = f"{s['p95Ms'] - old['p95Ms']:+.0f}"
+        print(f"{name:<18}{s['requests']:>7}{hit_rate:>6.0f}{s['errors']:>5}{s['rateLimited']:>6}"
+              f"{s['bytes'] / 1e6:>8.1f}{s['requestsPerSec'] or 0:>7.2f}{_ms(s['p50Ms']):>8}"
+              f"{_ms(s['p95Ms']):>8}{delta:>7}{_ms(s['searchP95Ms']):>11}{s['yielded']:>7}{s['accepted']:>6}")
+
+    for name in sorted(stats):
+        rejected = stats[name]['rejected']
+        if rejected:
+            reasons = ', '.join(f"{reason}: {count}" for reason, count in
+                                sorted(rejected.items(), key=lambda item: -item[1]))
+            print(f"  {name} rejected - {reasons}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarise a pipeline event log')
+    parser.add_argument('log', nargs='?', help='Event log (default: latest in cache/events)')
+    parser.add_argument('--compare', help='Earlier event log to compare against (default: previous run)')
+    args = parser.parse_args()
+
+    path = args.log
+    if not path:
+        runs = sorted(glob.glob(os.path.join(EVENT_LOG_DIR, '*.jsonl')), key=os.path.getmtime)
+        if not runs:
+            print(f"No event logs in {EVENT_LOG_DIR}")
+            return
+        path = runs[-1]
+
+    compare = args.compare or previous_run(path)
+    print(f"Run: {path}")
+    if compare:
+        print(f"Compared with: {compare}")
+    print()
+    print_summary(summarise(load_events(path)), summarise(load_events(compare)) if compare else None)
+
+
+if __name__ == '__main__':
+    main()
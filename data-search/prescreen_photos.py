@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Photo Pre-screening Script
+Scores every photo for how likely it is to be unsuitable (eggs, nests, museum
+specimens, dead birds, illustrations, odd shapes, near-duplicates) using cheap
+CPU-only heuristics, and writes a ranked review queue for photo-review-tool.html
+so reviewers look at the riskiest photos first
+
+Near-duplicate detection hashes downloaded thumbnails when Pillow is installed
+(pip install Pillow); without it, duplicates are found from Commons file names
+and exact file sizes and dimensions.
+"""
+
+import argparse
+import io
+import json
+import math
+import re
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from harvest_media_metadata import commons_title
+from media_ids import media_id
+from providers import fetch_json
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+COMMONS_API_URL = 'https://commons.wikimedia.org/w/api.php'
+COMMONS_BATCH_SIZE = 50
+
+# Keyword -> suspicion weight, matched against Commons title, description and categories
+KEYWORD_WEIGHTS = {
+    'egg': 0.7,
+    'eggs': 0.7,
+    'oology': 0.7,
+    'nest': 0.35,
+    'specimen': 0.7,
+    'museum': 0.6,
+    'mhnt': 0.7,
+    'naturalis': 0.5,
+    'skin': 0.5,
+    'taxidermy': 0.7,
+    'mounted': 0.5,
+    'stuffed': 0.7,
+    'skeleton': 0.8,
+    'skull': 0.8,
+    'dead': 0.7,
+    'carcass': 0.8,
+    'roadkill': 0.8,
+    'illustration': 0.6,
+    'drawing': 0.5,
+    'painting': 0.5,
+    'lithograph': 0.6,
+    'plate': 0.4,
+    'stamp': 0.6,
+    'map': 0.6,
+    'feather': 0.4,
+    'feathers': 0.4,
+    'chick': 0.25,
+    'juvenile': 0.15,
+    'zoo': 0.15,
+    'captive': 0.15,
+}
+
+# Robust z-score of log aspect ratio beyond which a photo is an outlier
+ASPECT_Z_THRESHOLD = 3.0
+
+# Photos whose shorter side is below this (in pixels) are too small to identify from
+MIN_SHORT_SIDE = 240
+
+# Maximum differing bits between 64-bit dHashes for two photos to count as duplicates
+DUPLICATE_HAMMING = 6
+
+# Fraction of photos flagged as "review first"
+REVIEW_FIRST_FRACTION = 0.10
+
+DEFAULT_WORKERS = 4
+
+HEADERS = {
+    'User-Agent': 'Canberra Bird Game Photo Prescreen/1.0 (educational project)',
+}
+
+
+def fetch_commons_context(titles):
+    """
+    Fetch description and category text for Commons files
+
+    Returns:
+        Dict mapping "File:..." title to lower-case searchable text
+    """
+    context = {}
+    for start in range(0, len(titles), COMMONS_BATCH_SIZE):
+        batch = titles[start:start + COMMONS_BATCH_SIZE]
+        result = fetch_json(COMMONS_API_URL, {
+            'action': 'query',
+            'titles': '|'.join(batch),
+            'prop': 'imageinfo',
+            'iiprop': 'extmetadata',
+            'iiextmetadatafilter': 'ImageDescription|Categories|ObjectName',
+            'format': 'json',
+        })
+        if not result:
+            continue
+
+        query = result.get('query', {})
+        aliases = {n['to']: n['from'] for n in query.get('normalized', [])}
+        for page in query.get('pages', {}).values():
+            imageinfo = page.get('imageinfo')
+            if not imageinfo:
+                continue
+            meta = imageinfo[0].get('extmetadata', {})
+            text = ' '.join(str(meta.get(field, {}).get('value', ''))
+                            for field in ('ObjectName', 'ImageDescription', 'Categories'))
+            title = aliases.get(page.get('title'), page.get('title'))
+            context[title] = re.sub('<[^>]+>', ' ', text).lower()
+    return context
+
+
+def keyword_score(text):
+    """
+    Score text against KEYWORD_WEIGHTS
+
+    Returns:
+        (score, reasons): noisy-or of matched keyword weights, and the keywords
+    """
+    words = set(re.findall(r'[a-z]+', text.lower()))
+    matched = sorted(word for word in KEYWORD_WEIGHTS if word in words)
+    score = 1.0 - math.prod(1.0 - KEYWORD_WEIGHTS[word] for word in matched)
+    return score, [f"keyword: {word}" for word in matched]
+
+
+def shape_scores(photos):
+    """
+    Flag aspect-ratio outliers (robust z-score over the whole collection) and tiny images
+
+    Args:
+        photos: List of photo dicts, with width/height from harvest_media_metadata.py
+
+    Returns:
+        List of (score, reasons), aligned with photos
+    """
+    width = np.array([p.get('width') or np.nan for p in photos], dtype=float)
+    height = np.array([p.get('height') or np.nan for p in photos], dtype=float)
+    log_aspect = np.log(width / height)
+
+    median = np.nanmedian(log_aspect) if np.isfinite(log_aspect).any() else 0.0
+    mad = np.nanmedian(np.abs(log_aspect - median)) if np.isfinite(log_aspect).any() else 0.0
+    z = np.abs(log_aspect - median) / (1.4826 * mad) if mad > 0 else np.zeros(len(photos))
+    short_side = np.fmin(width, height)
+
+    results = []
+    for i in range(len(photos)):
+        score, reasons = 0.0, []
+        if np.isfinite(z[i]) and z[i] > ASPECT_Z_THRESHOLD:
+            score = max(score, min(0.6, 0.1 * z[i]))
+            reasons.append(f"unusual aspect ratio {width[i]:.0f}x{height[i]:.0f}")
+        if np.isfinite(short_side[i]) and short_side[i] < MIN_SHORT_SIDE:
+            score = max(score, 0.4)
+            reasons.append(f"small image ({short_side[i]:.0f}px)")
+        results.append((score, reasons))
+    return results
+
+
+def thumbnail_url(url):
+    """Smallest standard Commons thumbnail for hashing; other sources are used as-is"""
+    return re.sub(r'/\d+px-([^/]+)$', r'/330px-\1', url)
+
+
+def dhash(url):
+    """
+    64-bit difference hash of an image, or None if Pillow is missing or the download fails
+
+    Runs in a worker process.
+    """
+    if Image is None:
+        return None
+    try:
+        req = urllib.request.Request(thumbnail_url(url), headers=HEADERS)
+        with urllib.request.urlopen(req, timeout=30) as response:
+            image = Image.open(io.BytesIO(response.read())).convert('L').resize((9, 8))
+    except Exception as e:
+        print(f"Error hashing {url}: {e}")
+        return None
+
+    pixels = np.asarray(image, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int(''.join('1' if b else '0' for b in bits), 2)
+
+
+def file_stem(photo):
+    """
+    Normalised Commons file name without sequence numbers ("Emu_1_-_Tidbinbilla.jpg" ->
+    "emu tidbinbilla"), or None for other sources, whose URL names ("large.jpg") say
+    nothing about the photo
+
+    Only 1-3 digit runs are dropped: years and upload IDs
+    ("Stictonetta_naevosa_61101565.jpg") tell different photos apart.
+    """
+    title = commons_title(photo.get('pageUrl', ''))
+    if not title:
+        return None
+    title = re.sub(r'^file:', '', title.lower())
+    title = re.sub(r'\.[a-z0-9]+$', '', title)
+    words = [w for w in re.findall(r'[a-z]+|[0-9]+', title) if not (w.isdigit() and len(w) <= 3)]
+    return ' '.join(words) or None
+
+
+def same_file(a, b):
+    """True when two photos have the same harvested byte size and dimensions"""
+    return (bool(a.get('bytes') and a.get('width') and a.get('height'))
+            and (a['bytes'], a['width'], a['height']) == (b.get('bytes'), b.get('width'), b.get('height')))
+
+
+def duplicate_groups(photos, hashes):
+    """
+    Group near-duplicate photos within one species
+
+    Photos are duplicates when their dHashes differ by at most DUPLICATE_HAMMING
+    bits, or (without hashes) when they share a Commons file-name stem or the
+    same byte size and dimensions.
+
+    Returns:
+        List of index lists, each with at least two photos
+    """
+    parent = list(range(len(photos)))
+    stems = [file_stem(photo) for photo in photos]
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i in range(len(photos)):
+        for j in range(i + 1, len(photos)):
+            if hashes[i] is not None and hashes[j] is not None:
+                same = bin(hashes[i] ^ hashes[j]).count('1') <= DUPLICATE_HAMMING
+            else:
+                same = (stems[i] is not None and stems[i] == stems[j]) or same_file(photos[i], photos[j])
+            if same:
+                parent[find(j)] = find(i)
+
+    groups = {}
+    for i in range(len(photos)):
+        groups.setdefault(find(i), []).append(i)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def prescreen(data, workers=DEFAULT_WORKERS):
+    """
+    Score every photo in the bird data
+
+    Returns:
+        List of queue entries sorted by suspicion (highest first)
+    """
+    entries = [(bird, index, photo)
+               for bird in data.get('birds', [])
+               for index, photo in enumerate(bird.get('photos', []))]
+    photos = [photo for _, _, photo in entries]
+
+    titles = sorted({t for t in (commons_title(p.get('pageUrl', '')) for p in photos) if t})
+    print(f"Fetching Commons descriptions and categories for {len(titles)} files...")
+    context = fetch_commons_context(titles)
+
+    if Image is None:
+        print("Pillow not installed - using file names and sizes for duplicate detection")
+        hashes = [None] * len(photos)
+    else:
+        print(f"Hashing {len(photos)} thumbnails with {workers} worker processes...")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            hashes = list(executor.map(dhash, [p.get('url', '') for p in photos], chunksize=16))
+
+    shapes = shape_scores(photos)
+
+    # Everything in a duplicate group after its first photo is suspect
+    duplicate_reasons = {}
+    offset = 0
+    for bird in data.get('birds', []):
+        count = len(bird.get('photos', []))
+        for group in duplicate_groups(bird.get('photos', []), hashes[offset:offset + count]):
+            for i in group[1:]:
+                duplicate_reasons[offset + i] = f"near-duplicate of photo {group[0]}"
+        offset += count
+
+    queue = []
+    for i, (bird, index, photo) in enumerate(entries):
+        title = commons_title(photo.get('pageUrl', '')) or ''
+        text = f"{title} {context.get(title, '')}"
+        scores, reasons = [], []
+
+        score, why = keyword_score(text)
+        scores.append(score)
+        reasons.extend(why)
+
+        score, why = shapes[i]
+        scores.append(score)
+        reasons.extend(why)
+
+        if i in duplicate_reasons:
+            scores.append(0.5)
+            reasons.append(duplicate_reasons[i])
+
+        if photo.get('needsReview'):
+            reasons.append("added by re-ranking, not yet reviewed")
+
+        queue.append({
+            'birdScientificName': bird['scientificName'],
+            'birdCommonName': bird['commonName'],
+            'photoId': photo.get('id') or media_id(photo),
+            'photoIndex': index,
+            'pageUrl': photo.get('pageUrl'),
+            'photoUrl': photo.get('url'),
+            'suspicion': round(1.0 - math.prod(1.0 - s for s in scores), 3),
+            'reasons': reasons,
+            'needsReview': bool(photo.get('needsReview'))
+        })
+
+    queue.sort(key=lambda e: (e['needsReview'], e['suspicion']), reverse=True)
+    review_first = max(1, round(len(queue) * REVIEW_FIRST_FRACTION)) if queue else 0
+    for rank, entry in enumerate(queue):
+        entry['reviewFirst'] = entry['needsReview'] or (rank < review_first and entry['suspicion'] > 0)
+    return queue
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pre-screen photos and write a ranked review queue')
+    parser.add_argument('bird_data', nargs='?', default='../data/act_birds.json',
+                        help='Bird data JSON file')
+    parser.add_argument('--output', default='photo_review_queue.json',
+                        help='Review queue file to load into photo-review-tool.html')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Worker processes for thumbnail hashing')
+    args = parser.parse_args()
+
+    print(f"Loading bird data from {args.bird_data}...")
+    with open(args.bird_data, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    queue = prescreen(data, args.workers)
+
+    result = {
+        'generated': datetime.now().isoformat(),
+        'totalPhotos': len(queue),
+        'reviewFirst': sum(1 for e in queue if e['reviewFirst']),
+        'photos': queue
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+
+    print(f"\n=== Summary ===")
+    print(f"Photos screened: {len(queue)}")
+    print(f"Suspicious (score > 0): {sum(1 for e in queue if e['suspicion'] > 0)}")
+    print(f"Review first: {result['reviewFirst']}")
+    for entry in queue[:10]:
+        print(f"  {entry['suspicion']:.2f} {entry['birdCommonName']} #{entry['photoIndex']}: "
+              f"{', '.join(entry['reasons'])}")
+    print(f"\nQueue saved to {args.output}")
+    print("Load it in photo-review-tool.html to sort photos by suspicion")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,12 @@
+"""
+Media provider plugins
+
+Each source lives in its own module and registers a Provider subclass; adding a
+source means adding a module here and importing it below.
+"""
+
+from .base import (PROVIDERS, Provider, fetch_json, get_provider, register, search_async, search_sync,
+                   stream_json)
+from .scheduler import gather_all, gather_species_media
+
+from . import wikimedia, ala_images, ala_occurrences, inaturalist, xeno_canto  # noqa: F401 (registers providers)
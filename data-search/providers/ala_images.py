@@ -0,0 +1,77 @@
+"""
+Atlas of Living Australia image service provider (species-level images)
+"""
+
+import urllib.parse
+
+from licences import is_acceptable_licence, normalize_licence
+from pipeline_log import reject
+from taxonomy import candidate_names, match_ala, taxonomy_cache
+
+from .base import Provider, register
+
+ALA_SPECIES_SEARCH_URL = 'https://bie.ala.org.au/ws/search'
+ALA_IMAGE_SEARCH_URL = 'https://images.ala.org.au/ws/search'
+
+
+async def resolve_ala_guid(provider, scientific_name):
+    """
+    ALA taxon GUID for a species, from the taxonomy cache or an exact-name BIE search
+
+    Tries our name and then each alias; the first exact match is cached.
+    """
+    guid = taxonomy_cache.get(scientific_name, 'ala')
+    if guid:
+        return guid
+    for name in candidate_names(scientific_name):
+        result = await provider.fetch_json(ALA_SPECIES_SEARCH_URL, {
+            'q': name,
+            'fq': 'idxtype:TAXON',
+        })
+        match = match_ala(name, (result or {}).get('searchResults', {}).get('results') or [])
+        if match:
+            taxonomy_cache.set(scientific_name, 'ala', *match)
+            return match[0]
+    return None
+
+
+@register
+class AlaImagesProvider(Provider):
+    name = 'ala_images'
+    source = 'Atlas of Living Australia'
+    request_delay = 0.2
+
+    async def search(self, species, limit):
+        guid = await resolve_ala_guid(self, species['scientificName'])
+        if not guid:
+            return
+
+        # Get images for this taxon
+        img_result = await self.fetch_json(ALA_IMAGE_SEARCH_URL, {
+            'q': '*:*',
+            'fq': f'recognisedLsid:{guid}',
+            'rows': max(limit, self.candidate_pool),
+        })
+        yielded = 0
+        for occ in (img_result or {}).get('occurrences', []):
+            license_code = occ.get('license', '')
+            if not is_acceptable_licence(license_code):
+                reject(f"licence: {license_code or 'missing'}")
+                continue
+
+            photo = {
+                'url': occ.get('largeImageUrl') or occ.get('imageUrl', ''),
+                'pageUrl': f"https://images.ala.org.au/image/{urllib.parse.quote(occ.get('imageId', ''))}",
+                'source': self.source,
+                'licence': normalize_licence(license_code)
+            }
+
+            creator = occ.get('creator') or occ.get('rightsholder', '')
+            if creator:
+                photo['attribution'] = creator
+
+            if photo['url']:
+                yield photo
+                yielded += 1
+                if yielded >= limit:
+                    return
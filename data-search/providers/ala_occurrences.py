@@ -0,0 +1,253 @@
+"""
+Atlas of Living Australia occurrence (biocache) photo provider
+
+Also reads ALA occurrence downloads (a zipped CSV of every matching record,
+e.g. class Aves in one state with multimedia), so a whole checklist can be
+harvested in one local pass instead of one web-service query per species.
+"""
+
+import contextlib
+import csv
+import io
+import re
+import zipfile
+
+from licences import is_acceptable_licence, normalize_licence
+from pipeline_log import reject
+from taxonomy import candidate_names, taxonomy_cache
+
+from .base import Provider, add_coordinates, register
+
+ALA_OCCURRENCE_API = 'https://biocache-ws.ala.org.au/ws/occurrences/search'
+
+# Image URL for an image ID listed in a download (what the search API returns as imageUrl)
+ALA_IMAGE_URL = 'https://images.ala.org.au/image/proxyImage?imageId={}'
+
+# Download CSV columns for each biocache search field, in order of preference.
+# Headers are compared ignoring case and punctuation, so both Darwin Core
+# names ("decimalLatitude") and display labels ("Latitude") are understood.
+DOWNLOAD_COLUMNS = {
+    'uuid': ['recordID', 'id', 'uuid', 'Record ID'],
+    'scientificName': ['scientificName', 'Scientific Name', 'Matched Scientific Name'],
+    'species': ['species', 'Species', 'Species - matched'],
+    'taxonConceptID': ['speciesID', 'taxonConceptID', 'Taxon Concept ID', 'Species ID'],
+    'stateProvince': ['stateProvince', 'State/Territory', 'State - parsed', 'cl22'],
+    'decimalLatitude': ['decimalLatitude', 'Latitude'],
+    'decimalLongitude': ['decimalLongitude', 'Longitude'],
+    'multimedia': ['multimedia', 'Multimedia'],
+    'image': ['images', 'imageIDs', 'imageID', 'Images'],
+    'imageUrl': ['associatedMedia', 'imageUrl', 'Associated Media'],
+    # The image's own licence matters more than the record's
+    'license': ['multimediaLicence', 'multimediaLicense', 'license', 'licence', 'License', 'dcterms:license'],
+    'creator': ['creator', 'multimediaCreator', 'recordedBy', 'Collector', 'Recorded by'],
+    'rightsHolder': ['rightsHolder', 'Rights Holder'],
+    'dataResourceName': ['dataResourceName', 'Data Resource Name', 'Data Resource'],
+}
+
+# Downloads list several images or media URLs in one field
+_MULTI_VALUE = re.compile(r'\s*[|;]\s*')
+
+
+def shape_occurrence(occ):
+    """
+    Turn one biocache occurrence into a photo record
+
+    Returns:
+        Photo dict matching our data format, or None if the occurrence has no
+        image or an unacceptable license
+    """
+    # Get image data
+    image_url = occ.get('imageUrl') or occ.get('image')
+    if not image_url:
+        return None
+
+    # Get license info
+    license_str = occ.get('license') or occ.get('licence')
+    if not is_acceptable_licence(license_str):
+        reject(f"licence: {license_str or 'missing'}")
+        return None
+
+    # Get attribution
+    attribution = occ.get('creator') or occ.get('rightsHolder') or 'Unknown'
+
+    # Build page URL
+    record_id = occ.get('uuid')
+    page_url = f"https://biocache.ala.org.au/occurrences/{record_id}" if record_id else None
+
+    photo = {
+        'url': image_url,
+        'pageUrl': page_url,
+        'source': 'Atlas of Living Australia',
+        'licence': normalize_licence(license_str),
+        'attribution': attribution,
+        'dataResource': occ.get('dataResourceName', 'Atlas of Living Australia'),
+        'recordId': record_id
+    }
+    return add_coordinates(photo, occ.get('decimalLatitude'), occ.get('decimalLongitude'))
+
+
+@register
+class AlaOccurrencesProvider(Provider):
+    name = 'ala_occurrences'
+    source = 'Atlas of Living Australia'
+    request_delay = 2.0
+
+    def __init__(self, state='Australian Capital Territory'):
+        """
+        Args:
+            state: Only return records from this state or territory
+                (regions.REGIONS 'state'); None for all of Australia
+        """
+        super().__init__()
+        self.state = state
+
+    async def search(self, species, limit):
+        # Build filter queries
+        filters = [
+            'multimedia:Image',
+            'geospatial_kosher:true',
+        ]
+        if self.state:
+            filters.append(f'state:"{self.state}"')
+
+        # A resolved taxon concept also matches records filed under synonyms
+        guid = taxonomy_cache.get(species['scientificName'], 'ala')
+        query = f'lsid:"{guid}"' if guid else f'scientificName:"{species["scientificName"]}"'
+
+        data = await self.fetch_json(ALA_OCCURRENCE_API, {
+            'q': query,
+            'fq': filters,
+            'pageSize': max(limit, self.candidate_pool),
+            'startIndex': 0,
+            'facets': 'license'
+        })
+        yielded = 0
+        for occ in (data or {}).get('occurrences', []):
+            photo = shape_occurrence(occ)
+            if photo:
+                yield photo
+                yielded += 1
+                if yielded >= limit:
+                    return
+
+
+def _column_key(header):
+    return re.sub(r'[^a-z0-9]', '', header.lower())
+
+
+@contextlib.contextmanager
+def _open_download(path):
+    """
+    Text stream over the occurrence CSV: the largest CSV inside a download
+    archive (read straight out of the zip), or a plain CSV file
+    """
+    if not zipfile.is_zipfile(path):
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            yield f
+        return
+    with zipfile.ZipFile(path) as archive:
+        members = [m for m in archive.infolist() if m.filename.lower().endswith('.csv')]
+        if not members:
+            raise ValueError(f"No CSV file in {path}")
+        member = max(members, key=lambda m: m.file_size)
+        with archive.open(member) as raw:
+            yield io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+
+
+def iter_download_occurrences(path):
+    """
+    Stream the records of an ALA occurrence download, one at a time
+
+    Args:
+        path: Download zip (or its extracted CSV)
+
+    Yields:
+        Occurrence dicts with the biocache search API's field names (see
+        DOWNLOAD_COLUMNS; empty when the record has no value), so
+        shape_occurrence() handles them unchanged; 'image' and 'imageUrl'
+        hold the record's first image
+    """
+    with _open_download(path) as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        positions = {_column_key(h): i for i, h in reversed(list(enumerate(header)))}
+        columns = {}
+        for field, names in DOWNLOAD_COLUMNS.items():
+            i = next((positions[_column_key(n)] for n in names if _column_key(n) in positions), None)
+            if i is not None:
+                columns[field] = i
+
+        for row in reader:
+            occ = {field: row[i] for field, i in columns.items() if i < len(row)}
+            if occ.get('imageUrl'):
+                occ['imageUrl'] = _MULTI_VALUE.split(occ['imageUrl'])[0]
+            elif occ.get('image'):
+                image_id = _MULTI_VALUE.split(occ['image'])[0]
+                occ['image'] = image_id
+                occ['imageUrl'] = image_id if image_id.startswith('http') else ALA_IMAGE_URL.format(image_id)
+            yield occ
+
+
+def download_photos(path, birds, per_species, state=None):
+    """
+    Harvest photos for many species from one ALA occurrence download
+
+    Records are matched to our species by taxon concept (the taxonomy cache's
+    ALA GUID), then by species, scientific name or its binomial against our
+    names and known aliases, so subspecies and synonyms count for the species.
+    Records without an image or with an unacceptable licence are skipped;
+    each species keeps its first per_species photos in file order.
+
+    Args:
+        path: Download zip (or its extracted CSV)
+        birds: Bird dicts (at least scientificName)
+        per_species: Photos wanted per species
+        state: Only use records from this state or territory (None for all)
+
+    Returns:
+        Dict mapping scientificName to a list of photo records
+    """
+    by_name = {}
+    by_guid = {}
+    for bird in birds:
+        name = bird['scientificName']
+        for candidate in candidate_names(name):
+            by_name.setdefault(' '.join(candidate.lower().split()), name)
+        guid = taxonomy_cache.get(name, 'ala')
+        if guid:
+            by_guid[guid] = name
+
+    photos = {bird['scientificName']: [] for bird in birds}
+    unfilled = set(photos)
+    records = 0
+    for occ in iter_download_occurrences(path):
+        records += 1
+        if records % 100000 == 0:
+            print(f"  {records} records read, {len(photos) - len(unfilled)} species complete")
+        if 'multimedia' in occ and 'image' not in occ['multimedia'].lower():
+            continue
+        if state and 'stateProvince' in occ and occ['stateProvince'] != state:
+            continue
+
+        name = by_guid.get(occ.get('taxonConceptID'))
+        if name is None:
+            for candidate in (occ.get('species'), occ.get('scientificName')):
+                words = (candidate or '').lower().split()
+                name = by_name.get(' '.join(words)) or by_name.get(' '.join(words[:2]))
+                if name:
+                    break
+        if name not in unfilled:
+            continue
+
+        photo = shape_occurrence(occ)
+        if photo and all(p['url'] != photo['url'] for p in photos[name]):
+            photos[name].append(photo)
+            if len(photos[name]) >= per_species:
+                unfilled.discard(name)
+                if not unfilled:
+                    break
+
+    print(f"  {records} records read: photos for {sum(1 for p in photos.values() if p)} of {len(photos)} species")
+    return photos
@@ -0,0 +1,348 @@
+"""
+Common provider interface
+
+A provider wraps one photo or audio source behind an async search(species, limit)
+generator that yields normalised media records:
+
+    {'url', 'pageUrl', 'source', 'licence', 'attribution'?, ...provider extras}
+
+HTTP calls are plain urllib run in a worker thread, so several providers can
+be queried concurrently without an async HTTP dependency. Every decoded
+response is written to a local cache so later stages (e.g. rank_media.py) can
+replay provider searches offline. Bulk crawls read their large pages with
+stream_json(), which yields records while the body is still downloading.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from json_stream import iter_items
+from pipeline_log import log_event, species_context
+
+USER_AGENT = 'Canberra Bird Game/1.0 (educational project)'
+
+# Registered provider classes, keyed by Provider.name
+PROVIDERS = {}
+
+RESPONSE_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  'cache', 'responses')
+
+# Cache modes: 'refresh' fetches and writes (default for harvests), 'prefer'
+# reads the cache first and fetches on a miss, 'offline' only reads the cache
+CACHE_MODES = ('refresh', 'prefer', 'offline')
+_cache_mode = 'refresh'
+
+# Query parameters that do not change the response (kept out of cache keys)
+_UNCACHED_PARAMS = {'key'}
+
+
+def register(cls):
+    """Class decorator adding a provider to the registry"""
+    PROVIDERS[cls.name] = cls
+    return cls
+
+
+def get_provider(name, **options):
+    """Instantiate a registered provider by name"""
+    if name not in PROVIDERS:
+        raise KeyError(f"Unknown provider '{name}' (available: {', '.join(sorted(PROVIDERS))})")
+    return PROVIDERS[name](**options)
+
+
+def set_cache_mode(mode):
+    """Choose how fetch_json uses the response cache (see CACHE_MODES)"""
+    global _cache_mode
+    if mode not in CACHE_MODES:
+        raise ValueError(f"Unknown cache mode '{mode}' (expected one of {', '.join(CACHE_MODES)})")
+    _cache_mode = mode
+
+
+def is_offline():
+    """True when fetch_json will only read the response cache"""
+    return _cache_mode == 'offline'
+
+
+def response_cache_path(url, params=None):
+    """Cache file for a request, ignoring parameters such as API keys"""
+    cache_params = {k: v for k, v in (params or {}).items() if k not in _UNCACHED_PARAMS}
+    key = f"{url}?{urllib.parse.urlencode(sorted(cache_params.items()), doseq=True)}"
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return os.path.join(RESPONSE_CACHE_DIR, digest[:2], f"{digest}.json")
+
+
+def _read_cache(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _write_cache(path, result):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def read_cached(url, params=None):
+    """
+    Cached response for a request if the cache mode allows reading it
+
+    Returns:
+        (hit, result): hit is True when the caller must not go to the network
+        (a cached response exists, or the cache is in offline mode)
+    """
+    if _cache_mode == 'refresh':
+        return False, None
+    cached = _read_cache(response_cache_path(url, params))
+    hit = cached is not None or _cache_mode == 'offline'
+    if hit:
+        log_event('request', host=urllib.parse.urlparse(url).netloc, cache='hit' if cached is not None else 'offline-miss',
+                  ok=cached is not None, latencyMs=0, bytes=0)
+    return hit, cached
+
+
+def fetch_json(url, params=None, timeout=30, user_agent=USER_AGENT):
+    """Fetch and decode a JSON document, returning None on any failure"""
+    hit, cached = read_cached(url, params)
+    if hit:
+        return cached
+
+    start = time.monotonic()
+    result, size, status = _fetch_json(url, params, timeout, user_agent)
+    log_event('request', host=urllib.parse.urlparse(url).netloc, cache='miss', ok=result is not None,
+              status=status, bytes=size,
+              latencyMs=round((time.monotonic() - start) * 1000, 1))
+    if result is not None:
+        _write_cache(response_cache_path(url, params), result)
+    return result
+
+
+def _fetch_json(url, params, timeout, user_agent):
+    """
+    Returns:
+        (result, bytes, status); result is None on failure
+    """
+    if params:
+        url = f"{url}?{urllib.parse.urlencode(params, doseq=True)}"
+
+    headers = {
+        'User-Agent': user_agent,
+        'Accept': 'application/json'
+    }
+    req = urllib.request.Request(url, headers=headers)
+
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            body = response.read()
+            return json.loads(body.decode('utf-8')), len(body), response.status
+    except urllib.error.HTTPError as e:
+        print(f"HTTP Error {e.code}: {e.reason} ({url})")
+        if e.code == 429:
+            print("Rate limited! Waiting 10 seconds...")
+            time.sleep(10)
+        return None, 0, e.code
+    except Exception as e:
+        print(f"Error fetching {url}: {e}")
+        return None, 0, None
+
+
+class _CacheTee:
+    """Response reader that copies every chunk into the cache file as it is read"""
+
+    def __init__(self, response, cache_file):
+        self.response = response
+        self.cache_file = cache_file
+        self.bytes = 0
+
+    def read(self, size):
+        chunk = self.response.read(size)
+        self.cache_file.write(chunk)
+        self.bytes += len(chunk)
+        return chunk
+
+
+def stream_json(url, path, params=None, header=None, timeout=60, user_agent=USER_AGENT):
+    """
+    Fetch a JSON document and yield the elements of the array at path one at a time
+
+    For large pages and bulk exports: the body is parsed as it arrives
+    (json_stream.iter_items) and copied to the response cache on the way, so
+    memory stays flat whatever the response size. The cache entry is the same
+    document fetch_json would write, and is only kept once the whole body has
+    been read; cached responses are replayed through the same parser.
+
+    Args:
+        path: Dotted path of the array ('recordings', 'results')
+        header: Optional dict receiving the document's other values ('numPages')
+
+    Yields:
+        Raw elements; nothing if the request fails
+    """
+    cache_path = response_cache_path(url, params)
+    host = urllib.parse.urlparse(url).netloc
+    if _cache_mode != 'refresh':
+        if os.path.exists(cache_path):
+            log_event('request', host=host, cache='hit', ok=True, latencyMs=0, bytes=0)
+            try:
+                with open(cache_path, 'rb') as f:
+                    yield from iter_items(f, path, header)
+            except ValueError as e:
+                print(f"Unreadable cached response for {url}: {e}")
+            return
+        if _cache_mode == 'offline':
+            log_event('request', host=host, cache='offline-miss', ok=False, latencyMs=0, bytes=0)
+            return
+
+    start = time.monotonic()
+    request_url = f"{url}?{urllib.parse.urlencode(params, doseq=True)}" if params else url
+    req = urllib.request.Request(request_url, headers={
+        'User-Agent': user_agent,
+        'Accept': 'application/json'
+    })
+
+    try:
+        response = urllib.request.urlopen(req, timeout=timeout)
+    except Exception as e:
+        status = None
+        if isinstance(e, urllib.error.HTTPError):
+            print(f"HTTP Error {e.code}: {e.reason} ({request_url})")
+            status = e.code
+            if e.code == 429:
+                print("Rate limited! Waiting 10 seconds...")
+                time.sleep(10)
+        else:
+            print(f"Error fetching {request_url}: {e}")
+        log_event('request', host=host, cache='miss', ok=False, status=status, bytes=0,
+                  latencyMs=round((time.monotonic() - start) * 1000, 1))
+        return
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.tmp"
+    complete = False
+    tee = None
+    try:
+        with response, open(tmp_path, 'wb') as cache_file:
+            tee = _CacheTee(response, cache_file)
+            yield from iter_items(tee, path, header)
+            complete = True
+    except (OSError, ValueError) as e:
+        print(f"Error reading {request_url}: {e}")
+    finally:
+        log_event('request', host=host, cache='miss', ok=complete, status=response.status,
+                  bytes=tee.bytes if tee else 0, latencyMs=round((time.monotonic() - start) * 1000, 1))
+        if complete:
+            os.replace(tmp_path, cache_path)
+        elif os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def add_coordinates(record, lat, lng):
+    """Attach lat/lng to a record when the source supplied usable coordinates"""
+    try:
+        lat, lng = float(lat), float(lng)
+    except (TypeError, ValueError):
+        return record
+    if -90 <= lat <= 90 and -180 <= lng <= 180:
+        record['lat'] = round(lat, 5)
+        record['lng'] = round(lng, 5)
+    return record
+
+
+class Provider:
+    """
+    Base class for media providers
+
+    Subclasses set name, source, media_type and request_delay, and implement
+    search() as an async generator.
+    """
+
+    name = ''
+    source = ''
+    media_type = 'photo'
+
+    # Minimum seconds between requests to this provider
+    request_delay = 0.0
+
+    # Records requested from the source per search, whatever the caller's limit,
+    # so the cached response holds the full candidate pool for re-ranking
+    candidate_pool = 20
+
+    def __init__(self):
+        self._lock = None
+        self._lock_loop = None
+        self._last_request = 0.0
+
+    async def fetch_json(self, url, params=None):
+        """Rate-limited fetch that never blocks the event loop"""
+        # Cache hits skip the rate limit entirely
+        hit, cached = read_cached(url, params)
+        if hit:
+            return cached
+
+        # One lock per event loop, so search_sync() can reuse a provider
+        loop = asyncio.get_running_loop()
+        if self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        async with self._lock:
+            wait = self._last_request + self.request_delay - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                return await asyncio.to_thread(fetch_json, url, params)
+            finally:
+                self._last_request = time.monotonic()
+
+    async def search(self, species, limit):
+        """
+        Yield up to limit normalised media records for a species
+
+        Args:
+            species: Bird dict (at least scientificName and commonName)
+            limit: Maximum records to yield
+        """
+        raise NotImplementedError
+        yield
+
+
+async def logged_search(provider, species, limit):
+    """
+    provider.search() followed by a "search" event (duration, records yielded,
+    whether it was cancelled); callers wrap it in species_context() so the
+    provider's requests and rejections are tagged too
+    """
+    start = time.monotonic()
+    yielded = 0
+    cancelled = False
+    try:
+        async for record in provider.search(species, limit):
+            yielded += 1
+            yield record
+    except (asyncio.CancelledError, GeneratorExit):
+        cancelled = True
+        raise
+    finally:
+        log_event('search', species=species['scientificName'], provider=provider.name, yielded=yielded,
+                  cancelled=cancelled, durationMs=round((time.monotonic() - start) * 1000, 1))
+
+
+async def search_async(provider, species, limit):
+    """Run one provider search to completion, returning records with stable "id"s"""
+    from media_ids import with_id
+
+    with species_context(species['scientificName'], provider.name):
+        return [with_id(record) async for record in logged_search(provider, species, limit)]
+
+
+def search_sync(provider, species, limit):
+    """Run one provider search to completion from synchronous code"""
+    return asyncio.run(search_async(provider, species, limit))
@@ -0,0 +1,209 @@
+"""
+iNaturalist photo provider (research-grade observations)
+"""
+
+import time
+
+from licences import is_acceptable_licence, normalize_licence
+from pipeline_log import reject
+from taxonomy import candidate_names, match_inaturalist, taxonomy_cache
+
+from .base import Provider, add_coordinates, register, stream_json
+
+INAT_TAXA_URL = 'https://api.inaturalist.org/v1/taxa'
+INAT_OBSERVATIONS_URL = 'https://api.inaturalist.org/v1/observations'
+
+# iNaturalist license codes ("cc-by-nc") always refer to the 4.0 licences
+INAT_LICENCE_VERSION = '4.0'
+
+# Bulk mode: many taxa per observations request, paged with an id_above cursor
+BULK_PAGE_SIZE = 200
+BULK_TAXA_PER_REQUEST = 50
+
+# Rough bounding box around the ACT (same box as the Xeno-canto bulk crawl)
+ACT_BOUNDS = {'swlat': -35.93, 'swlng': 148.76, 'nelat': -35.12, 'nelng': 149.40}
+
+# iNaturalist place ID for Australia, for taxa with too few ACT photos
+AUSTRALIA_PLACE_ID = 6744
+
+
+def shape_observation(obs):
+    """
+    Turn one iNaturalist observation into a photo record (first acceptable photo only)
+
+    Returns:
+        Photo dict, or None if the observation has no acceptably licensed photo
+    """
+    for photo in obs.get('photos', []):
+        license_code = photo.get('license_code') or ''
+        if not is_acceptable_licence(license_code):
+            reject(f"licence: {license_code or 'missing'}")
+            continue
+
+        photo_entry = {
+            'url': photo.get('url', '').replace('square', 'large'),
+            'pageUrl': f"https://www.inaturalist.org/observations/{obs.get('id')}",
+            'source': 'iNaturalist',
+            'licence': normalize_licence(license_code, INAT_LICENCE_VERSION)
+        }
+
+        attribution = photo.get('attribution', '')
+        if attribution:
+            photo_entry['attribution'] = attribution
+
+        if obs.get('location'):
+            add_coordinates(photo_entry, *obs['location'].split(',')[:2])
+
+        if photo_entry['url']:
+            return photo_entry  # One photo per observation
+    return None
+
+
+async def resolve_inaturalist_taxon(provider, scientific_name):
+    """
+    iNaturalist taxon ID for a species, from the taxonomy cache or an exact-name taxa search
+
+    Tries our name and then each alias; the first exact match is cached.
+    """
+    taxon_id = taxonomy_cache.get(scientific_name, 'inaturalist')
+    if taxon_id:
+        return taxon_id
+    for name in candidate_names(scientific_name):
+        result = await provider.fetch_json(INAT_TAXA_URL, {
+            'q': name,
+            'rank': 'species',
+        })
+        match = match_inaturalist(name, (result or {}).get('results') or [])
+        if match:
+            taxonomy_cache.set(scientific_name, 'inaturalist', *match)
+            return match[0]
+    return None
+
+
+@register
+class INaturalistProvider(Provider):
+    name = 'inaturalist'
+    source = 'iNaturalist'
+    request_delay = 1.0
+
+    def __init__(self, prefetched=None):
+        """
+        Args:
+            prefetched: Optional dict from bulk_observation_photos() mapping
+                scientificName to photo records; species in it are served
+                without any requests
+        """
+        super().__init__()
+        self.prefetched = prefetched or {}
+
+    async def search(self, species, limit):
+        if self.prefetched.get(species['scientificName']):
+            for photo in self.prefetched[species['scientificName']][:limit]:
+                yield photo
+            return
+
+        taxon_id = await resolve_inaturalist_taxon(self, species['scientificName'])
+        if not taxon_id:
+            return
+
+        # Get observations with photos
+        obs_result = await self.fetch_json(INAT_OBSERVATIONS_URL, {
+            'taxon_id': taxon_id,
+            'photos': 'true',
+            'quality_grade': 'research',
+            'per_page': max(limit, self.candidate_pool),
+        })
+        yielded = 0
+        for obs in (obs_result or {}).get('results', []):
+            photo = shape_observation(obs)
+            if photo:
+                yield photo
+                yielded += 1
+                if yielded >= limit:
+                    return
+
+
+def iter_bulk_observations(taxon_ids, area, wanted, request_delay=1.0):
+    """
+    Page through research-grade photo observations of many taxa at once
+
+    Taxa are queried BULK_TAXA_PER_REQUEST at a time as a comma-separated
+    taxon_id list, in ascending ID order with an id_above cursor (stable while
+    new observations are uploaded). A taxon is dropped from the list once
+    wanted(taxon_id) returns False, so common species stop costing requests.
+
+    Args:
+        taxon_ids: iNaturalist taxon IDs (species level; subspecies observations match)
+        area: Extra query parameters restricting the area (ACT_BOUNDS or a place_id)
+        wanted: Callable telling whether a taxon still needs observations
+        request_delay: Seconds between requests (iNaturalist asks for ~1/s)
+
+    Yields:
+        Raw observation dicts, streamed as each page downloads
+    """
+    taxon_ids = list(dict.fromkeys(taxon_ids))
+    requests = 0
+    for start in range(0, len(taxon_ids), BULK_TAXA_PER_REQUEST):
+        batch = taxon_ids[start:start + BULK_TAXA_PER_REQUEST]
+        id_above = 0
+        while True:
+            batch = [t for t in batch if wanted(t)]
+            if not batch:
+                break
+            if requests:
+                time.sleep(request_delay)
+            observations = 0
+            last_id = id_above
+            for obs in stream_json(INAT_OBSERVATIONS_URL, 'results', dict(area, **{
+                'taxon_id': ','.join(str(t) for t in batch),
+                'photos': 'true',
+                'quality_grade': 'research',
+                'order_by': 'id',
+                'order': 'asc',
+                'id_above': id_above,
+                'per_page': BULK_PAGE_SIZE,
+            })):
+                observations += 1
+                last_id = obs['id']
+                yield obs
+            requests += 1
+            print(f"  {len(batch)} taxa after id {id_above}: {observations} observations")
+            if observations < BULK_PAGE_SIZE:
+                break
+            id_above = last_id
+
+
+def bulk_observation_photos(taxa, per_species, request_delay=1.0, local_area=ACT_BOUNDS):
+    """
+    Harvest photos for many species with batched observation queries
+
+    local_area (the ACT box by default) is crawled first; species still short
+    of per_species photos are topped up from the rest of Australia.
+
+    Args:
+        taxa: Dict mapping scientificName to iNaturalist taxon ID
+        per_species: Photos wanted per species
+        local_area: Observation query parameters for the area to prefer
+
+    Returns:
+        Dict mapping scientificName to a list of photo records
+    """
+    species_by_taxon = {taxon_id: name for name, taxon_id in taxa.items() if taxon_id}
+    photos = {name: [] for name in taxa}
+
+    def wanted(taxon_id):
+        return len(photos[species_by_taxon[taxon_id]]) < per_species
+
+    for area in (local_area, {'place_id': AUSTRALIA_PLACE_ID}):
+        for obs in iter_bulk_observations(species_by_taxon, area, wanted, request_delay):
+            # Distribute locally: the observation's taxon or its species ancestor
+            taxon = obs.get('taxon') or {}
+            lineage = [taxon.get('id')] + list(reversed(taxon.get('ancestor_ids') or []))
+            taxon_id = next((t for t in lineage if t in species_by_taxon), None)
+            if taxon_id is None or not wanted(taxon_id):
+                continue
+            photo = shape_observation(obs)
+            if photo and all(p['url'] != photo['url'] for p in photos[species_by_taxon[taxon_id]]):
+                photos[species_by_taxon[taxon_id]].append(photo)
+
+    return photos
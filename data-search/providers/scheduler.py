@@ -0,0 +1,121 @@
+"""
+Concurrent provider scheduler
+
+All providers for a species are queried at once, but the quota is filled in
+provider order of preference, so the records kept never depend on which
+provider answered first. As soon as the more preferred providers have
+finished with enough records between them, the outstanding provider calls are
+cancelled, so per-species latency is the slowest provider actually needed
+rather than the sum of all.
+"""
+
+import asyncio
+import time
+
+from harvest import harvest_async, species_label
+from media_ids import with_id
+from pipeline_log import log_event, reject, species_context
+
+from .base import logged_search
+
+_DONE = object()
+
+
+async def gather_species_media(species, providers, quota, per_provider_limit=None):
+    """
+    Collect up to quota unique media records for one species
+
+    Args:
+        species: Bird dict
+        providers: Provider instances, in order of preference
+        quota: Number of records wanted
+        per_provider_limit: Records requested from each provider (default: quota)
+
+    Returns:
+        List of records with stable "id"s, deduplicated by id and URL and
+        ordered by provider preference
+    """
+    limit = per_provider_limit or quota
+    queue = asyncio.Queue()
+    buffers = [[] for _ in providers]
+    finished = [False] * len(providers)
+
+    async def drain(rank, provider):
+        try:
+            with species_context(species['scientificName'], provider.name):
+                async for record in logged_search(provider, species, limit):
+                    await queue.put((rank, record))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"  {provider.name} failed for {species['scientificName']}: {e}")
+        finally:
+            queue.put_nowait((rank, _DONE))
+
+    def select(log=False):
+        """
+        Records so far in provider order, deduplicated, and whether they are
+        final: the quota is reached, or every provider ahead of the gap has finished
+        """
+        seen = set()
+        chosen = []
+        for rank, records in enumerate(buffers):
+            for record in records:
+                if record['id'] in seen or record['url'] in seen:
+                    if log:
+                        reject('duplicate', species=species['scientificName'], provider=providers[rank].name)
+                    continue
+                seen.update((record['id'], record['url']))
+                chosen.append((rank, record))
+                if len(chosen) == quota:
+                    return chosen, True
+            if not finished[rank]:
+                return chosen, False
+        return chosen, True
+
+    start = time.monotonic()
+    tasks = [asyncio.create_task(drain(rank, p)) for rank, p in enumerate(providers)]
+
+    try:
+        complete = not tasks
+        while not complete:
+            rank, record = await queue.get()
+            if record is _DONE:
+                finished[rank] = True
+            elif record.get('url'):
+                buffers[rank].append(with_id(record))
+            complete = select()[1]
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    collected = select(log=True)[0]
+    accepted = {}
+    for rank, _ in collected:
+        accepted[providers[rank].name] = accepted.get(providers[rank].name, 0) + 1
+    log_event('species', species=species['scientificName'], accepted=accepted,
+              durationMs=round((time.monotonic() - start) * 1000, 1))
+
+    return [record for _, record in collected]
+
+
+async def gather_all(species_list, providers, quota, per_provider_limit=None, on_result=None, workers=1):
+    """
+    Run gather_species_media for every species on the harvest executor
+
+    Providers keep their own rate limits, shared by every worker, so extra
+    workers overlap one species' slow provider with other species' requests
+    rather than raising any source's request rate.
+
+    Args:
+        on_result: Optional callback(index, species, records), called in species order
+        workers: Species processed at once
+
+    Returns:
+        (results, interrupted): record lists in species order, None for
+        species not harvested because of a Ctrl-C (see harvest.run_harvest)
+    """
+    return await harvest_async(species_list,
+                               lambda species: gather_species_media(species, providers, quota, per_provider_limit),
+                               workers, describe=species_label, on_result=on_result)
@@ -0,0 +1,68 @@
+"""
+Wikimedia Commons photo provider
+"""
+
+import re
+
+from licences import is_acceptable_licence, parse_licence
+from pipeline_log import reject
+
+from .base import Provider, add_coordinates, register
+
+COMMONS_API_URL = 'https://commons.wikimedia.org/w/api.php'
+
+
+@register
+class WikimediaProvider(Provider):
+    name = 'wikimedia'
+    source = 'Wikimedia Commons'
+    request_delay = 0.1
+
+    async def search(self, species, limit):
+        params = {
+            'action': 'query',
+            'generator': 'search',
+            'gsrnamespace': 6,
+            'gsrsearch': species['scientificName'],
+            'gsrlimit': max(limit, self.candidate_pool),
+            'prop': 'imageinfo',
+            'iiprop': 'url|extmetadata',
+            'format': 'json',
+        }
+        result = await self.fetch_json(COMMONS_API_URL, params)
+        if not result:
+            return
+
+        # Keep search rank order (the pages dict is keyed by page id)
+        pages = sorted(result.get('query', {}).get('pages', {}).values(), key=lambda p: p.get('index', 0))
+        yielded = 0
+        for page in pages:
+            for info in page.get('imageinfo', []):
+                meta = info.get('extmetadata', {})
+                license_name = meta.get('LicenseShortName', {}).get('value', '')
+                artist = meta.get('Artist', {}).get('value', '')
+
+                # Clean up artist HTML
+                artist = re.sub('<[^>]+>', '', artist).strip()
+
+                # Only include acceptable licenses (no ND - No Derivatives)
+                if not is_acceptable_licence(license_name):
+                    reject(f"licence: {license_name or 'missing'}")
+                    continue
+
+                photo = {
+                    'url': info.get('url', ''),
+                    'pageUrl': info.get('descriptionurl', ''),
+                    'source': self.source,
+                    'licence': license_name
+                }
+                if artist and parse_licence(license_name).family == 'cc-by':
+                    photo['attribution'] = artist
+
+                add_coordinates(photo, meta.get('GPSLatitude', {}).get('value'),
+                                meta.get('GPSLongitude', {}).get('value'))
+
+                yield photo
+                yielded += 1
+                if yielded >= limit:
+                    return
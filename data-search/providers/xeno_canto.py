@@ -0,0 +1,193 @@
+"""
+Xeno-canto audio provider (API v3)
+"""
+
+import os
+import time
+
+from licences import is_acceptable_licence, normalize_licence, parse_licence
+from pipeline_log import reject
+
+from .base import Provider, add_coordinates, is_offline, register, stream_json
+
+XENO_CANTO_API_URL = 'https://xeno-canto.org/api/3/recordings'
+
+# Bulk mode: one paginated crawl of every acceptable bird recording in Australia
+BULK_QUERY = 'grp:birds cnt:"Australia" q:">D"'
+BULK_PAGE_SIZE = 500
+
+# Rough bounding box around the ACT (lat_min, lon_min, lat_max, lon_max)
+ACT_BOX = 'box:-35.93,148.76,-35.12,149.40'
+
+# Quality grades, best first; D and E are never used
+QUALITY_SCORES = {'A': 5, 'B': 4, 'C': 3, 'D': 2, 'E': 1}
+REJECTED_QUALITIES = ['D', 'E']
+
+
+def quality_score(rec):
+    """Sort key for Xeno-canto quality grades (A > B > C > D > E)"""
+    return QUALITY_SCORES.get(rec.get('q', 'E'), 0)
+
+
+def species_key(name):
+    """Index key for a binomial: 'Malurus cyaneus' -> 'malurus cyaneus'"""
+    return ' '.join(name.lower().split()[:2])
+
+
+def shape_recording(rec):
+    """
+    Turn one Xeno-canto API recording into an audio record
+
+    Returns:
+        Audio dict matching our data format, or None if the recording's
+        license or quality is unacceptable
+    """
+    license_url = rec.get('lic', '')
+    if not is_acceptable_licence(license_url):
+        reject(f"licence: {license_url or 'missing'}")
+        return None
+
+    quality = rec.get('q', 'no score')
+    if quality in REJECTED_QUALITIES:
+        reject(f"quality: {quality}")
+        return None
+
+    recording_id = rec.get('id', '')
+
+    # The 'file' field from API already contains full URL
+    file_field = rec.get('file', '')
+    if file_field.startswith('http://') or file_field.startswith('https://'):
+        audio_url = file_field
+    else:
+        audio_url = f"https://xeno-canto.org/{file_field}"
+
+    audio_entry = {
+        'url': audio_url,
+        'pageUrl': f"https://xeno-canto.org/{recording_id}",
+        'source': 'Xeno-canto',
+        'licence': normalize_licence(license_url),
+        'quality': quality,
+        'type': rec.get('type', 'unknown'),
+        'length': rec.get('length', 'unknown'),
+        'recordingId': recording_id
+    }
+
+    # Add attribution (recordist name)
+    recordist = rec.get('rec', '')
+    if recordist and parse_licence(license_url).family == 'cc-by':
+        audio_entry['attribution'] = recordist
+
+    # v3 returns 'lon'; older responses used 'lng'
+    add_coordinates(audio_entry, rec.get('lat'), rec.get('lon', rec.get('lng')))
+
+    # Add optional description from remarks if useful
+    remarks = rec.get('rmk', '').strip()
+    if remarks and len(remarks) < 200:  # Only short remarks
+        audio_entry['description'] = remarks
+
+    return audio_entry
+
+
+@register
+class XenoCantoProvider(Provider):
+    name = 'xeno_canto'
+    source = 'Xeno-canto'
+    media_type = 'audio'
+
+    # Recommended: ~1 request per second
+    request_delay = 1.0
+
+    # One API page; the query URL does not depend on the limit
+    candidate_pool = 100
+
+    def __init__(self, api_key=None):
+        super().__init__()
+        self.api_key = api_key if api_key is not None else os.environ.get('XENO_CANTO_API_KEY', '')
+
+    async def search(self, species, limit):
+        if not self.api_key and not is_offline():
+            print("ERROR: XENO_CANTO_API_KEY environment variable not set!")
+            print("Get your API key from: https://xeno-canto.org/account")
+            return
+
+        # Use quoted scientific name for exact match
+        result = await self.fetch_json(XENO_CANTO_API_URL, {
+            'query': f'sp:"{species["scientificName"]}"',
+            'key': self.api_key
+        })
+        if not result:
+            return
+        if 'error' in result:
+            print(f"  API Error: {result.get('message', 'Unknown error')}")
+            return
+
+        # Best quality first
+        for audio_entry in best_recordings(result.get('recordings', []), limit):
+            yield audio_entry
+
+
+def iter_bulk_recordings(api_key, query=BULK_QUERY, request_delay=1.0, max_pages=None):
+    """
+    Page through every recording matching a Xeno-canto query
+
+    Args:
+        api_key: Xeno-canto API key
+        query: Xeno-canto v3 query (tags such as cnt:, area:, box:, q:)
+        request_delay: Seconds between page requests
+        max_pages: Stop after this many pages (None for all)
+
+    Yields:
+        Raw recording dicts from the API, streamed (constant memory per page)
+    """
+    page = 1
+    num_pages = 1
+    while page <= num_pages and (max_pages is None or page <= max_pages):
+        # Recordings are yielded while the page downloads; numPages fills in on the way
+        header = {}
+        count = 0
+        for rec in stream_json(XENO_CANTO_API_URL, 'recordings', {
+            'query': query,
+            'key': api_key,
+            'per_page': BULK_PAGE_SIZE,
+            'page': page
+        }, header):
+            count += 1
+            yield rec
+        if 'error' in header:
+            print(f"  API Error: {header.get('message', 'Unknown error')}")
+            return
+        if 'numPages' not in header:
+            return
+
+        num_pages = int(header['numPages'])
+        print(f"  Page {page}/{num_pages}: {count} recordings")
+
+        page += 1
+        if page <= num_pages:
+            time.sleep(request_delay)
+
+
+def index_recordings(recordings):
+    """
+    Group raw recordings by species
+
+    Returns:
+        Dict mapping species_key('Genus species') to a list of raw recordings
+    """
+    index = {}
+    for rec in recordings:
+        if rec.get('gen') and rec.get('sp'):
+            index.setdefault(species_key(f"{rec['gen']} {rec['sp']}"), []).append(rec)
+    return index
+
+
+def best_recordings(recordings, limit):
+    """Shape the best (highest quality, acceptably licensed) recordings from a list"""
+    audio = []
+    for rec in sorted(recordings, key=quality_score, reverse=True):
+        audio_entry = shape_recording(rec)
+        if audio_entry:
+            audio.append(audio_entry)
+            if len(audio) >= limit:
+                break
+    return audio
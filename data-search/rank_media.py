@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Media Ranking Script
+Re-ranks photo and audio candidates for every species by distance to the
+region's origin (regions.py), source quality and (for audio) song/call type,
+using only cached provider responses, so re-ranking never touches the network
+
+By default only the entries already in the dataset are reordered. With
+--add-candidates, better cached candidates may take their place; those are
+marked needsReview (prescreen_photos.py puts them at the front of the review
+queue). Media removed by review (merge_review.py) is never brought back.
+"""
+
+import argparse
+import json
+
+import numpy as np
+
+from media_ids import media_id
+from merge_review import load_rejected
+from providers import get_provider, search_sync
+from providers.base import set_cache_mode
+from regions import DEFAULT_REGION, REGIONS, get_region
+from search_photos import PHOTO_PROVIDERS, PHOTOS_PER_SPECIES
+
+AUDIO_PROVIDERS = ['xeno_canto']
+AUDIO_PER_SPECIES = 5
+
+EARTH_RADIUS_KM = 6371.0
+
+# Proximity decays as exp(-distance / scale): ~0.7 at 100 km, ~0.2 at 500 km
+DISTANCE_SCALE_KM = 300.0
+
+# Proximity assumed for candidates without coordinates (and for every
+# candidate in a region without an origin)
+UNKNOWN_PROXIMITY = 0.2
+
+WEIGHTS = {
+    'quality': 0.5,
+    'proximity': 0.35,
+    'type': 0.15,
+}
+
+QUALITY_SCORES = {'A': 1.0, 'B': 0.75, 'C': 0.5, 'D': 0.25, 'E': 0.0}
+
+
+def haversine_km(lat, lng, origin):
+    """Great-circle distance from origin to each (lat, lng), in km (vectorised)"""
+    lat1, lng1 = np.radians(origin[0]), np.radians(origin[1])
+    lat2, lng2 = np.radians(lat), np.radians(lng)
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def type_score(media_type):
+    """Prefer songs over calls over anything else (alarm, flight, wing noise...)"""
+    media_type = (media_type or '').lower()
+    if 'song' in media_type:
+        return 1.0
+    if 'call' in media_type:
+        return 0.7
+    return 0.4
+
+
+def source_rank_quality(candidates):
+    """
+    1.0 for each source's first candidate down towards 0 for its last, so every
+    provider's best result scores the same whatever order providers are listed in
+    """
+    quality = np.zeros(len(candidates))
+    by_source = {}
+    for i, c in enumerate(candidates):
+        by_source.setdefault(c.get('source'), []).append(i)
+    for indices in by_source.values():
+        quality[indices] = 1.0 - np.arange(len(indices)) / len(indices)
+    return quality
+
+
+def score_candidates(candidates, origin):
+    """
+    Score every candidate for one species
+
+    Audio candidates are scored on Xeno-canto quality grade; photos have no
+    grade, so their quality is their rank within their own provider's results
+    (candidates are in provider order within each source).
+
+    Args:
+        origin: (lat, lng) distances are measured from, or None to ignore distance
+
+    Returns:
+        NumPy array of scores (higher is better), aligned with candidates
+    """
+    count = len(candidates)
+    if count == 0:
+        return np.zeros(0)
+
+    if origin is None:
+        proximity = np.full(count, UNKNOWN_PROXIMITY)
+    else:
+        lat = np.array([c.get('lat', np.nan) for c in candidates], dtype=float)
+        lng = np.array([c.get('lng', np.nan) for c in candidates], dtype=float)
+        distance = haversine_km(lat, lng, origin)
+        proximity = np.where(np.isnan(distance), UNKNOWN_PROXIMITY, np.exp(-distance / DISTANCE_SCALE_KM))
+
+    if any('quality' in c for c in candidates):
+        quality = np.array([QUALITY_SCORES.get(c.get('quality'), 0.5) for c in candidates])
+        types = np.array([type_score(c.get('type')) for c in candidates])
+    else:
+        quality = source_rank_quality(candidates)
+        types = np.zeros(count)
+
+    return (WEIGHTS['quality'] * quality
+            + WEIGHTS['proximity'] * proximity
+            + WEIGHTS['type'] * types)
+
+
+def rank_candidates(candidates, limit, origin):
+    """Return the best limit candidates, highest score first"""
+    scores = score_candidates(candidates, origin)
+    # Stable sort keeps provider order between equal scores
+    order = np.argsort(-scores, kind='stable')
+    return [candidates[i] for i in order[:limit]]
+
+
+def media_key(entry):
+    """Entries are matched on their stable media ID (photo URLs get rewritten to thumbnails)"""
+    return entry.get('id') or media_id(entry)
+
+
+def cached_candidates(bird, providers, existing, rejected=frozenset(), add_new=False):
+    """
+    Candidates for a species: current entries, in cached provider result order
+
+    Candidates follow each provider's own result order; current entries that
+    are no longer in any cached response come last. Current entries win over
+    cached duplicates, so fields added by later stages (metadata, rewritten
+    URLs) are kept.
+
+    Args:
+        rejected: Media IDs removed by review, never returned
+        add_new: Also return cached results not in the dataset, marked needsReview
+    """
+    current = {media_key(e): e for e in existing if media_key(e) not in rejected}
+    candidates = []
+    seen = set()
+    for provider in providers:
+        for record in search_sync(provider, bird, provider.candidate_pool):
+            key = media_key(record)
+            if key in seen or key in rejected:
+                continue
+            seen.add(key)
+            entry = current.get(key)
+            if entry is None:
+                if add_new:
+                    candidates.append({**record, 'needsReview': True})
+                continue
+            # Fill in coordinates the current entry was harvested without
+            if 'lat' in record and 'lat' not in entry:
+                entry['lat'], entry['lng'] = record['lat'], record['lng']
+            candidates.append(entry)
+    candidates.extend(e for key, e in current.items() if key not in seen)
+    return candidates
+
+
+def rank_dataset(data, media, origin, rejected=None, add_new=False):
+    """
+    Re-rank one media list ('photos' or 'audio') for every bird in place
+
+    Args:
+        rejected: scientificName -> media IDs removed by review (merge_review.py)
+        add_new: Let cached candidates not in the dataset replace current entries
+
+    Returns:
+        Number of species whose selection changed
+    """
+    provider_names, per_species = ((PHOTO_PROVIDERS, PHOTOS_PER_SPECIES) if media == 'photos'
+                                   else (AUDIO_PROVIDERS, AUDIO_PER_SPECIES))
+    providers = [get_provider(name) for name in provider_names]
+
+    rejected = rejected or {}
+    changed = 0
+    for bird in data.get('birds', []):
+        existing = bird.get(media, [])
+        candidates = cached_candidates(bird, providers, existing,
+                                       rejected.get(bird['scientificName'], frozenset()), add_new)
+        ranked = rank_candidates(candidates, per_species, origin)
+        if [media_key(e) for e in ranked] != [media_key(e) for e in existing]:
+            changed += 1
+        bird[media] = ranked
+    return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-rank media by distance to the region's origin, quality and type")
+    parser.add_argument('bird_data', nargs='?',
+                        help="Bird data JSON file to update in place (default: the region's dataset)")
+    parser.add_argument('--region', default=DEFAULT_REGION, choices=REGIONS,
+                        help='Region whose origin distances are measured from (see regions.py)')
+    parser.add_argument('--media', choices=['photos', 'audio', 'both'], default='both',
+                        help='Which media lists to re-rank')
+    parser.add_argument('--add-candidates', action='store_true',
+                        help='Let cached candidates not in the dataset replace current entries '
+                             '(marked needsReview for the photo review tool)')
+    args = parser.parse_args()
+    region = get_region(args.region)
+    bird_data = args.bird_data or region['datasetPath']
+
+    # Replay cached responses only - never touch the network
+    set_cache_mode('offline')
+
+    print(f"Loading bird data from {bird_data}...")
+    with open(bird_data, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    rejected = load_rejected()
+    for media in (['photos', 'audio'] if args.media == 'both' else [args.media]):
+        changed = rank_dataset(data, media, region['origin'], rejected, args.add_candidates)
+        print(f"Re-ranked {media}: selection changed for {changed} species")
+        if args.add_candidates:
+            added = sum(1 for bird in data.get('birds', []) for e in bird.get(media, []) if e.get('needsReview'))
+            print(f"  {added} {media} awaiting review")
+
+    print(f"Writing updated data to {bird_data}...")
+    with open(bird_data, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+    print("Done!")
+
+
+if __name__ == '__main__':
+    main()
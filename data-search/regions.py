@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Regional Editions
+One shared species media store feeds a dataset per region, so a species
+harvested for one edition is never harvested again for another
+
+    data/species_media.json         scientificName -> {photos, audio}, every region's media
+    data/checklists/<region>.json   the region's checklist: header and species
+                                    fields (status, rarity...) with empty media lists
+    data/<region>_birds.json        the region's dataset: checklist + media projected
+                                    from the store (data/act_birds.json for the ACT)
+
+A projection keeps each species' store order (rank_media.py's ranking) but
+moves media recorded inside the region first, then takes up to
+PHOTOS_PER_SPECIES photos and AUDIO_PER_SPECIES recordings.
+
+Adding a region:
+    1. Write data/checklists/<region>.json (same layout as the ACT checklist)
+    2. python regions.py --build <region>          project what the store already has
+    3. python coverage_report.py ../data/<region>_birds.json
+       python search_photos.py --region <region> --plan harvest_plan.json
+                                                   harvest only the gaps
+    4. python regions.py --import ../data/<region>_birds.json --region <region>
+       python regions.py --all                     share the new media with every region
+
+Usage:
+    python regions.py --list
+    python regions.py --import ../data/act_birds.json --region act
+    python regions.py --build act nsw
+"""
+
+import argparse
+import copy
+import json
+import os
+
+from media_ids import media_id
+from merge_review import update_photo_statistics
+
+DATA_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data'))
+STORE_FILE = os.path.join(DATA_DIR, 'species_media.json')
+CHECKLIST_DIR = os.path.join(DATA_DIR, 'checklists')
+
+MEDIA_LISTS = ('photos', 'audio')
+
+PHOTOS_PER_SPECIES = 5
+AUDIO_PER_SPECIES = 5
+
+DEFAULT_REGION = 'act'
+
+# bounds: (south, west, north, east); state: ALA stateProvince, None for national;
+# origin: (lat, lng) where players are, for distance ranking (rank_media.py), None
+# when distance should not count
+REGIONS = {
+    'act': {
+        'name': 'Australian Capital Territory',
+        'state': 'Australian Capital Territory',
+        'bounds': (-35.93, 148.76, -35.12, 149.40),
+        'origin': (-35.2809, 149.1300),  # Canberra city centre
+        'dataset': 'act_birds.json',
+    },
+    'nsw': {
+        'name': 'New South Wales',
+        'state': 'New South Wales',
+        'bounds': (-37.51, 140.99, -28.15, 153.64),
+        'origin': (-33.8688, 151.2093),  # Sydney
+        'dataset': 'nsw_birds.json',
+    },
+    'vic': {
+        'name': 'Victoria',
+        'state': 'Victoria',
+        'bounds': (-39.20, 140.96, -33.98, 149.98),
+        'origin': (-37.8136, 144.9631),  # Melbourne
+        'dataset': 'vic_birds.json',
+    },
+    'australia': {
+        'name': 'Australia',
+        'state': None,
+        'bounds': (-43.74, 112.92, -9.14, 153.64),
+        'origin': None,
+        'dataset': 'australia_birds.json',
+    },
+}
+
+
+def get_region(key):
+    """Region config by key, with its file paths filled in"""
+    if key not in REGIONS:
+        raise SystemExit(f"Unknown region '{key}' (known: {', '.join(REGIONS)})")
+    return {
+        'key': key,
+        **REGIONS[key],
+        'datasetPath': os.path.join(DATA_DIR, REGIONS[key]['dataset']),
+        'checklistPath': os.path.join(CHECKLIST_DIR, f'{key}.json'),
+    }
+
+
+def inaturalist_bounds(region):
+    """iNaturalist observation query parameters for the region's bounding box"""
+    south, west, north, east = region['bounds']
+    return {'swlat': south, 'swlng': west, 'nelat': north, 'nelng': east}
+
+
+def xeno_canto_box(region):
+    """Xeno-canto box: search tag for the region's bounding box"""
+    return 'box:{},{},{},{}'.format(*region['bounds'])
+
+
+def in_region(entry, region):
+    """True if a media entry's coordinates fall inside the region's bounding box"""
+    if 'lat' not in entry or 'lng' not in entry:
+        return False
+    south, west, north, east = region['bounds']
+    return south <= entry['lat'] <= north and west <= entry['lng'] <= east
+
+
+def load_json(path, default=None):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        if default is None:
+            raise
+        return default
+
+
+def save_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def merge_into_store(store, birds):
+    """
+    Add every species' media to the store
+
+    The dataset's media goes first, in the dataset's order, so ranking and
+    review done on a regional dataset carry over; media only the store has
+    (from other regions) follows in its previous order.
+
+    Returns:
+        Dict mapping 'photos'/'audio' to the number of entries new to the store
+    """
+    added = dict.fromkeys(MEDIA_LISTS, 0)
+    for bird in birds:
+        species = store.setdefault(bird['scientificName'], {media: [] for media in MEDIA_LISTS})
+        for media in MEDIA_LISTS:
+            entries = {e.get('id') or media_id(e): e for e in bird.get(media, [])}
+            previous = {e.get('id') or media_id(e): e for e in species[media]}
+            added[media] += len(entries.keys() - previous.keys())
+            species[media] = list(entries.values()) + [e for i, e in previous.items() if i not in entries]
+    return added
+
+
+def checklist_from_dataset(data):
+    """A region checklist: the dataset with empty media lists (kept so projections keep field order)"""
+    checklist = copy.deepcopy(data)
+    for bird in checklist['birds']:
+        for media in MEDIA_LISTS:
+            bird[media] = []
+    return checklist
+
+
+def select_media(entries, region, limit):
+    """Up to limit entries, those recorded inside the region first, otherwise in store order"""
+    return sorted(entries, key=lambda entry: not in_region(entry, region))[:limit]
+
+
+def project(checklist, store, region):
+    """
+    Build a region's dataset from its checklist and the shared store
+
+    Returns:
+        (data, missing) where missing lists species the store has no media for
+    """
+    data = copy.deepcopy(checklist)
+    limits = {'photos': PHOTOS_PER_SPECIES, 'audio': AUDIO_PER_SPECIES}
+    missing = []
+    for bird in data['birds']:
+        species = store.get(bird['scientificName'])
+        if not species:
+            missing.append(bird['scientificName'])
+            continue
+        for media in MEDIA_LISTS:
+            bird[media] = copy.deepcopy(select_media(species.get(media, []), region, limits[media]))
+
+    birds = data['birds']
+    total = len(birds)
+    update_photo_statistics(data)
+    total_audio = sum(len(b.get('audio', [])) for b in birds)
+    birds_with_audio = sum(1 for b in birds if b.get('audio'))
+    data['statistics'].update({
+        'birdsWithAudio': birds_with_audio,
+        'birdsWithoutAudio': total - birds_with_audio,
+        'totalAudio': total_audio,
+        'averageAudioPerBird': round(total_audio / total, 2) if total > 0 else 0
+    })
+    return data, missing
+
+
+def build_region(key, store):
+    region = get_region(key)
+    checklist = load_json(region['checklistPath'])
+    data, missing = project(checklist, store, region)
+    save_json(region['datasetPath'], data)
+    stats = data['statistics']
+    print(f"{key}: {len(data['birds'])} species, {stats['totalPhotos']} photos, {stats['totalAudio']} recordings "
+          f"-> {os.path.relpath(region['datasetPath'])}")
+    if missing:
+        print(f"  {len(missing)} species not in the store yet (harvest them, then --import)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build regional datasets from the shared species media store')
+    parser.add_argument('--list', action='store_true', help='Show regions, checklists and store coverage')
+    parser.add_argument('--import', dest='import_file', metavar='DATASET',
+                        help="Merge a dataset's media into the store and save its checklist")
+    parser.add_argument('--region', default=DEFAULT_REGION, help='Region of the --import dataset')
+    parser.add_argument('--build', nargs='+', metavar='REGION', default=[], help='Regions to project')
+    parser.add_argument('--all', action='store_true', help='Project every region with a checklist')
+    args = parser.parse_args()
+
+    store = load_json(STORE_FILE, {})
+
+    if args.import_file:
+        region = get_region(args.region)
+        data = load_json(args.import_file)
+        added = merge_into_store(store, data['birds'])
+        save_json(STORE_FILE, store)
+        save_json(region['checklistPath'], checklist_from_dataset(data))
+        print(f"Imported {len(data['birds'])} species from {args.import_file}: "
+              f"{added['photos']} new photos, {added['audio']} new recordings "
+              f"(store: {len(store)} species)")
+
+    regions = args.build
+    if args.all:
+        regions = [key for key in REGIONS if os.path.exists(get_region(key)['checklistPath'])]
+    for key in regions:
+        build_region(key, store)
+
+    if args.list or not (args.import_file or regions):
+        print(f"Store: {len(store)} species, "
+              f"{sum(len(s['photos']) for s in store.values())} photos, "
+              f"{sum(len(s['audio']) for s in store.values())} recordings\n")
+        for key in REGIONS:
+            region = get_region(key)
+            if not os.path.exists(region['checklistPath']):
+                print(f"{key:<10} {region['name']}: no checklist")
+                continue
+            names = [b['scientificName'] for b in load_json(region['checklistPath'])['birds']]
+            covered = sum(1 for n in names if store.get(n, {}).get('photos'))
+            print(f"{key:<10} {region['name']}: {len(names)} species, {covered} with photos in the store")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Spectrogram Thumbnail Renderer
+Renders a small greyscale spectrogram PNG for every recording, so the app has
+something to show while audio buffers and reviewers can spot noisy, mislabelled
+or speech-filled recordings at a glance
+
+Each recording is decoded once (ffmpeg, via analyse_audio.decode), starting at
+its startOffsetSec when analyse_audio.py has run, and transformed with a NumPy
+STFT in a process pool. PNGs are encoded with zlib directly, so no imaging
+library is needed, and stored in the artefact store (artefacts.py).
+
+Adds to each audio entry:
+    spectrogram      {"url", "width", "height"}
+"""
+
+import argparse
+import json
+import shutil
+import struct
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from analyse_audio import SAMPLE_RATE, decode, source_for
+from artefacts import ArtefactStore
+from media_ids import media_id
+from media_mirror import MediaStore
+
+WIDTH = 240
+HEIGHT = 80
+
+# Seconds of audio shown, from the start of audible sound
+MAX_SECONDS = 10
+
+# STFT: 1024-sample Hann windows every 256 samples (~12 ms at 22.05 kHz)
+FFT_SIZE = 1024
+HOP_SIZE = 256
+
+# Frequency band shown; most bird vocalisations fall inside it
+MIN_FREQ = 300
+MAX_FREQ = 11000
+
+# Levels more than this far below the loudest bin are drawn white
+DYNAMIC_RANGE_DB = 60
+
+ARTEFACT_KIND = 'spectrogram'
+
+
+def png_bytes(pixels):
+    """
+    Encode an 8-bit greyscale image as PNG
+
+    Args:
+        pixels: uint8 array of shape (height, width)
+    """
+    height, width = pixels.shape
+
+    def chunk(kind, data):
+        return (struct.pack('>I', len(data)) + kind + data
+                + struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    # Filter type 0 (None) before each row
+    rows = np.hstack([np.zeros((height, 1), dtype=np.uint8), pixels.astype(np.uint8)])
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(rows.tobytes(), 9))
+            + chunk(b'IEND', b''))
+
+
+def spectrogram_pixels(samples, sample_rate=SAMPLE_RATE, width=WIDTH, height=HEIGHT):
+    """
+    Render samples as a (height, width) uint8 image, dark where loud and
+    low frequencies at the bottom
+    """
+    if len(samples) < FFT_SIZE:
+        samples = np.pad(samples, (0, FFT_SIZE - len(samples)))
+    frames = np.lib.stride_tricks.sliding_window_view(samples, FFT_SIZE)[::HOP_SIZE]
+    power = np.abs(np.fft.rfft(frames * np.hanning(FFT_SIZE).astype(np.float32), axis=1)) ** 2
+
+    freqs = np.fft.rfftfreq(FFT_SIZE, 1 / sample_rate)
+    band = power[:, (freqs >= MIN_FREQ) & (freqs <= MAX_FREQ)]
+
+    # Pool frames into columns and bins into rows, keeping the peak so short calls stay visible
+    columns = np.linspace(0, len(band), min(width, len(band)) + 1).astype(int)[:-1]
+    rows = np.linspace(0, band.shape[1], height + 1).astype(int)[:-1]
+    pooled = np.maximum.reduceat(np.maximum.reduceat(band, columns, axis=0), rows, axis=1)
+
+    levels = 10 * np.log10(np.maximum(pooled, 1e-12))
+    levels = np.clip((levels.max() - levels) / DYNAMIC_RANGE_DB, 0, 1)
+    return (levels.T[::-1] * 255).astype(np.uint8)
+
+
+def render_recording(task):
+    """
+    Decode one recording and render its spectrogram (runs in a worker process)
+
+    Args:
+        task: (source, start_sec)
+
+    Returns:
+        (png, width, height), or an error message string
+    """
+    source, start = task
+    try:
+        samples = decode(source)
+        first = int(start * SAMPLE_RATE)
+        pixels = spectrogram_pixels(samples[first:first + MAX_SECONDS * SAMPLE_RATE])
+    except Exception as e:
+        return f"{source}: {e}"
+    return png_bytes(pixels), pixels.shape[1], pixels.shape[0]
+
+
+def render_dataset(data, artefacts, workers=None, refresh=False):
+    """
+    Render missing spectrograms into the artefact store and record them on
+    the audio entries in place
+
+    Returns:
+        (rendered, reused, failed) counts
+    """
+    store = MediaStore()
+
+    tasks = []
+    reused = 0
+    for bird in data['birds']:
+        for entry in bird.get('audio', []):
+            # Reuse the stored spectrogram while the entry still points at it
+            owner = entry.get('id') or media_id(entry)
+            spectrogram = entry.get('spectrogram')
+            if (not refresh and spectrogram
+                    and spectrogram['url'] == artefacts.get(owner, ARTEFACT_KIND)):
+                reused += 1
+                continue
+            tasks.append((entry, owner, (source_for(entry, store), entry.get('startOffsetSec', 0))))
+
+    print(f"Rendering {len(tasks)} spectrograms ({reused} up to date)...")
+    rendered = failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(render_recording, [task for _, _, task in tasks], chunksize=4)
+        for i, ((entry, owner, _), result) in enumerate(zip(tasks, results), 1):
+            if isinstance(result, str):
+                print(f"Error rendering {result}")
+                failed += 1
+            else:
+                png, width, height = result
+                url = artefacts.put(owner, ARTEFACT_KIND, png, 'png')
+                entry['spectrogram'] = {'url': url, 'width': width, 'height': height}
+                rendered += 1
+            if i % 100 == 0:
+                artefacts.save()
+                print(f"  {i}/{len(tasks)}")
+    artefacts.save()
+    return rendered, reused, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render spectrogram thumbnails for every recording')
+    parser.add_argument('bird_data', nargs='?', default='../data/act_birds.json',
+                        help='Bird data JSON file to update in place')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--refresh', action='store_true', help='Re-render existing spectrograms')
+    args = parser.parse_args()
+
+    if not shutil.which('ffmpeg'):
+        print("ffmpeg is required to decode recordings (https://ffmpeg.org/download.html)")
+        return
+
+    print(f"Loading bird data from {args.bird_data}...")
+    with open(args.bird_data, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    artefacts = ArtefactStore()
+    rendered, reused, failed = render_dataset(data, artefacts, args.workers, args.refresh)
+    print(f"\nRendered {rendered} ({artefacts.written} new files), reused {reused}, failed {failed}")
+
+    print(f"Writing updated data to {args.bird_data}...")
+    with open(args.bird_data, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+    print("Done!")
+
+
+if __name__ == '__main__':
+    main()
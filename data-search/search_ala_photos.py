@@ -2,163 +2,44 @@
 """
 ALA (Atlas of Living Australia) Photo Search Script
 Searches for bird photos with appropriate Creative Commons licenses
+
+Given an ALA occurrence download (zipped CSV, e.g. class Aves in the region's
+state with multimedia, requested from the ALA website or galah), every species
+is served from one local pass over the archive instead of one web-service
+query per species.
 """
 
+import argparse
 import json
-import time
-import urllib.request
-import urllib.parse
-import urllib.error
-import sys
 from datetime import datetime
 
-# ALA API configuration
-ALA_OCCURRENCE_API = 'https://biocache-ws.ala.org.au/ws/occurrences/search'
-ALA_IMAGE_BASE = 'https://images.ala.org.au'
-
-# Rate limiting
-REQUEST_DELAY = 2.0  # seconds between requests
-
-# Acceptable licenses (no ND - No Derivatives)
-ACCEPTABLE_LICENSES = [
-    'CC BY',
-    'CC BY-SA',
-    'CC BY-NC',
-    'CC BY-NC-SA',
-    'CC0'
-]
-
-def fetch_url(url, params=None, timeout=30):
-    """Fetch URL with proper headers"""
-    if params:
-        url = f"{url}?{urllib.parse.urlencode(params, doseq=True)}"
-
-    headers = {
-        'User-Agent': 'Canberra Bird Game/1.0 (educational project)',
-        'Accept': 'application/json'
-    }
+from harvest import DEFAULT_WORKERS, run_harvest
+from media_ids import with_id
+from pipeline_log import start_run
+from providers import get_provider, search_async, search_sync
+from providers.ala_occurrences import download_photos
+from regions import DEFAULT_REGION, REGIONS, get_region
+
+# Rate limiting: seconds between requests (enforced by the ala_occurrences
+# provider across all workers)
+REQUEST_DELAY = 2.0
 
-    req = urllib.request.Request(url, headers=headers)
-
-    try:
-        with urllib.request.urlopen(req, timeout=timeout) as response:
-            return json.loads(response.read().decode('utf-8'))
-    except urllib.error.HTTPError as e:
-        print(f"HTTP Error {e.code}: {e.reason}")
-        if e.code == 429:
-            print("Rate limited! Waiting 10 seconds...")
-            time.sleep(10)
-        return None
-    except Exception as e:
-        print(f"Error fetching {url}: {e}")
-        return None
-
-def normalize_license(license_str):
-    """Normalize license string to standard format"""
-    if not license_str:
-        return None
-
-    license_str = license_str.strip()
-
-    # Check if it matches our acceptable licenses
-    for acceptable in ACCEPTABLE_LICENSES:
-        if acceptable.lower() in license_str.lower():
-            # Standardize to version 4.0 for CC licenses
-            if license_str.upper().startswith('CC'):
-                return f"{acceptable} 4.0"
-            return acceptable
-
-    return None
-
-def is_acceptable_license(license_str):
-    """Check if license is acceptable"""
-    if not license_str:
-        return False
-
-    # Reject ND (No Derivatives) licenses
-    if 'nd' in license_str.lower():
-        return False
-
-    normalized = normalize_license(license_str)
-    return normalized is not None
-
-def search_ala_bird_photos(scientific_name, max_results=20, act_only=True):
+def search_ala_bird_photos(scientific_name, max_results=20, region=DEFAULT_REGION):
     """
     Search ALA for bird photos
 
     Args:
         scientific_name: Scientific name of bird (e.g., "Dromaius novaehollandiae")
         max_results: Maximum number of results to return
-        act_only: If True, filter to ACT records only
+        region: Only return records from this region's state (regions.REGIONS)
 
     Returns:
         List of photo dictionaries matching our data format
     """
     print(f"Searching ALA for: {scientific_name}")
 
-    # Build filter queries
-    filters = [
-        'multimedia:Image',
-        'geospatial_kosher:true',
-    ]
-
-    if act_only:
-        filters.append('state:"Australian Capital Territory"')
-
-    params = {
-        'q': f'scientificName:"{scientific_name}"',
-        'fq': filters,
-        'pageSize': max_results,
-        'startIndex': 0,
-        'facets': 'license'
-    }
-
-    data = fetch_url(ALA_OCCURRENCE_API, params)
-
-    if not data:
-        print(f"  No data returned")
-        return []
-
-    occurrences = data.get('occurrences', [])
-    print(f"  Found {len(occurrences)} occurrences with images")
-
-    photos = []
-    for occ in occurrences:
-        # Get image data
-        image_url = occ.get('imageUrl') or occ.get('image')
-        if not image_url:
-            continue
-
-        # Get license info
-        license_str = occ.get('license') or occ.get('licence')
-        if not is_acceptable_license(license_str):
-            continue
-
-        normalized_license = normalize_license(license_str)
-
-        # Get attribution
-        creator = occ.get('creator')
-        rights_holder = occ.get('rightsHolder')
-        attribution = creator or rights_holder or 'Unknown'
-
-        # Build page URL
-        record_id = occ.get('uuid')
-        page_url = f"https://biocache.ala.org.au/occurrences/{record_id}" if record_id else None
-
-        # Get data resource info
-        data_resource = occ.get('dataResourceName', 'Atlas of Living Australia')
-
-        photo_entry = {
-            'url': image_url,
-            'pageUrl': page_url,
-            'source': 'Atlas of Living Australia',
-            'licence': normalized_license,
-            'attribution': attribution,
-            'dataResource': data_resource,
-            'recordId': record_id
-        }
-
-        photos.append(photo_entry)
+    provider = get_provider('ala_occurrences', state=get_region(region)['state'])
+    photos = search_sync(provider, {'scientificName': scientific_name}, max_results)
 
     print(f"  Accepted {len(photos)} photos with appropriate licenses")
     return photos
@@ -186,14 +67,21 @@ def find_species_needing_photos(bird_data_file, threshold=3):
 
     return sorted(needs_photos, key=lambda x: x[2])  # Sort by photo count
 
-def search_multiple_species(species_list, output_file, max_per_species=10):
+def search_multiple_species(species_list, output_file, max_per_species=10, region=DEFAULT_REGION, download=None,
+                            workers=DEFAULT_WORKERS):
     """
     Search for photos for multiple species and save results
 
+    After a Ctrl-C, the species searched so far are saved.
+
     Args:
         species_list: List of (scientific_name, common_name, current_count) tuples
         output_file: File to save results
         max_per_species: Maximum photos to fetch per species
+        region: Region whose records to search
+        download: Optional ALA occurrence download (zip) to read instead of
+            querying the web service
+        workers: Species searched at once
     """
     results = {
         'searchDate': datetime.now().isoformat(),
@@ -201,11 +89,27 @@ def search_multiple_species(species_list, output_file, max_per_species=10):
         'species': []
     }
 
-    for i, (scientific_name, common_name, current_count) in enumerate(species_list, 1):
-        print(f"\n[{i}/{len(species_list)}] {common_name} ({scientific_name})")
-        print(f"  Current photos: {current_count}")
+    prefetched = None
+    if download:
+        print(f"Reading occurrence download {download}...")
+        prefetched = download_photos(download, [{'scientificName': s[0]} for s in species_list],
+                                     max_per_species, state=get_region(region)['state'])
+
+    provider = get_provider('ala_occurrences', state=get_region(region)['state'])
 
-        photos = search_ala_bird_photos(scientific_name, max_results=max_per_species)
+    async def find_photos(species):
+        scientific_name = species[0]
+        if prefetched is not None:
+            return [with_id(photo) for photo in prefetched[scientific_name]]
+        return await search_async(provider, {'scientificName': scientific_name}, max_per_species)
+
+    def report(i, species, photos):
+        scientific_name, common_name, current_count = species
+        print(f"  Current photos: {current_count}")
+        if prefetched is not None:
+            print(f"  Found {len(photos)} photos in the download")
+        else:
+            print(f"  Accepted {len(photos)} photos with appropriate licenses")
 
         results['species'].append({
             'scientificName': scientific_name,
@@ -215,10 +119,11 @@ def search_multiple_species(species_list, output_file, max_per_species=10):
             'photos': photos
         })
 
-        # Rate limiting
-        if i < len(species_list):
-            print(f"  Waiting {REQUEST_DELAY}s...")
-            time.sleep(REQUEST_DELAY)
+    _, interrupted = run_harvest(species_list, find_photos, workers, backend='asyncio', on_result=report,
+                                 describe=lambda species: f"{species[1]} ({species[0]})")
+    if interrupted:
+        results['totalSpeciesSearched'] = len(results['species'])
+        results['interrupted'] = True
 
     # Save results
     print(f"\nSaving results to {output_file}...")
@@ -236,17 +141,28 @@ def search_multiple_species(species_list, output_file, max_per_species=10):
 
 def main():
     """Main function"""
-    if len(sys.argv) < 2:
-        print("Usage:")
-        print("  python3 search_ala_photos.py <bird_data.json> [threshold] [max_per_species]")
-        print("\nExample:")
-        print("  python3 search_ala_photos.py ../data/act_birds.json 3 10")
-        print("\nThis will search for ALA photos for species with fewer than 3 photos")
-        sys.exit(1)
-
-    bird_data_file = sys.argv[1]
-    threshold = int(sys.argv[2]) if len(sys.argv) > 2 else 3
-    max_per_species = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    parser = argparse.ArgumentParser(
+        description='Search ALA for photos of species with fewer than threshold photos',
+        epilog='Example: python3 search_ala_photos.py ../data/act_birds.json 3 10\n'
+               'With an ALA occurrence download, photos are read from the archive without any requests:\n'
+               '  python3 search_ala_photos.py ../data/act_birds.json 3 10 act records-act-aves.zip',
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('bird_data', help='Bird data JSON file')
+    parser.add_argument('threshold', nargs='?', type=int, default=3, help='Photo count below which to search')
+    parser.add_argument('max_per_species', nargs='?', type=int, default=10, help='Maximum photos per species')
+    parser.add_argument('region', nargs='?', default=DEFAULT_REGION, choices=REGIONS,
+                        help="Region whose state's records to use")
+    parser.add_argument('download', nargs='?', help='ALA occurrence download (zip) to read instead of the web service')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Species searched at once (ALA keeps its rate limit)')
+    args = parser.parse_args()
+    bird_data_file = args.bird_data
+    threshold = args.threshold
+    max_per_species = args.max_per_species
+    region = args.region
+    download = args.download
+
+    print(f"Event log: {start_run('search_ala_photos')} (summarise with pipeline_log.py)")
 
     print(f"Finding species with fewer than {threshold} photos...")
     species_list = find_species_needing_photos(bird_data_file, threshold)
@@ -262,18 +178,19 @@ def main():
         print("All species have sufficient photos!")
         return
 
-    # Confirm before proceeding
-    print(f"\nThis will search ALA for up to {max_per_species} photos per species")
-    print(f"Estimated time: ~{len(species_list) * REQUEST_DELAY / 60:.1f} minutes")
+    # Confirm before a web-service crawl (a download is read locally)
+    if not download:
+        print(f"\nThis will search ALA for up to {max_per_species} photos per species")
+        print(f"Estimated time: ~{len(species_list) * REQUEST_DELAY / 60:.1f} minutes")
 
-    response = input("\nProceed? (y/n): ")
-    if response.lower() != 'y':
-        print("Cancelled")
-        return
+        response = input("\nProceed? (y/n): ")
+        if response.lower() != 'y':
+            print("Cancelled")
+            return
 
     output_file = f"ala_photos_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
 
-    search_multiple_species(species_list, output_file, max_per_species)
+    search_multiple_species(species_list, output_file, max_per_species, region, download, args.workers)
 
     print(f"\nResults saved to: {output_file}")
     print("Review the results before integrating into the main dataset")
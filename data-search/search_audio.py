@@ -4,82 +4,27 @@ Bird Audio Search Script - Xeno-canto
 Searches for high-quality bird audio recordings from Xeno-canto.org
 """
 
+import argparse
 import json
 import time
-import urllib.request
-import urllib.parse
-import urllib.error
 import os
 import sys
 
+from harvest import DEFAULT_WORKERS, run_harvest, species_label
+from media_ids import with_id
+from pipeline_log import start_run
+from providers import get_provider, search_async, search_sync
+from providers.xeno_canto import (BULK_QUERY, best_recordings, index_recordings,
+                                  iter_bulk_recordings, species_key)
+from regions import DEFAULT_REGION, REGIONS, get_region, xeno_canto_box
+from coverage_report import TARGET_AUDIO, add_within_quota, sound_types
+from taxonomy import candidate_names
+
 # Xeno-canto API v3 configuration
 XENO_CANTO_API_KEY = os.environ.get('XENO_CANTO_API_KEY', '')
-XENO_CANTO_API_URL = 'https://xeno-canto.org/api/3/recordings'
-
-# Acceptable licenses (no ND - No Derivatives)
-# Note: Xeno-canto URLs use format "/by-nc-sa/" not "cc-by-nc-sa"
-ACCEPTABLE_LICENSES = [
-    '/by/',
-    '/by-sa/',
-    '/by-nc/',
-    '/by-nc-sa/',
-    '/cc0/'
-]
-
-# Quality preference order (A is best)
-QUALITY_PREFERENCE = ['A', 'B', 'C']
-
-
-def fetch_url(url, timeout=30):
-    """Fetch URL content with headers"""
-    headers = {
-        'User-Agent': 'ACT Bird Game Audio Search/1.0 (research project)',
-        'Accept': 'application/json'
-    }
-    req = urllib.request.Request(url, headers=headers)
-    try:
-        with urllib.request.urlopen(req, timeout=timeout) as response:
-            return response.read().decode('utf-8')
-    except Exception as e:
-        print(f"Error fetching {url}: {e}")
-        return None
-
-
-def normalize_license(license_url):
-    """Convert license URL to standard format"""
-    license_lower = license_url.lower()
-
-    # Map URL patterns to standard license names
-    # Xeno-canto uses format: //creativecommons.org/licenses/by-nc-sa/4.0/
-    if '/by-nc-sa/' in license_lower:
-        return 'CC BY-NC-SA 4.0'
-    elif '/by-nc-nd/' in license_lower:
-        return 'CC BY-NC-ND 4.0'
-    elif '/by-sa/' in license_lower:
-        return 'CC BY-SA 4.0'
-    elif '/by-nd/' in license_lower:
-        return 'CC BY-ND 4.0'
-    elif '/by-nc/' in license_lower:
-        return 'CC BY-NC 4.0'
-    elif '/by/' in license_lower and '/by-' not in license_lower:
-        return 'CC BY 4.0'
-    elif '/cc0/' in license_lower or 'cc0' in license_lower:
-        return 'CC0 1.0'
-
-    # Return original if we can't parse it
-    return license_url
-
-
-def is_acceptable_license(license_url):
-    """Check if license is acceptable (no ND licenses)"""
-    license_lower = license_url.lower()
-
-    # Reject ND (No Derivatives) licenses
-    if 'nd' in license_lower:
-        return False
-
-    # Check if it's one of our acceptable licenses
-    return any(lic in license_lower for lic in ACCEPTABLE_LICENSES)
+
+# Shared so the provider's ~1 request/second limit holds across calls
+xeno_canto = get_provider('xeno_canto', api_key=XENO_CANTO_API_KEY)
 
 
 def search_xeno_canto(scientific_name, max_audio=5):
@@ -93,121 +38,86 @@ def search_xeno_canto(scientific_name, max_audio=5):
     Returns:
         List of audio objects with metadata
     """
-    if not XENO_CANTO_API_KEY:
-        print("ERROR: XENO_CANTO_API_KEY environment variable not set!")
-        print("Get your API key from: https://xeno-canto.org/account")
-        return []
-
-    audio_list = []
-
-    # Build query: search by species, prefer high quality
-    # Use quoted scientific name for exact match
-    query = f'sp:"{scientific_name}"'
-
-    # URL encode the query
-    params = {
-        'query': query,
-        'key': XENO_CANTO_API_KEY
-    }
-
-    url = f"{XENO_CANTO_API_URL}?{urllib.parse.urlencode(params)}"
-
-    data = fetch_url(url)
-    if not data:
-        return audio_list
-
-    try:
-        result = json.loads(data)
-
-        # Check for errors
-        if 'error' in result:
-            print(f"  API Error: {result.get('message', 'Unknown error')}")
-            return audio_list
-
-        recordings = result.get('recordings', [])
-
-        if not recordings:
-            return audio_list
-
-        # Sort by quality (A > B > C > D > E)
-        def quality_score(rec):
-            quality = rec.get('q', 'E')
-            if quality == 'A':
-                return 5
-            elif quality == 'B':
-                return 4
-            elif quality == 'C':
-                return 3
-            elif quality == 'D':
-                return 2
-            elif quality == 'E':
-                return 1
-            else:
-                return 0
-
-        # Sort by quality (highest first)
-        recordings_sorted = sorted(recordings, key=quality_score, reverse=True)
-
-        # Process recordings
-        for rec in recordings_sorted:
-            # Check license
-            license_url = rec.get('lic', '')
-            if not is_acceptable_license(license_url):
-                continue
-
-            # Skip if quality is too low (D or E)
-            quality = rec.get('q', 'no score')
-            if quality in ['D', 'E']:
-                continue
-
-            # Get recording details
-            recording_id = rec.get('id', '')
-            file_name = rec.get('file-name', '')
-
-            # Construct URLs
-            # The 'file' field from API already contains full URL
-            file_field = rec.get('file', '')
-            if file_field.startswith('http://') or file_field.startswith('https://'):
-                audio_url = file_field
-            else:
-                audio_url = f"https://xeno-canto.org/{file_field}"
-            page_url = f"https://xeno-canto.org/{recording_id}"
-
-            audio_entry = {
-                'url': audio_url,
-                'pageUrl': page_url,
-                'source': 'Xeno-canto',
-                'licence': normalize_license(license_url),
-                'quality': quality,
-                'type': rec.get('type', 'unknown'),
-                'length': rec.get('length', 'unknown'),
-                'recordingId': recording_id
-            }
-
-            # Add attribution (recordist name)
-            recordist = rec.get('rec', '')
-            if recordist and 'cc0' not in license_url.lower():
-                audio_entry['attribution'] = recordist
-
-            # Add optional description from remarks if useful
-            remarks = rec.get('rmk', '').strip()
-            if remarks and len(remarks) < 200:  # Only short remarks
-                audio_entry['description'] = remarks
-
-            audio_list.append(audio_entry)
-
-            # Stop when we have enough
-            if len(audio_list) >= max_audio:
-                break
-
-    except (json.JSONDecodeError, KeyError) as e:
-        print(f"  Error parsing Xeno-canto data: {e}")
-
-    return audio_list
+    return search_sync(xeno_canto, {'scientificName': scientific_name}, max_audio)
+
+
+def build_bulk_index(box=None):
+    """
+    Crawl Xeno-canto once for all acceptable Australian bird recordings
+
+    Args:
+        box: Optional box: tag restricting the crawl (regions.xeno_canto_box)
+
+    Returns:
+        Dict mapping species_key to raw recordings
+    """
+    query = f"{BULK_QUERY} {box}" if box else BULK_QUERY
+    print(f"Bulk crawl: {query}")
+    index = index_recordings(iter_bulk_recordings(XENO_CANTO_API_KEY, query))
+    print(f"Indexed recordings for {len(index)} species")
+    print()
+    return index
+
+
+def apply_audio_plan(birds, plan, workers=DEFAULT_WORKERS):
+    """
+    Run only the Xeno-canto queries in a coverage_report.py plan, adding new
+    recordings to each planned species' existing ones, missing sound types first;
+    a species with a full quota swaps recordings of its most common sound type
+    for the missing ones
+
+    Returns:
+        Number of recordings added (species finished before a Ctrl-C keep theirs)
+    """
+    by_name = {bird['scientificName']: bird for bird in birds}
+    queries = [q for q in plan.get('queries', [])
+               if q['provider'] == 'xeno_canto' and q['scientificName'] in by_name]
+    added = 0
+
+    async def find_audio(query):
+        return await search_async(xeno_canto, {'scientificName': query['scientificName']}, xeno_canto.candidate_pool)
+
+    def report(i, query, found):
+        nonlocal added
+        bird = by_name[query['scientificName']]
+        existing = bird.get('audio', [])
+        known = {a.get('id') for a in existing} | {a.get('url') for a in existing}
+        candidates = [a for a in found if a['id'] not in known and a['url'] not in known]
+        # Stable sort keeps quality order within each group
+        needed = set(query.get('soundTypes', []))
+        candidates.sort(key=lambda a: not (sound_types(a) & needed))
+
+        free = max(TARGET_AUDIO - len(existing), 0)
+        bird['audio'], new = add_within_quota(existing, candidates, TARGET_AUDIO,
+                                              lambda a: frozenset(sound_types(a)), query['want'] - free)
+        added += len(new)
+        print(f"  Added {len(new)} recording(s)")
+
+    run_harvest(queries, find_audio, workers, backend='asyncio', on_result=report,
+                describe=lambda query: f"{species_label(by_name[query['scientificName']])}: {query['reason']}")
+    return added
 
 
 def main():
     """Main processing function"""
+    parser = argparse.ArgumentParser(description='Search Xeno-canto for bird audio')
+    parser.add_argument('--bulk', action='store_true',
+                        help='Crawl all Australian recordings once and assign locally, '
+                             'querying per species only for taxa missing from the crawl')
+    parser.add_argument('--local-only', '--act-only', dest='local_only', action='store_true',
+                        help='With --bulk, restrict the crawl to a box around the region')
+    parser.add_argument('--plan', help='harvest_plan.json from coverage_report.py: run only the '
+                                       'planned queries and add to existing recordings')
+    parser.add_argument('--region', default=DEFAULT_REGION, choices=REGIONS,
+                        help='Regional dataset to update (see regions.py)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Species searched at once (Xeno-canto keeps its rate limit)')
+    args = parser.parse_args()
+    region = get_region(args.region)
+    output_file = region['datasetPath']
+
+    print(f"Event log: {start_run('search_audio')} (summarise with pipeline_log.py)")
+
     # Check for API key
     if not XENO_CANTO_API_KEY:
         print("ERROR: XENO_CANTO_API_KEY environment variable not set!")
@@ -221,11 +131,29 @@ def main():
         sys.exit(1)
 
     # Load the bird data
-    with open('data/act_birds.json', 'r') as f:
+    with open(output_file, 'r') as f:
         data = json.load(f)
 
     birds = data['birds']
     total = len(birds)
+
+    if args.plan:
+        with open(args.plan, 'r', encoding='utf-8') as f:
+            plan = json.load(f)
+        added = apply_audio_plan(birds, plan, args.workers)
+        total_audio = sum(len(b.get('audio', [])) for b in birds)
+        birds_with_audio = sum(1 for b in birds if b.get('audio'))
+        data.setdefault('statistics', {}).update({
+            'birdsWithAudio': birds_with_audio,
+            'birdsWithoutAudio': total - birds_with_audio,
+            'totalAudio': total_audio,
+            'averageAudioPerBird': round(total_audio / total, 2) if total > 0 else 0
+        })
+        with open(output_file, 'w') as f:
+            json.dump(data, f, indent=2)
+        print(f"\nAdded {added} recordings from the plan; results saved to {output_file}")
+        return
+
     birds_with_audio = 0
     total_audio = 0
     birds_without_audio = []
@@ -235,14 +163,34 @@ def main():
     print(f"Target: Up to 5 audio recordings per species")
     print()
 
-    for i, bird in enumerate(birds):
+    bulk_index = build_bulk_index(xeno_canto_box(region) if args.local_only else None) if args.bulk else None
+    fallback_queries = 0
+
+    async def find_audio(bird):
+        """
+        Returns:
+            (audio, queried): queried is True if the species was not in the
+            bulk crawl and had to be queried directly
+        """
         scientific_name = bird['scientificName']
+        if bulk_index is not None:
+            # Xeno-canto follows the IOC list, which may know the species under an alias
+            recordings = next((bulk_index[species_key(name)] for name in candidate_names(scientific_name)
+                               if species_key(name) in bulk_index), [])
+            audio = [with_id(a) for a in best_recordings(recordings, 5)]
+            if audio:
+                return audio, False
+
+        # Per-species query (always in normal mode, only for missing taxa in bulk mode)
+        return await search_async(xeno_canto, {'scientificName': scientific_name}, 5), bulk_index is not None
+
+    def report(i, bird, found):
+        nonlocal birds_with_audio, total_audio, fallback_queries
+        audio, queried = found
         common_name = bird['commonName']
-
-        print(f"[{i+1}/{total}] Searching for {common_name} ({scientific_name})...")
-
-        # Search Xeno-canto
-        audio = search_xeno_canto(scientific_name, max_audio=5)
+        if queried:
+            print(f"  Not in bulk crawl - queried species directly")
+            fallback_queries += 1
 
         # Store audio recordings
         bird['audio'] = audio
@@ -262,9 +210,12 @@ def main():
             birds_without_audio.append(common_name)
             print(f"  No audio found")
 
-        # Rate limiting - be respectful of Xeno-canto API
-        # Recommended: ~1 request per second
-        time.sleep(1.0)
+    _, interrupted = run_harvest(birds, find_audio, args.workers, backend='asyncio', describe=species_label,
+                                 on_result=report)
+    if interrupted:
+        # Species not reached keep their previous recordings
+        birds_with_audio = sum(1 for b in birds if b.get('audio'))
+        total_audio = sum(len(b.get('audio', [])) for b in birds)
 
     # Update statistics
     if 'statistics' not in data:
@@ -278,7 +229,6 @@ def main():
     })
 
     # Save updated JSON
-    output_file = 'data/act_birds.json'
     with open(output_file, 'w') as f:
         json.dump(data, f, indent=2)
 
@@ -288,6 +238,8 @@ def main():
     print(f"Birds without audio: {total - birds_with_audio}")
     print(f"Total audio recordings: {total_audio}")
     print(f"Average audio per bird: {round(total_audio / total, 2) if total > 0 else 0}")
+    if bulk_index is not None:
+        print(f"Per-species fallback queries: {fallback_queries}")
 
     # Generate log file
     with open('audio_search_log.txt', 'w') as f:
@@ -4,193 +4,126 @@ Bird Photo Search Script
 Searches for photos from Wikimedia Commons, ALA, and iNaturalist
 """
 
+import argparse
+import asyncio
 import json
 import time
-import urllib.request
-import urllib.parse
-import urllib.error
-import ssl
-
-# Create an SSL context that doesn't verify certificates (for testing)
-ssl_context = ssl.create_default_context()
-ssl_context.check_hostname = False
-ssl_context.verify_mode = ssl.CERT_NONE
-
-def fetch_url(url, timeout=30):
-    """Fetch URL content with headers"""
-    headers = {
-        'User-Agent': 'BirdPhotoSearch/1.0 (ACT Bird Game Project; research)',
-        'Accept': 'application/json'
-    }
-    req = urllib.request.Request(url, headers=headers)
-    try:
-        with urllib.request.urlopen(req, timeout=timeout, context=ssl_context) as response:
-            return response.read().decode('utf-8')
-    except Exception as e:
-        print(f"Error fetching {url}: {e}")
-        return None
-
-def search_wikimedia(scientific_name, common_name):
-    """Search Wikimedia Commons for bird photos"""
-    photos = []
-
-    # Search by scientific name
-    search_term = urllib.parse.quote(scientific_name)
-    url = f"https://commons.wikimedia.org/w/api.php?action=query&generator=search&gsrnamespace=6&gsrsearch={search_term}&gsrlimit=5&prop=imageinfo&iiprop=url|extmetadata&format=json"
-
-    data = fetch_url(url)
-    if not data:
-        return photos
-
-    try:
-        result = json.loads(data)
-        if 'query' in result and 'pages' in result['query']:
-            for page_id, page in result['query']['pages'].items():
-                if 'imageinfo' in page:
-                    for info in page['imageinfo']:
-                        photo = {
-                            'url': info.get('url', ''),
-                            'pageUrl': info.get('descriptionurl', ''),
-                            'source': 'Wikimedia Commons'
-                        }
-
-                        # Extract metadata
-                        meta = info.get('extmetadata', {})
-                        license_name = meta.get('LicenseShortName', {}).get('value', '')
-                        artist = meta.get('Artist', {}).get('value', '')
-
-                        # Clean up artist HTML
-                        if '<' in artist:
-                            import re
-                            artist = re.sub('<[^>]+>', '', artist).strip()
-
-                        photo['licence'] = license_name
-                        if artist and license_name not in ['CC0', 'Public domain']:
-                            photo['attribution'] = artist
-
-                        # Only include acceptable licenses
-                        acceptable = ['CC0', 'CC BY', 'CC BY-SA', 'CC BY-NC', 'CC BY-NC-SA', 'Public domain']
-                        if any(lic in license_name for lic in acceptable) and 'ND' not in license_name:
-                            photos.append(photo)
-    except json.JSONDecodeError as e:
-        print(f"JSON error for {scientific_name}: {e}")
-
-    return photos
-
-def search_ala(scientific_name):
-    """Search Atlas of Living Australia for bird photos"""
-    photos = []
-
-    # First get species GUID
-    search_url = f"https://bie.ala.org.au/ws/search?q={urllib.parse.quote(scientific_name)}&fq=idxtype:TAXON"
-    data = fetch_url(search_url)
-
-    if not data:
-        return photos
-
-    try:
-        result = json.loads(data)
-        if result.get('searchResults', {}).get('results'):
-            taxon = result['searchResults']['results'][0]
-            guid = taxon.get('guid', '')
-
-            if guid:
-                # Get images for this taxon
-                img_url = f"https://images.ala.org.au/ws/search?q=*:*&fq=recognisedLsid:{urllib.parse.quote(guid)}&rows=5"
-                img_data = fetch_url(img_url)
-
-                if img_data:
-                    img_result = json.loads(img_data)
-                    for occ in img_result.get('occurrences', []):
-                        license_code = occ.get('license', '')
-                        # Map ALA licenses
-                        license_map = {
-                            'CC BY': 'CC BY 4.0',
-                            'CC BY-NC': 'CC BY-NC 4.0',
-                            'CC BY-SA': 'CC BY-SA 4.0',
-                            'CC0': 'CC0 1.0',
-                        }
-
-                        photo = {
-                            'url': occ.get('largeImageUrl') or occ.get('imageUrl', ''),
-                            'pageUrl': f"https://images.ala.org.au/image/{occ.get('imageId', '')}",
-                            'source': 'Atlas of Living Australia',
-                            'licence': license_map.get(license_code, license_code)
-                        }
-
-                        creator = occ.get('creator') or occ.get('rightsholder', '')
-                        if creator:
-                            photo['attribution'] = creator
-
-                        if photo['url']:
-                            photos.append(photo)
-    except (json.JSONDecodeError, KeyError) as e:
-        print(f"ALA error for {scientific_name}: {e}")
-
-    return photos
-
-def search_inaturalist(scientific_name):
-    """Search iNaturalist for bird photos"""
-    photos = []
-
-    # Search for taxon
-    search_url = f"https://api.inaturalist.org/v1/taxa?q={urllib.parse.quote(scientific_name)}&rank=species"
-    data = fetch_url(search_url)
-
-    if not data:
-        return photos
-
-    try:
-        result = json.loads(data)
-        if result.get('results'):
-            taxon = result['results'][0]
-            taxon_id = taxon.get('id')
-
-            if taxon_id:
-                # Get observations with photos
-                obs_url = f"https://api.inaturalist.org/v1/observations?taxon_id={taxon_id}&photos=true&quality_grade=research&per_page=5"
-                obs_data = fetch_url(obs_url)
-
-                if obs_data:
-                    obs_result = json.loads(obs_data)
-                    for obs in obs_result.get('results', []):
-                        for photo in obs.get('photos', []):
-                            license_code = photo.get('license_code', '')
-
-                            # Map iNaturalist licenses
-                            license_map = {
-                                'cc-by': 'CC BY 4.0',
-                                'cc-by-nc': 'CC BY-NC 4.0',
-                                'cc-by-sa': 'CC BY-SA 4.0',
-                                'cc-by-nc-sa': 'CC BY-NC-SA 4.0',
-                                'cc0': 'CC0 1.0',
-                            }
-
-                            if license_code and 'nd' not in license_code.lower():
-                                photo_entry = {
-                                    'url': photo.get('url', '').replace('square', 'large'),
-                                    'pageUrl': f"https://www.inaturalist.org/observations/{obs.get('id')}",
-                                    'source': 'iNaturalist',
-                                    'licence': license_map.get(license_code, license_code)
-                                }
-
-                                attribution = photo.get('attribution', '')
-                                if attribution:
-                                    photo_entry['attribution'] = attribution
-
-                                if photo_entry['url']:
-                                    photos.append(photo_entry)
-                                    break  # One photo per observation
-    except (json.JSONDecodeError, KeyError) as e:
-        print(f"iNaturalist error for {scientific_name}: {e}")
-
-    return photos
+
+from coverage_report import add_within_quota
+from harvest import DEFAULT_WORKERS, harvest_async, species_label
+from pipeline_log import start_run
+from merge_review import update_photo_statistics
+from providers import gather_all, gather_species_media, get_provider
+from providers.inaturalist import bulk_observation_photos, resolve_inaturalist_taxon
+from regions import DEFAULT_REGION, REGIONS, get_region, inaturalist_bounds
+
+# Providers in order of preference; all are queried concurrently per species
+PHOTO_PROVIDERS = ['wikimedia', 'ala_images', 'inaturalist']
+
+# Photos kept per species
+PHOTOS_PER_SPECIES = 5
+
+
+def bulk_inaturalist_photos(birds, region):
+    """
+    Prefetch iNaturalist photos for every species with batched observation queries
+
+    Taxon IDs come from the taxonomy cache (resolved once per species on the
+    first run). Observations inside the region are taken first.
+
+    Returns:
+        Dict mapping scientificName to photo records, for the inaturalist provider
+    """
+    inat = get_provider('inaturalist')
+
+    async def resolve_all():
+        return {bird['scientificName']: await resolve_inaturalist_taxon(inat, bird['scientificName'])
+                for bird in birds}
+
+    taxa = asyncio.run(resolve_all())
+    print(f"Bulk iNaturalist harvest for {sum(1 for t in taxa.values() if t)} resolved taxa...")
+    prefetched = bulk_observation_photos(taxa, PHOTOS_PER_SPECIES, local_area=inaturalist_bounds(region))
+    print(f"Prefetched iNaturalist photos for {sum(1 for p in prefetched.values() if p)} species")
+    print()
+    return prefetched
+
+
+def apply_photo_plan(birds, plan, workers=DEFAULT_WORKERS):
+    """
+    Run only the photo queries in a coverage_report.py plan, adding new photos
+    to each planned species' existing ones (up to PHOTOS_PER_SPECIES); a
+    species with a full quota swaps one photo from its most common source for
+    a photo from a new one
+
+    Returns:
+        Number of photos added (species finished before a Ctrl-C keep theirs)
+    """
+    planned = {}
+    for query in plan.get('queries', []):
+        if query['provider'] in PHOTO_PROVIDERS:
+            planned.setdefault(query['scientificName'], []).append(query['provider'])
+
+    providers = {name: get_provider(name) for name in PHOTO_PROVIDERS}
+    by_name = {bird['scientificName']: bird for bird in birds}
+    jobs = [(by_name[name], provider_names) for name, provider_names in planned.items() if name in by_name]
+    added = 0
+
+    async def find_photos(job):
+        bird, provider_names = job
+        existing = bird.get('photos', [])
+        ranked = [providers[p] for p in PHOTO_PROVIDERS if p in provider_names]
+        # Ask for extra in case some results are photos we already have
+        return await gather_species_media(bird, ranked, max(PHOTOS_PER_SPECIES - len(existing), 1) + len(existing))
+
+    def report(i, job, found):
+        nonlocal added
+        bird, _ = job
+        existing = bird.get('photos', [])
+        known = {p.get('id') for p in existing} | {p.get('url') for p in existing}
+        new = [p for p in found if p['id'] not in known and p['url'] not in known]
+        # A source-diversity gap with a full quota replaces one photo
+        replace = 1 if len(existing) >= PHOTOS_PER_SPECIES else 0
+        bird['photos'], new = add_within_quota(existing, new, PHOTOS_PER_SPECIES,
+                                               lambda p: p.get('source'), replace)
+        added += len(new)
+        print(f"  Added {len(new)} photos")
+
+    asyncio.run(harvest_async(jobs, find_photos, workers, on_result=report,
+                              describe=lambda job: f"{species_label(job[0])}: {', '.join(job[1])}"))
+    return added
+
 
 def main():
+    parser = argparse.ArgumentParser(description='Search for bird photos')
+    parser.add_argument('--bulk-inat', action='store_true',
+                        help='Prefetch iNaturalist photos with batched multi-taxon queries '
+                             '(region first, then Australia) instead of two requests per species')
+    parser.add_argument('--plan', help='harvest_plan.json from coverage_report.py: run only the '
+                                       'planned queries and add to existing photos')
+    parser.add_argument('--region', default=DEFAULT_REGION, choices=REGIONS,
+                        help='Regional dataset to update (see regions.py)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Species searched at once (providers keep their rate limits)')
+    args = parser.parse_args()
+    region = get_region(args.region)
+    output_file = region['datasetPath']
+
+    print(f"Event log: {start_run('search_photos')} (summarise with pipeline_log.py)")
+
     # Load the bird data
-    with open('data/act_birds.json', 'r') as f:
+    with open(output_file, 'r') as f:
         data = json.load(f)
 
+    if args.plan:
+        with open(args.plan, 'r', encoding='utf-8') as f:
+            plan = json.load(f)
+        added = apply_photo_plan(data['birds'], plan, args.workers)
+        update_photo_statistics(data)
+        with open(output_file, 'w') as f:
+            json.dump(data, f, indent=2)
+        print(f"\nAdded {added} photos from the plan; results saved to {output_file}")
+        return
+
     birds = data['birds']
     total = len(birds)
     birds_with_photos = 0
@@ -198,51 +131,29 @@ def main():
     birds_without_photos = []
 
     print(f"Processing {total} bird species...")
+    print(f"Providers: {', '.join(PHOTO_PROVIDERS)} (queried concurrently)")
 
-    for i, bird in enumerate(birds):
-        scientific_name = bird['scientificName']
-        common_name = bird['commonName']
-
-        print(f"[{i+1}/{total}] Searching for {common_name} ({scientific_name})...")
-
-        all_photos = []
-
-        # Try Wikimedia Commons first (preferred)
-        photos = search_wikimedia(scientific_name, common_name)
-        all_photos.extend(photos)
-
-        # If we don't have enough photos, try ALA
-        if len(all_photos) < 2:
-            time.sleep(0.2)  # Rate limiting
-            photos = search_ala(scientific_name)
-            all_photos.extend(photos)
-
-        # If still not enough, try iNaturalist
-        if len(all_photos) < 2:
-            time.sleep(1)  # iNaturalist rate limit
-            photos = search_inaturalist(scientific_name)
-            all_photos.extend(photos)
-
-        # Deduplicate by URL and limit to 5 photos
-        seen_urls = set()
-        unique_photos = []
-        for photo in all_photos:
-            if photo['url'] not in seen_urls and len(unique_photos) < 5:
-                seen_urls.add(photo['url'])
-                unique_photos.append(photo)
+    options = {'inaturalist': {'prefetched': bulk_inaturalist_photos(birds, region)}} if args.bulk_inat else {}
+    providers = [get_provider(name, **options.get(name, {})) for name in PHOTO_PROVIDERS]
 
-        bird['photos'] = unique_photos
+    def report(i, bird, photos):
+        nonlocal birds_with_photos, total_photos
+        bird['photos'] = photos
 
-        if unique_photos:
+        if photos:
             birds_with_photos += 1
-            total_photos += len(unique_photos)
-            print(f"  Found {len(unique_photos)} photos")
+            total_photos += len(photos)
+            print(f"  Found {len(photos)} photos")
         else:
-            birds_without_photos.append(common_name)
+            birds_without_photos.append(bird['commonName'])
             print(f"  No photos found - needs manual review")
 
-        # Rate limiting
-        time.sleep(0.1)
+    _, interrupted = asyncio.run(gather_all(birds, providers, PHOTOS_PER_SPECIES, on_result=report,
+                                            workers=args.workers))
+    if interrupted:
+        # Species not reached keep their previous photos
+        birds_with_photos = sum(1 for b in birds if b.get('photos'))
+        total_photos = sum(len(b.get('photos', [])) for b in birds)
 
     # Update statistics
     data['statistics'] = {
@@ -254,7 +165,6 @@ def main():
     }
 
     # Save updated JSON
-    output_file = 'data/act_birds.json'
     with open(output_file, 'w') as f:
         json.dump(data, f, indent=2)
 
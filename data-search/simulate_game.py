@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Game Session Simulator
+Reproduces the app's DIFFICULTY_LEVELS species pools and distractor selection
+(getTaxonomicWrongOptions in canberra-bird-app/src/utils/birdData.js) and plays
+millions of rounds, vectorised with NumPy, under simple player models, so
+difficulty changes can be measured before deploying
+
+Reports, per level and player model:
+- expected accuracy
+- distractor similarity (share of distractors in the answer's genus/family)
+- distractor diversity (normalised entropy of how often each species is a distractor)
+- repeat rates within a session (same answer twice, distractor seen in the previous round)
+
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+# Mirrors DIFFICULTY_LEVELS in canberra-bird-app/src/utils/birdData.js
+DIFFICULTY_LEVELS = {
+    'beginner': {
+        'rarities': ['very_common', 'common'],
+        'optionCount': 4,
+    },
+    'intermediate': {
+        'rarities': ['very_common', 'common', 'uncommon', 'rare'],
+        'optionCount': 6,
+    },
+    'advanced': {
+        'rarities': ['very_common', 'common', 'uncommon', 'rare', 'vagrant', 'extinct'],
+        'optionCount': 8,
+    },
+}
+
+# FreePlay's default session length
+SESSION_QUESTIONS = 10
+
+# Rounds simulated per NumPy batch (keeps the rounds x species matrix small)
+BATCH_ROUNDS = 20000
+
+# Rarities a "knows common birds" player can name outright
+COMMON_RARITIES = ('very_common', 'common')
+
+
+class Pool:
+    """One difficulty level's species pool as integer-coded arrays"""
+
+    def __init__(self, birds, level):
+        config = DIFFICULTY_LEVELS[level]
+        self.level = level
+        self.option_count = config['optionCount']
+        self.birds = [b for b in birds if b.get('rarity') in config['rarities']]
+        self.size = len(self.birds)
+
+        def codes(values):
+            return np.unique(np.array(values, dtype=object).astype(str), return_inverse=True)[1]
+
+        self.genus = codes([b.get('genus') or b['scientificName'].split()[0] for b in self.birds])
+        self.family = codes([b.get('family') or '' for b in self.birds])
+        self.common = np.array([b.get('rarity') in COMMON_RARITIES for b in self.birds])
+
+        self.same_genus = self.genus[:, None] == self.genus[None, :]
+        self.same_family = self.family[:, None] == self.family[None, :]
+        np.fill_diagonal(self.same_genus, False)
+        np.fill_diagonal(self.same_family, False)
+
+    def preference_tiers(self):
+        """
+        Distractor tier matrix: tiers[answer, candidate] is 0 for preferred
+        candidates, 1 for random fill and 2 for the answer itself
+
+        Matches getTaxonomicWrongOptions: beginner is uniform; intermediate
+        prefers the same family; advanced uses only the same genus when it has
+        enough species, otherwise genus and family together (shuffled as one
+        group), then random fill.
+        """
+        wrong = self.option_count - 1
+        if self.level == 'beginner':
+            preferred = np.ones((self.size, self.size), dtype=bool)
+        elif self.level == 'intermediate':
+            preferred = self.same_family
+        else:
+            genus_only = self.same_genus.sum(axis=1) >= wrong
+            preferred = np.where(genus_only[:, None], self.same_genus, self.same_genus | self.same_family)
+
+        tiers = np.where(preferred, 0.0, 1.0).astype(np.float32)
+        np.fill_diagonal(tiers, 2.0)
+        return tiers
+
+
+def simulate_rounds(pool, rounds, rng, answer_candidates=None):
+    """
+    Play rounds: uniform random answer (getRandomBird) plus its distractors
+
+    Args:
+        answer_candidates: Optional pool indices answers are drawn from (e.g.
+            species with audio); distractors always come from the whole pool
+
+    Yields:
+        (answers, distractors) batches; distractors has shape (batch, optionCount - 1)
+    """
+    tiers = pool.preference_tiers()
+    wrong = pool.option_count - 1
+    if answer_candidates is None:
+        answer_candidates = np.arange(pool.size)
+    for start in range(0, rounds, BATCH_ROUNDS):
+        batch = min(BATCH_ROUNDS, rounds - start)
+        answers = rng.choice(answer_candidates, size=batch)
+        # Random key within each tier == shuffling each tier then concatenating
+        scores = tiers[answers]
+        scores += rng.random((batch, pool.size), dtype=np.float32)
+        distractors = np.argpartition(scores, wrong - 1, axis=1)[:, :wrong]
+        yield answers, distractors
+
+
+def player_confusable(pool, answers, distractors, model):
+    """
+    Number of distractors a player cannot rule out in each round
+
+    Models:
+        guess: cannot rule anything out
+        family: knows families, not genera or species
+        genus: knows genera, not species
+        common: names very common/common birds outright, otherwise knows families
+        expert: knows every species
+    """
+    if model == 'guess':
+        return np.full(len(answers), distractors.shape[1])
+    if model == 'expert':
+        return np.zeros(len(answers), dtype=int)
+
+    same_family = pool.family[distractors] == pool.family[answers][:, None]
+    if model == 'family':
+        return same_family.sum(axis=1)
+    if model == 'genus':
+        return (pool.genus[distractors] == pool.genus[answers][:, None]).sum(axis=1)
+    if model == 'common':
+        return np.where(pool.common[answers], 0, same_family.sum(axis=1))
+    raise ValueError(f"Unknown player model '{model}'")
+
+
+PLAYER_MODELS = ['guess', 'family', 'genus', 'common', 'expert']
+
+
+def simulate_level(pool, rounds, models, rng, session_questions=SESSION_QUESTIONS):
+    """
+    Simulate one difficulty level
+
+    rounds is cut down to whole sessions of session_questions.
+
+    Returns:
+        Dict of metrics for the level
+
+    Raises:
+        ValueError: rounds is less than one session
+    """
+    if rounds < session_questions:
+        raise ValueError(f"rounds must be at least one session ({session_questions})")
+    rounds -= rounds % session_questions
+    distractor_counts = np.zeros(pool.size, dtype=np.int64)
+    accuracy = {model: 0.0 for model in models}
+    same_genus = same_family = 0
+    repeated_sessions = repeated_distractors = 0
+
+    for answers, distractors in simulate_rounds(pool, rounds, rng):
+        distractor_counts += np.bincount(distractors.ravel(), minlength=pool.size)
+        same_genus += (pool.genus[distractors] == pool.genus[answers][:, None]).sum()
+        same_family += (pool.family[distractors] == pool.family[answers][:, None]).sum()
+
+        for model in models:
+            # Uniform guess among the answer and the distractors not ruled out
+            accuracy[model] += (1.0 / (1 + player_confusable(pool, answers, distractors, model))).sum()
+
+        # Sessions: consecutive blocks of session_questions rounds (BATCH_ROUNDS is a multiple)
+        session_answers = np.sort(answers.reshape(-1, session_questions), axis=1)
+        repeated_sessions += (np.diff(session_answers, axis=1) == 0).any(axis=1).sum()
+
+        options = np.concatenate([answers[:, None], distractors], axis=1).reshape(-1, session_questions,
+                                                                                   pool.option_count)
+        previous = options[:, :-1, :]
+        current = distractors.reshape(-1, session_questions, distractors.shape[1])[:, 1:, :]
+        seen_before = (current[..., :, None] == previous[..., None, :]).any(axis=-1).any(axis=-1)
+        repeated_distractors += seen_before.sum()
+
+    total_distractors = distractor_counts.sum()
+    frequency = distractor_counts[distractor_counts > 0] / total_distractors
+    entropy = -(frequency * np.log2(frequency)).sum()
+    sessions = rounds // session_questions
+
+    return {
+        'species': pool.size,
+        'optionCount': pool.option_count,
+        'rounds': rounds,
+        'accuracy': {model: round(accuracy[model] / rounds, 4) for model in models},
+        'distractorSameGenus': round(same_genus / total_distractors, 4),
+        'distractorSameFamily': round(same_family / total_distractors, 4),
+        'distractorEntropy': round(entropy / np.log2(pool.size), 4),
+        'neverDistractor': int((distractor_counts == 0).sum()),
+        'sessionRepeatRate': round(repeated_sessions / sessions, 4),
+        'previousRoundOverlap': round(repeated_distractors / (sessions * (session_questions - 1)), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate game sessions and measure difficulty')
+    parser.add_argument('bird_data', nargs='?', default='../data/act_birds.json',
+                        help='Bird data JSON file')
+    parser.add_argument('--rounds', type=int, default=1_000_000, help='Rounds per difficulty level')
+    parser.add_argument('--players', nargs='*', default=PLAYER_MODELS, choices=PLAYER_MODELS,
+                        help='Player models to evaluate')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--output', help='Also write the metrics to this JSON file')
+    args = parser.parse_args()
+    if args.rounds < SESSION_QUESTIONS:
+        parser.error(f"--rounds must be at least one session ({SESSION_QUESTIONS})")
+
+    with open(args.bird_data, 'r', encoding='utf-8') as f:
+        birds = json.load(f)['birds']
+
+    rng = np.random.default_rng(args.seed)
+    results = {}
+    start = time.perf_counter()
+    for level in DIFFICULTY_LEVELS:
+        results[level] = simulate_level(Pool(birds, level), args.rounds, args.players, rng)
+    elapsed = time.perf_counter() - start
+
+    print(f"Simulated {args.rounds:,} rounds per level in {elapsed:.1f}s\n")
+    print(f"{'level':<14}{'species':>8}{'options':>8}{'genus%':>8}{'family%':>9}{'entropy':>9}"
+          f"{'never':>7}{'repeat%':>9}{'overlap%':>10}")
+    for level, r in results.items():
+        print(f"{level:<14}{r['species']:>8}{r['optionCount']:>8}{100 * r['distractorSameGenus']:>8.1f}"
+              f"{100 * r['distractorSameFamily']:>9.1f}{r['distractorEntropy']:>9.3f}{r['neverDistractor']:>7}"
+              f"{100 * r['sessionRepeatRate']:>9.1f}{100 * r['previousRoundOverlap']:>10.1f}")
+
+    print(f"\nExpected accuracy by player model")
+    print(f"{'level':<14}" + ''.join(f"{model:>9}" for model in args.players))
+    for level, r in results.items():
+        print(f"{level:<14}" + ''.join(f"{100 * r['accuracy'][model]:>8.1f}%" for model in args.players))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nMetrics saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Taxonomy Resolution
+Maps our scientificName (COG 2017 checklist) to each provider's taxon ID, via
+an explicit alias table for names that have changed since, and keeps the
+results in a persistent cache so providers resolve each species only once
+
+Provider search results are matched on exact names rather than taking the
+first result, so a renamed species is never silently resolved to a different
+taxon.
+
+Run as a script to populate the cache for every species in the bird data.
+"""
+
+import argparse
+import json
+import os
+
+# Our name -> other names providers may know the species by (newer splits and
+# genus moves first, then older names). Checked in order after our own name.
+# Only names that refer to our species: a split's parent name (Himantopus
+# himantopus, Trichoglossus haematodus, Acrocephalus stentoreus...) is still a
+# valid species elsewhere, and providers would resolve it to that species.
+TAXONOMY_ALIASES = {
+    'Synoicus ypsilophorus': ['Coturnix ypsilophora'],
+    'Spatula rhynchotis': ['Anas rhynchotis'],
+    'Streptopelia chinensis': ['Spilopelia chinensis'],
+    'Microcarbo melanoleucos': ['Phalacrocorax melanoleucos'],
+    'Ardea alba': ['Ardea alba modesta', 'Ardea modesta'],
+    'Ardea intermedia': ['Ardea plumifera'],
+    'Bubulcus ibis': ['Bubulcus coromandus', 'Ardea ibis'],
+    'Pandion haliaetus': ['Pandion cristatus'],
+    'Haliaeetus leucogaster': ['Icthyophaga leucogaster'],
+    'Accipiter fasciatus': ['Tachyspiza fasciata'],
+    'Accipiter cirrocephalus': ['Tachyspiza cirrocephala'],
+    'Accipiter novaehollandiae': ['Tachyspiza novaehollandiae'],
+    'Antigone rubicunda': ['Grus rubicunda'],
+    'Porphyrio porphyrio': ['Porphyrio melanotus'],
+    'Hypotaenidia philippensis': ['Gallirallus philippensis'],
+    'Zapornia pusilla': ['Porzana pusilla'],
+    'Zapornia tabuensis': ['Porzana tabuensis'],
+    'Tribonyx ventralis': ['Gallinula ventralis'],
+    'Elseyornis melanops': ['Charadrius melanops'],
+    'Gelochelidon nilotica': ['Gelochelidon macrotarsa'],
+    'Zanda funereus': ['Zanda funerea', 'Calyptorhynchus funereus'],
+    'Cacatua leadbeateri': ['Lophochroa leadbeateri'],
+    'Eolophus roseicapilla': ['Eolophus roseicapillus', 'Cacatua roseicapilla'],
+    'Glossopsitta pusilla': ['Parvipsitta pusilla'],
+    'Glossopsitta porphyrocephala': ['Parvipsitta porphyrocephala'],
+    'Chalcites basalis': ['Chrysococcyx basalis'],
+    'Chalcites osculans': ['Chrysococcyx osculans'],
+    'Chalcites lucidus': ['Chrysococcyx lucidus'],
+    'Heteroscenes pallidus': ['Cacomantis pallidus'],
+    'Tyto alba': ['Tyto javanica'],
+    'Calamanthus pyrrhopygius': ['Hylacola pyrrhopygia'],
+    'Pyrrholaemus sagittatus': ['Chthonicola sagittata'],
+    'Caligavis chrysops': ['Lichenostomus chrysops'],
+    'Gavicalis virescens': ['Lichenostomus virescens'],
+    'Nesoptilotis leucotis': ['Lichenostomus leucotis'],
+    'Ptilotula fusca': ['Lichenostomus fuscus'],
+    'Ptilotula penicillata': ['Lichenostomus penicillatus'],
+    'Purnella albifrons': ['Phylidonyris albifrons'],
+    'Sugomel niger': ['Sugomel nigrum', 'Certhionyx niger'],
+    'Edolisoma tenuirostris': ['Edolisoma tenuirostre', 'Coracina tenuirostris'],
+    'Gymnorhina tibicen': ['Cracticus tibicen'],
+    'Mirafra javanica': ['Mirafra horsfieldii'],
+    'Cincloramphus timoriensis': ['Megalurus timoriensis'],
+    'Poodytes gramineus': ['Megalurus gramineus'],
+    'Petrochelidon ariel': ['Hirundo ariel'],
+    'Petrochelidon nigricans': ['Hirundo nigricans'],
+    'Taeniopygia guttata': ['Taeniopygia castanotis'],
+    'Taeniopygia bichenovii': ['Stizoptera bichenovii'],
+    'Neochmia modesta': ['Aidemosyne modesta'],
+    'Anthus novaeseelandiae': ['Anthus australis'],
+    'Chloris chloris': ['Carduelis chloris'],
+}
+
+TAXONOMY_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'taxonomy.json')
+
+
+def candidate_names(scientific_name):
+    """Our name followed by its known aliases"""
+    return [scientific_name] + TAXONOMY_ALIASES.get(scientific_name, [])
+
+
+def _same_name(a, b):
+    return ' '.join((a or '').lower().split()) == ' '.join((b or '').lower().split())
+
+
+def match_ala(name, results):
+    """
+    Pick the ALA BIE search result for exactly this name
+
+    Synonym records point at their accepted concept, which is what we want.
+
+    Returns:
+        (guid, accepted_name) or None
+    """
+    for result in results:
+        if not _same_name(result.get('scientificName') or result.get('name'), name):
+            continue
+        guid = result.get('acceptedConceptID') or result.get('guid')
+        if guid:
+            return guid, result.get('acceptedConceptName') or result.get('scientificName') or name
+    return None
+
+
+def match_inaturalist(name, results):
+    """
+    Pick the iNaturalist /v1/taxa result for exactly this name (active species only)
+
+    Returns:
+        (taxon_id, name) or None
+    """
+    for result in results:
+        if result.get('rank') != 'species' or result.get('is_active') is False:
+            continue
+        if _same_name(result.get('name'), name) or _same_name(result.get('matched_term'), name):
+            return result['id'], result.get('name', name)
+    return None
+
+
+class TaxonomyCache:
+    """
+    Persistent scientificName -> provider taxon ID cache
+
+    Stored as {scientificName: {provider: {'id', 'name'}, 'synonyms': [...]}},
+    where 'name' is the provider's accepted name and synonyms collects every
+    other name the species resolved under.
+    """
+
+    def __init__(self, path=TAXONOMY_CACHE_FILE):
+        self.path = path
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.entries = {}
+
+    def get(self, scientific_name, provider):
+        """Cached provider ID for a species, or None"""
+        return self.entries.get(scientific_name, {}).get(provider, {}).get('id')
+
+    def set(self, scientific_name, provider, provider_id, provider_name):
+        entry = self.entries.setdefault(scientific_name, {'synonyms': []})
+        entry[provider] = {'id': provider_id, 'name': provider_name}
+        if not _same_name(provider_name, scientific_name) and provider_name not in entry['synonyms']:
+            entry['synonyms'].append(provider_name)
+        self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=2, ensure_ascii=False, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+# Shared by all providers in a process
+taxonomy_cache = TaxonomyCache()
+
+
+def main():
+    # Imported here: providers import this module
+    from providers import get_provider
+    from providers.ala_images import resolve_ala_guid
+    from providers.inaturalist import resolve_inaturalist_taxon
+    import asyncio
+
+    parser = argparse.ArgumentParser(description='Resolve and cache provider taxon IDs for every species')
+    parser.add_argument('bird_data', nargs='?', default='../data/act_birds.json',
+                        help='Bird data JSON file')
+    args = parser.parse_args()
+
+    with open(args.bird_data, 'r', encoding='utf-8') as f:
+        birds = json.load(f)['birds']
+
+    ala = get_provider('ala_images')
+    inat = get_provider('inaturalist')
+
+    async def resolve_all():
+        unresolved = []
+        for i, bird in enumerate(birds):
+            name = bird['scientificName']
+            guid = await resolve_ala_guid(ala, name)
+            taxon_id = await resolve_inaturalist_taxon(inat, name)
+            print(f"[{i+1}/{len(birds)}] {name}: ALA {guid or '-'}, iNaturalist {taxon_id or '-'}")
+            if not guid or not taxon_id:
+                unresolved.append(name)
+        return unresolved
+
+    unresolved = asyncio.run(resolve_all())
+
+    renamed = {name: entry['synonyms'] for name, entry in taxonomy_cache.entries.items() if entry.get('synonyms')}
+    print(f"\n=== Summary ===")
+    print(f"Species resolved under another name: {len(renamed)}")
+    for name, synonyms in sorted(renamed.items()):
+        print(f"  {name} -> {', '.join(synonyms)}")
+    print(f"Species not resolved by every provider: {len(unresolved)}")
+    for name in unresolved:
+        print(f"  - {name} (add an entry to TAXONOMY_ALIASES)")
+    print(f"\nCache saved to {taxonomy_cache.path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Silence trim and loudness tests for analyse_audio.py
+Synthetic clips (no ffmpeg needed): continuous recordings must keep their full
+length, real leading/trailing silence must still be trimmed, and loudness must
+match the BS.1770 reference
+"""
+
+import sys
+
+import numpy as np
+
+from analyse_audio import SAMPLE_RATE, analyse_samples, apply_k_weighting, integrated_loudness
+
+rng = np.random.default_rng(0)
+
+
+def tone(seconds, freq=2000.0, amplitude=0.3):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def noise(seconds, amplitude):
+    return (amplitude * rng.standard_normal(int(seconds * SAMPLE_RATE))).astype(np.float32)
+
+
+def test_steady_tone():
+    """A steady 5 s sine is audible from start to end"""
+    result = analyse_samples(tone(5.0))
+    assert result['startOffsetSec'] == 0.0, f"start trimmed to {result['startOffsetSec']}"
+    assert result['endOffsetSec'] is None, f"end trimmed to {result['endOffsetSec']}"
+
+
+def test_continuous_chorus():
+    """A 20 s chorus over a noise bed, louder in the middle, is not trimmed"""
+    seconds = 20.0
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    swell = 0.5 + 0.5 * np.sin(np.pi * t / seconds)
+    chorus = tone(seconds, 2500.0, 0.2) * swell + tone(seconds, 3700.0, 0.1) * (1 - swell)
+    result = analyse_samples((chorus + noise(seconds, 0.02)).astype(np.float32))
+    assert result['startOffsetSec'] == 0.0, f"start trimmed to {result['startOffsetSec']}"
+    assert result['endOffsetSec'] is None, f"end trimmed to {result['endOffsetSec']}"
+
+
+def test_silence_trimmed():
+    """A call between 2 s of near-silence on each side is still trimmed"""
+    clip = np.concatenate([noise(2.0, 1e-4), tone(1.0), noise(2.0, 1e-4)])
+    result = analyse_samples(clip)
+    assert 1.7 <= result['startOffsetSec'] <= 2.0, f"start at {result['startOffsetSec']}"
+    assert result['endOffsetSec'] is not None and 3.0 <= result['endOffsetSec'] <= 3.3, \
+        f"end at {result['endOffsetSec']}"
+
+
+def test_reference_loudness():
+    """A full-scale 997 Hz sine measures -3.01 LUFS (BS.1770 reference) at 48 kHz and the decode rate"""
+    for sample_rate, tolerance in ((48000, 0.01), (SAMPLE_RATE, 0.05)):
+        t = np.arange(5 * sample_rate) / sample_rate
+        sine = np.sin(2 * np.pi * 997.0 * t)
+        loudness = integrated_loudness(apply_k_weighting(sine, sample_rate), sample_rate)
+        assert abs(loudness + 3.01) <= tolerance, f"{loudness:.3f} LUFS at {sample_rate} Hz"
+
+
+if __name__ == '__main__':
+    tests = [test_steady_tone, test_continuous_chorus, test_silence_trimmed, test_reference_loudness]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
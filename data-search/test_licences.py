@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Corpus test for the licence normalisation engine
+Checks every licence spelling our providers are known to return, plus every
+licence string currently in the bird data, against licences.py
+"""
+
+import json
+import os
+import sys
+
+from licences import Licence, is_acceptable_licence, normalize_licence, parse_licence
+
+BIRD_DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'act_birds.json')
+
+# (raw string, default_version, expected Licence or None)
+LICENCE_CORPUS = [
+    # Wikimedia Commons LicenseShortName values
+    ('CC BY 1.0', None, Licence('cc-by', '1.0', False, False, False, None)),
+    ('CC BY 2.0', None, Licence('cc-by', '2.0', False, False, False, None)),
+    ('CC BY 2.5', None, Licence('cc-by', '2.5', False, False, False, None)),
+    ('CC BY 3.0', None, Licence('cc-by', '3.0', False, False, False, None)),
+    ('CC BY 4.0', None, Licence('cc-by', '4.0', False, False, False, None)),
+    ('CC BY-SA 2.0', None, Licence('cc-by', '2.0', False, False, True, None)),
+    ('CC BY-SA 2.5', None, Licence('cc-by', '2.5', False, False, True, None)),
+    ('CC BY-SA 2.5 ca', None, Licence('cc-by', '2.5', False, False, True, 'ca')),
+    ('CC BY-SA 3.0', None, Licence('cc-by', '3.0', False, False, True, None)),
+    ('CC BY-SA 3.0 au', None, Licence('cc-by', '3.0', False, False, True, 'au')),
+    ('CC BY-SA 4.0', None, Licence('cc-by', '4.0', False, False, True, None)),
+    ('CC BY-NC 4.0', None, Licence('cc-by', '4.0', False, True, False, None)),
+    ('CC BY-NC-SA 4.0', None, Licence('cc-by', '4.0', False, True, True, None)),
+    ('CC BY-ND 4.0', None, Licence('cc-by', '4.0', True, False, False, None)),
+    ('CC0', None, Licence('cc0', None, False, False, False, None)),
+    ('CC0 1.0', None, Licence('cc0', '1.0', False, False, False, None)),
+    ('Public domain', None, Licence('pd', None, False, False, False, None)),
+    # Xeno-canto licence URLs
+    ('//creativecommons.org/licenses/by-nc-sa/4.0/', None, Licence('cc-by', '4.0', False, True, True, None)),
+    ('//creativecommons.org/licenses/by-nc-sa/3.0/', None, Licence('cc-by', '3.0', False, True, True, None)),
+    ('//creativecommons.org/licenses/by-nc-sa/2.5/', None, Licence('cc-by', '2.5', False, True, True, None)),
+    ('//creativecommons.org/licenses/by-nc-nd/2.5/', None, Licence('cc-by', '2.5', True, True, False, None)),
+    ('//creativecommons.org/licenses/by-nc-nd/4.0/', None, Licence('cc-by', '4.0', True, True, False, None)),
+    ('//creativecommons.org/licenses/by-sa/4.0/', None, Licence('cc-by', '4.0', False, False, True, None)),
+    ('//creativecommons.org/licenses/by/4.0/', None, Licence('cc-by', '4.0', False, False, False, None)),
+    ('https://creativecommons.org/licenses/by/3.0/au/', None, Licence('cc-by', '3.0', False, False, False, 'au')),
+    ('//creativecommons.org/publicdomain/zero/1.0/', None, Licence('cc0', '1.0', False, False, False, None)),
+    ('https://creativecommons.org/publicdomain/mark/1.0/', None, Licence('pd', None, False, False, False, None)),
+    # iNaturalist license codes (always the current 4.0 licences)
+    ('cc-by', '4.0', Licence('cc-by', '4.0', False, False, False, None)),
+    ('cc-by-nc', '4.0', Licence('cc-by', '4.0', False, True, False, None)),
+    ('cc-by-sa', '4.0', Licence('cc-by', '4.0', False, False, True, None)),
+    ('cc-by-nc-sa', '4.0', Licence('cc-by', '4.0', False, True, True, None)),
+    ('cc-by-nc-nd', '4.0', Licence('cc-by', '4.0', True, True, False, None)),
+    ('cc0', '4.0', Licence('cc0', '1.0', False, False, False, None)),
+    # ALA free-text licences (versionless ones stay versionless)
+    ('CC BY', None, Licence('cc-by', None, False, False, False, None)),
+    ('CC BY-NC', None, Licence('cc-by', None, False, True, False, None)),
+    ('CC-BY 4.0 (Int)', None, Licence('cc-by', '4.0', False, False, False, None)),
+    ('CC-BY-NC 4.0 (Int)', None, Licence('cc-by', '4.0', False, True, False, None)),
+    ('CC BY-NC 3.0 (Au)', None, Licence('cc-by', '3.0', False, True, False, 'au')),
+    ('Creative Commons Attribution 4.0 International', None, Licence('cc-by', '4.0', False, False, False, None)),
+    ('Creative Commons Attribution-NonCommercial 4.0 International', None,
+     Licence('cc-by', '4.0', False, True, False, None)),
+    ('Creative Commons Attribution-Noncommercial-ShareAlike 3.0', None, Licence('cc-by', '3.0', False, True, True, None)),
+    # Not licences
+    ('', None, None),
+    ('All rights reserved', None, None),
+    ('Copyright Some Photographer', None, None),
+]
+
+
+def test_corpus():
+    """Every known spelling parses to the expected canonical tuple"""
+    failures = []
+    for raw, default_version, expected in LICENCE_CORPUS:
+        actual = parse_licence(raw, default_version)
+        if actual != expected:
+            failures.append(f"{raw!r}: expected {expected}, got {actual}")
+
+    for failure in failures:
+        print(f"  ❌ {failure}")
+    assert not failures, f"{len(failures)} corpus entries failed"
+
+
+def test_acceptability():
+    """ND and unrecognised licences are rejected, everything else accepted"""
+    for raw, _, expected in LICENCE_CORPUS:
+        acceptable = expected is not None and not expected.nd
+        assert is_acceptable_licence(raw) == acceptable, raw
+
+
+def test_dataset_round_trip():
+    """Every licence string in the bird data is recognised and already canonical"""
+    if not os.path.exists(BIRD_DATA_FILE):
+        print(f"  (skipped: {BIRD_DATA_FILE} not found)")
+        return
+
+    with open(BIRD_DATA_FILE, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    seen = set()
+    for bird in data.get('birds', []):
+        for entry in bird.get('photos', []) + bird.get('audio', []):
+            seen.add(entry.get('licence', ''))
+
+    failures = [lic for lic in sorted(seen) if normalize_licence(lic) != lic]
+    for lic in failures:
+        print(f"  ❌ {lic!r} -> {normalize_licence(lic)!r}")
+    assert not failures, f"{len(failures)} dataset licences are not canonical"
+
+
+if __name__ == '__main__':
+    tests = [test_corpus, test_acceptability, test_dataset_round_trip]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
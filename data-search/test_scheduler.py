@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Scheduler tests for providers/scheduler.py
+In-process fake providers with set delays (no network): the quota must be
+filled in provider preference order whoever answers first, and providers that
+are no longer needed must be cancelled
+"""
+
+import asyncio
+import sys
+import time
+
+from providers.base import Provider
+from providers.scheduler import gather_species_media
+
+SPECIES = {'scientificName': 'Testus fakeus', 'commonName': 'Fake Bird'}
+
+
+class FakeProvider(Provider):
+    """Yields the given photo file names, waiting delay seconds before each"""
+
+    def __init__(self, name, files, delay=0.0):
+        super().__init__()
+        self.name = name
+        self.source = name
+        self.files = files
+        self.delay = delay
+        self.cancelled = False
+
+    async def search(self, species, limit):
+        try:
+            for file in self.files[:limit]:
+                await asyncio.sleep(self.delay)
+                yield {'url': f"https://example.org/{file}.jpg", 'source': self.name}
+        except (asyncio.CancelledError, GeneratorExit):
+            self.cancelled = True
+            raise
+
+
+def gather(providers, quota):
+    return asyncio.run(gather_species_media(SPECIES, providers, quota))
+
+
+def files(records):
+    return [r['url'].rsplit('/', 1)[-1][:-len('.jpg')] for r in records]
+
+
+def test_slow_preferred_provider_wins():
+    """A slow preferred provider still fills the quota ahead of a fast one"""
+    slow = FakeProvider('preferred', ['p1', 'p2', 'p3'], delay=0.05)
+    fast = FakeProvider('fallback', ['f1', 'f2', 'f3', 'f4'])
+    records = gather([slow, fast], 3)
+    assert files(records) == ['p1', 'p2', 'p3'], f"got {files(records)}"
+
+
+def test_duplicates_credited_to_earlier_provider():
+    """A file both providers return is kept once, as the preferred provider's record"""
+    first = FakeProvider('first', ['a', 'shared'], delay=0.02)
+    second = FakeProvider('second', ['shared', 'b', 'c'])
+    records = gather([first, second], 4)
+    assert files(records) == ['a', 'shared', 'b', 'c'], f"got {files(records)}"
+    shared = records[1]
+    assert shared['source'] == 'first', f"shared file credited to {shared['source']}"
+
+
+def test_unneeded_providers_cancelled():
+    """Once preferred providers fill the quota, slower lower-ranked ones are cancelled"""
+    preferred = FakeProvider('preferred', ['p1', 'p2'])
+    slow = FakeProvider('slow', ['s1', 's2'], delay=5.0)
+    start = time.monotonic()
+    records = gather([preferred, slow], 2)
+    elapsed = time.monotonic() - start
+    assert files(records) == ['p1', 'p2'], f"got {files(records)}"
+    assert slow.cancelled, "lower-ranked provider was not cancelled"
+    assert elapsed < 1.0, f"waited {elapsed:.1f}s for a provider that was not needed"
+
+
+if __name__ == '__main__':
+    tests = [test_slow_preferred_provider_wins, test_duplicates_credited_to_earlier_provider,
+             test_unneeded_providers_cancelled]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)